@@ -0,0 +1,321 @@
+"""
+Batch runs of a crew over a file of topics on a bounded thread or process pool.
+"""
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import re
+import time
+import uuid
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import dotenv
+
+from .config import load_config, load_mlflow_config
+from .crew import GeminiCrew, LMStudioCrew, OllamaCrew
+from .utils.checkpoints import get_checkpoint_store
+from .utils.llm_cache import get_response_cache
+from .utils.mlflow_dashboard import MLflowDashboard
+from .utils.task_memo import get_task_memo
+from .utils.usage_ledger import get_usage_ledger
+
+logger = logging.getLogger(__name__)
+
+CREWS = {"ollama": OllamaCrew, "gemini": GeminiCrew, "lmstudio": LMStudioCrew}
+
+
+def load_topics(path: str) -> List[Dict[str, Any]]:
+    """
+    Read the topics of a batch.
+
+    Text files hold one topic per line; blank lines and "#" comments are
+    skipped. A .json file holds a list and a .jsonl file one entry per line,
+    where an entry is a topic string or a dict with "topic" and optional
+    "analysis_depth", "branch_depth" and "context" overrides.
+    """
+    path = Path(path)
+    text = path.read_text(encoding="utf-8")
+    if path.suffix == ".json":
+        entries = json.loads(text)
+    elif path.suffix == ".jsonl":
+        entries = [json.loads(line) for line in text.splitlines() if line.strip()]
+    else:
+        entries = [line.strip() for line in text.splitlines() if line.strip() and not line.strip().startswith("#")]
+
+    topics = []
+    for entry in entries:
+        spec = {"topic": entry} if isinstance(entry, str) else dict(entry)
+        if not spec.get("topic"):
+            raise ValueError(f"Entry without a topic in {path}: {entry!r}")
+        topics.append(spec)
+    return topics
+
+
+def topic_slug(index: int, topic: str) -> str:
+    """Directory name for a topic's outputs; the index keeps similar topics apart"""
+    slug = re.sub(r"[^a-z0-9]+", "_", topic.lower()).strip("_")[:60]
+    return f"{index:04d}_{slug or 'topic'}"
+
+
+def warm_up(model: str) -> None:
+    """
+    Pay one-off startup costs once per process rather than once per topic.
+
+    Loads the environment, parses the agent and task configs and opens the
+    process-wide response cache, task memo and checkpoint store that every
+    crew in the process then shares. The crews' agents build their LLMs
+    through CrewAI, so model clients are not prebuilt here.
+    """
+    dotenv.load_dotenv()
+    load_config("agents.yaml")
+    load_config("tasks.yaml")
+    get_response_cache()
+    get_task_memo()
+    get_checkpoint_store()
+
+
+def run_topic(job: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Run one topic's crew and write its result.json next to its report.
+
+    Failures are recorded in the result rather than raised, so one topic
+    cannot stop the batch.
+    """
+    spec = job["spec"]
+    topic_dir = Path(job["output_dir"])
+    topic_dir.mkdir(parents=True, exist_ok=True)
+    record = {
+        "index": job["index"],
+        "topic": spec["topic"],
+        "run_id": job["run_id"],
+        "output_dir": str(topic_dir)
+    }
+    start_time = time.time()
+    try:
+        crew = CREWS[job["model"]](
+            topic=spec["topic"],
+            output_dir=str(topic_dir),
+            analysis_depth=spec.get("analysis_depth", job["analysis_depth"]),
+            branch_depth=spec.get("branch_depth", job["branch_depth"])
+        )
+        crew.add_context({"current_year": str(datetime.now().year), **spec.get("context", {})})
+        crew.get_tasks()
+        result = crew.run(run_id=job["run_id"], resume=job["resume"])
+        if isinstance(result, dict) and result.get("status") == "failed":
+            record.update(status="failed", error=result.get("error"))
+        else:
+            record["status"] = "completed"
+        record["usage"] = crew.usage.get("totals", {})
+    except Exception as e:
+        logger.error(f"Topic '{spec['topic']}' failed: {str(e)}")
+        record.update(status="failed", error=str(e))
+    finally:
+        # The ledger lives as long as the worker; keep it to the topics still running
+        get_usage_ledger().clear(job["run_id"])
+    record["duration"] = time.time() - start_time
+
+    with open(topic_dir / "result.json", "w", encoding="utf-8") as f:
+        json.dump(record, f, indent=2, default=str)
+    return record
+
+
+def _previous_status(topic_dir: Path) -> Optional[str]:
+    try:
+        with open(topic_dir / "result.json", encoding="utf-8") as f:
+            return json.load(f).get("status")
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+
+class BatchRunner:
+    """
+    Runs a crew per topic on a bounded pool, streaming results as topics finish.
+
+    With threads, every crew shares the process's parsed configs, response
+    cache, task memo and checkpoint store. With processes, each worker warms
+    up once and then shares them across the topics it runs, while the SQLite
+    stores are shared through disk. The crews' agents call their models
+    through CrewAI's own LLMs, not the shared clients in utils.llm_client.
+
+    Each topic gets its own directory under output_dir holding its report
+    and result.json, and a line per finished topic is appended to
+    batch_results.jsonl. Run ids are "<batch_id>-<index>", so running the
+    same batch id again with resume skips completed topics and resumes the
+    rest from their checkpoints.
+    """
+
+    def __init__(
+        self,
+        model: str = "ollama",
+        output_dir: str = "./outputs/batch",
+        max_workers: int = 4,
+        executor: str = "thread",
+        batch_id: Optional[str] = None,
+        analysis_depth: str = "detailed",
+        branch_depth: int = 3,
+        track_mlflow: bool = True
+    ):
+        if model not in CREWS:
+            raise ValueError(f"Unsupported model type: {model}")
+        if executor not in ("thread", "process"):
+            raise ValueError(f"Unsupported executor: {executor}")
+        self.model = model
+        self.batch_id = batch_id or datetime.now().strftime("%Y%m%d_%H%M%S_") + uuid.uuid4().hex[:6]
+        self.output_dir = Path(output_dir) / self.batch_id
+        self.max_workers = max(1, max_workers)
+        self.executor = executor
+        self.analysis_depth = analysis_depth
+        self.branch_depth = branch_depth
+        self.track_mlflow = track_mlflow
+
+    def _jobs(self, topics: List[Dict[str, Any]], resume: bool) -> List[Dict[str, Any]]:
+        jobs = []
+        for index, spec in enumerate(topics):
+            topic_dir = self.output_dir / topic_slug(index, spec["topic"])
+            if resume and _previous_status(topic_dir) == "completed":
+                continue
+            jobs.append({
+                "index": index,
+                "spec": spec,
+                "model": self.model,
+                "run_id": f"{self.batch_id}-{index:04d}",
+                "output_dir": str(topic_dir),
+                "resume": resume,
+                "analysis_depth": self.analysis_depth,
+                "branch_depth": self.branch_depth
+            })
+        return jobs
+
+    def _executor(self) -> Executor:
+        if self.executor == "process":
+            # Spawned workers start clean instead of inheriting the parent's sockets and SQLite handles
+            return ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=warm_up,
+                initargs=(self.model,)
+            )
+        warm_up(self.model)
+        return ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="batch-topic")
+
+    def run(self, topics: List[Dict[str, Any]], resume: bool = False) -> Dict[str, Any]:
+        """Run every topic and return the batch summary"""
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        jobs = self._jobs(topics, resume)
+        skipped = len(topics) - len(jobs)
+        logger.info(
+            f"Batch {self.batch_id}: {len(jobs)} topic(s) on {self.max_workers} {self.executor} worker(s)"
+            + (f", {skipped} already completed" if skipped else "")
+        )
+
+        dashboard = None
+        if self.track_mlflow:
+            mlflow_config = load_mlflow_config()
+            dashboard = MLflowDashboard(
+                experiment_name=mlflow_config["dashboard"]["experiment_name"],
+                tracking_uri=mlflow_config["dashboard"]["tracking_uri"],
+                artifacts_path=mlflow_config["dashboard"]["artifacts_path"]
+            )
+            dashboard.start_run(
+                run_name=f"batch_{self.batch_id}",
+                tags={"batch_id": self.batch_id, "model": self.model, "executor": self.executor}
+            )
+
+        counts = {"completed": 0, "failed": 0}
+        total_tokens = 0
+        start_time = time.time()
+        with self._executor() as executor, \
+                open(self.output_dir / "batch_results.jsonl", "a", encoding="utf-8") as results_file:
+            futures = {executor.submit(run_topic, job): job for job in jobs}
+            for done, future in enumerate(as_completed(futures), 1):
+                job = futures[future]
+                try:
+                    record = future.result()
+                except Exception as e:
+                    # Only reachable when a worker process dies
+                    record = {"index": job["index"], "topic": job["spec"]["topic"], "run_id": job["run_id"],
+                              "status": "failed", "error": str(e)}
+                counts[record["status"]] += 1
+                total_tokens += record.get("usage", {}).get("total_tokens") or 0
+                results_file.write(json.dumps(record, default=str) + "\n")
+                results_file.flush()
+                logger.info(f"[{done}/{len(jobs)}] {record['status']}: {record['topic']}")
+
+        batch_time = time.time() - start_time
+        summary = {
+            "batch_id": self.batch_id,
+            "output_dir": str(self.output_dir),
+            "topics": len(topics),
+            "skipped": skipped,
+            **counts,
+            "total_tokens": total_tokens,
+            "batch_time": batch_time,
+            "topics_per_hour": len(jobs) / batch_time * 3600 if batch_time else 0.0
+        }
+        with open(self.output_dir / "batch_summary.json", "w", encoding="utf-8") as f:
+            json.dump(summary, f, indent=2)
+
+        if dashboard is not None:
+            dashboard.log_metrics({
+                key: float(summary[key])
+                for key in ("topics", "skipped", "completed", "failed", "total_tokens", "batch_time", "topics_per_hour")
+            })
+            dashboard.end_run()
+
+        logger.info(f"Batch {self.batch_id} finished: {counts['completed']} completed, {counts['failed']} failed")
+        return summary
+
+
+def main() -> Optional[Dict[str, Any]]:
+    logging.basicConfig(level=os.getenv("LOG_LEVEL", "INFO"))
+    dotenv.load_dotenv()
+
+    parser = argparse.ArgumentParser(description="Run a crew over a file of topics")
+    parser.add_argument("topics_file", help="Topics: one per line, or a .json/.jsonl list of topics or topic dicts")
+    parser.add_argument(
+        "--model",
+        choices=sorted(CREWS),
+        default=os.getenv("DEFAULT_MODEL", "gemini"),
+        help="Model type to use for analysis"
+    )
+    parser.add_argument("--workers", type=int, default=int(os.getenv("BATCH_MAX_WORKERS", 4)),
+                        help="Topics run concurrently")
+    parser.add_argument("--executor", choices=["thread", "process"], default=os.getenv("BATCH_EXECUTOR", "thread"),
+                        help="Worker pool type")
+    parser.add_argument("--output-dir", default=os.getenv("BATCH_OUTPUT_DIR", "./outputs/batch"),
+                        help="Directory for per-batch output directories")
+    parser.add_argument("--batch-id", help="Batch id (default: timestamp); reuse it with --resume")
+    parser.add_argument("--resume", action="store_true",
+                        help="Skip topics the batch already completed and resume the rest from checkpoints")
+    parser.add_argument("--analysis-depth", default="detailed", choices=["basic", "detailed", "comprehensive"])
+    parser.add_argument("--branch-depth", type=int, default=3)
+    parser.add_argument("--no-mlflow", action="store_true", help="Don't track the batch in MLflow")
+    args = parser.parse_args()
+
+    if args.resume and not args.batch_id:
+        parser.error("--resume requires --batch-id")
+
+    try:
+        runner = BatchRunner(
+            model=args.model,
+            output_dir=args.output_dir,
+            max_workers=args.workers,
+            executor=args.executor,
+            batch_id=args.batch_id,
+            analysis_depth=args.analysis_depth,
+            branch_depth=args.branch_depth,
+            track_mlflow=not args.no_mlflow
+        )
+        return runner.run(load_topics(args.topics_file), resume=args.resume)
+    except Exception as e:
+        logger.error(f"Batch failed: {str(e)}")
+        return None
+
+
+if __name__ == "__main__":
+    main()
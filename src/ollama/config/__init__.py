@@ -1,17 +1,19 @@
-import yaml
-from pathlib import Path
 from typing import Dict
 
+from .loader import CompiledTemplate, ConfigCache, compile_template, get_config_cache, load_config
+
+__all__ = [
+    "CompiledTemplate",
+    "ConfigCache",
+    "compile_template",
+    "get_config_cache",
+    "load_config",
+    "load_mlflow_config",
+    "load_model_config"
+]
+
 def load_model_config() -> Dict:
-    config_path = Path(__file__).parent / "models.yaml"
-    if not config_path.exists():
-        return {}
-    with open(config_path) as f:
-        return yaml.safe_load(f)
+    return load_config("models.yaml")
 
 def load_mlflow_config() -> Dict:
-    config_path = Path(__file__).parent / "mlflow_config.yaml"
-    if not config_path.exists():
-        return {}
-    with open(config_path) as f:
-        return yaml.safe_load(f)
+    return load_config("mlflow_config.yaml")
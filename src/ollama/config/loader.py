@@ -0,0 +1,129 @@
+"""
+Cached YAML configuration and precompiled placeholder templates.
+"""
+import logging
+import os
+import string
+import threading
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import yaml
+
+logger = logging.getLogger(__name__)
+
+CONFIG_DIR = Path(__file__).parent
+
+_formatter = string.Formatter()
+
+
+class ConfigCache:
+    """
+    Parsed YAML files, re-read only when a file's modification time or size changes.
+
+    Loads cost one stat call once a file is cached. Returned objects are
+    shared between callers and must be treated as read-only.
+    """
+
+    def __init__(self, config_dir: Path = CONFIG_DIR):
+        self.config_dir = Path(config_dir)
+        self.loads = 0
+        self.hits = 0
+        self._entries: Dict[Path, Tuple[Tuple[int, int], Any]] = {}
+        self._lock = threading.Lock()
+
+    def load(self, name: str) -> Optional[Any]:
+        """Return the parsed contents of a file in the config directory, or None if it doesn't exist."""
+        path = self.config_dir / name
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return None
+        version = (stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is not None and entry[0] == version:
+                self.hits += 1
+                return entry[1]
+            with open(path, encoding="utf-8") as f:
+                data = yaml.safe_load(f)
+            self._entries[path] = (version, data)
+            self.loads += 1
+            if entry is not None:
+                logger.info(f"Reloaded {name} after it changed")
+            return data
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"files": len(self._entries), "loads": self.loads, "hits": self.hits}
+
+
+class CompiledTemplate:
+    """
+    A str.format template parsed once and rendered many times.
+
+    Renders like ``text.format(**values)``, including a KeyError for a
+    missing placeholder, and also accepts ``{name|default}`` placeholders
+    as used in tasks.yaml, which fall back to the default text.
+    """
+
+    def __init__(self, text: str):
+        self.text = text
+        self.error: Optional[ValueError] = None
+        self.parts: List[Tuple[str, Optional[str], Optional[str], str, Optional[str]]] = []
+        try:
+            for literal, field_name, format_spec, conversion in _formatter.parse(text):
+                default = None
+                if field_name is not None and "|" in field_name:
+                    field_name, default = field_name.split("|", 1)
+                    # A ":" in the default text is parsed as a format spec; put it back
+                    if format_spec:
+                        default, format_spec = f"{default}:{format_spec}", ""
+                self.parts.append((literal, field_name, default, format_spec or "", conversion))
+        except ValueError as e:
+            # Keep str.format's behaviour of failing when the template is rendered
+            self.error = e
+        self.static = self.error is None and all(field is None for _, field, _, _, _ in self.parts)
+
+    def render(self, values: Dict[str, Any]) -> str:
+        if self.error is not None:
+            raise self.error
+        if self.static:
+            # Only "{{" / "}}" escapes, if anything, to resolve
+            return "".join(literal for literal, _, _, _, _ in self.parts)
+        rendered = []
+        for literal, field_name, default, format_spec, conversion in self.parts:
+            rendered.append(literal)
+            if field_name is None:
+                continue
+            if default is not None and field_name not in values:
+                rendered.append(default)
+                continue
+            value, _ = _formatter.get_field(field_name, (), values)
+            value = _formatter.convert_field(value, conversion)
+            if "{" in format_spec:
+                # Nested fields such as "{width:{n}}" resolve from the same values
+                format_spec = _formatter.vformat(format_spec, (), values)
+            rendered.append(format(value, format_spec))
+        return "".join(rendered)
+
+
+@lru_cache(maxsize=4096)
+def compile_template(text: str) -> CompiledTemplate:
+    """Compile a template once per distinct string."""
+    return CompiledTemplate(text)
+
+
+_config_cache = ConfigCache()
+
+
+def get_config_cache() -> ConfigCache:
+    """Get the process-wide config cache."""
+    return _config_cache
+
+
+def load_config(name: str) -> Any:
+    """Parsed contents of a YAML file in the config directory ({} if missing), cached until it changes."""
+    data = _config_cache.load(name)
+    return data if data is not None else {}
@@ -1,9 +1,10 @@
+import logging
+import uuid
 from datetime import datetime
 from crewai import Agent, Task, Crew, Process
-import yaml
-from pathlib import Path
 import os
-from typing import Dict, List, Optional
+from typing import Any, Dict, List, Optional
+from .config import compile_template, load_config
 from .tools.custom_tool import (
     FileOutputTool,
     MarkdownFormatter,
@@ -12,15 +13,12 @@ from .tools.custom_tool import (
     StructuredThinkingTool,
     BranchAnalysisTool
 )
+from .utils.checkpoints import CrewCheckpointer, link_sequential_context, rehydrate_output, unlink_context
+from .utils.task_memo import get_task_memo, memo_key
+from .utils.task_scheduler import DagScheduler, TaskGraph
+from .utils.usage_ledger import get_usage_ledger
 
-# Load configuration
-config_dir = Path(__file__).parent / "config"
-
-with open(config_dir / "agents.yaml", "r") as f:
-    agents_config = yaml.safe_load(f)
-
-with open(config_dir / "tasks.yaml", "r") as f:
-    tasks_config = yaml.safe_load(f)
+logger = logging.getLogger(__name__)
 
 class BaseCrew:
     def __init__(
@@ -36,8 +34,16 @@ class BaseCrew:
         self.branch_depth = branch_depth
         self.agents = {}
         self.tasks = {}
+        self.dependencies = {}
+        self.freshness = {}
+        self.task_outputs = {}
+        # Raw outputs produced or restored by the current run, by task name
+        self._run_outputs = {}
+        self.run_id = None
+        self._checkpointer = None
         self.tools = self._initialize_tools()
         self.context = {}
+        self.usage = {}
 
     def _initialize_tools(self) -> Dict:
         """Initialize all available tools"""
@@ -50,24 +56,29 @@ class BaseCrew:
             "branch_analysis_tool": BranchAnalysisTool()
         }
 
+    def _template_values(self) -> Dict:
+        """Values available to configuration placeholders"""
+        return {
+            "topic": self.topic,
+            "analysis_depth": self.analysis_depth,
+            "branch_depth": self.branch_depth,
+            **self.context
+        }
+
     def _format_agent_variables(self, config: Dict) -> Dict:
         """Format agent configuration variables"""
+        values = self._template_values()
         formatted = {}
         for key, value in config.items():
             if isinstance(value, str):
-                formatted[key] = value.format(
-                    topic=self.topic,
-                    analysis_depth=self.analysis_depth,
-                    branch_depth=self.branch_depth,
-                    **self.context
-                )
+                formatted[key] = compile_template(value).render(values)
             else:
                 formatted[key] = value
         return formatted
 
     def get_agents(self) -> Dict[str, Agent]:
         """Create agents based on the configuration"""
-        for name, config in agents_config.items():
+        for name, config in load_config("agents.yaml").items():
             if config.get("base_config", False):
                 continue
 
@@ -100,23 +111,14 @@ class BaseCrew:
 
     def _format_task_variables(self, config: Dict) -> Dict:
         """Format task configuration variables"""
+        values = self._template_values()
         formatted = {}
         for key, value in config.items():
             if isinstance(value, str):
-                formatted[key] = value.format(
-                    topic=self.topic,
-                    analysis_depth=self.analysis_depth,
-                    branch_depth=self.branch_depth,
-                    **self.context
-                )
+                formatted[key] = compile_template(value).render(values)
             elif isinstance(value, dict):
                 formatted[key] = {
-                    k: v.format(
-                        topic=self.topic,
-                        analysis_depth=self.analysis_depth,
-                        branch_depth=self.branch_depth,
-                        **self.context
-                    ) if isinstance(v, str) else v
+                    k: compile_template(v).render(values) if isinstance(v, str) else v
                     for k, v in value.items()
                 }
             else:
@@ -128,6 +130,7 @@ class BaseCrew:
         if not self.agents:
             self.get_agents()
 
+        tasks_config = load_config("tasks.yaml")
         for name, config in tasks_config.items():
             if name.startswith("task_templates"):
                 continue
@@ -145,6 +148,14 @@ class BaseCrew:
                     if dep in self.tasks:
                         depends_on.append(self.tasks[dep])
 
+            # A context given as a list of task names also orders execution
+            dependency_names = list(formatted_config.get("depends_on", []))
+            if isinstance(formatted_config.get("context"), list):
+                dependency_names += formatted_config["context"]
+            self.dependencies[name] = [dep for dep in dependency_names if dep in tasks_config]
+            # How long a memoized output stays reusable, e.g. "24h" (see utils.task_memo)
+            self.freshness[name] = formatted_config.get("freshness")
+
             # Create task with additional context
             self.tasks[name] = Task(
                 description=formatted_config["description"],
@@ -161,17 +172,182 @@ class BaseCrew:
         """Add additional context for variable formatting"""
         self.context.update(context)
 
-    def run(self, process_type: Process = Process.sequential) -> Dict:
-        """Run the crew with specified process type"""
-        crew = Crew(
-            agents=list(self.agents.values()),
-            tasks=list(self.tasks.values()),
-            verbose=2,
-            process=process_type
+    def _close_task_usage(self, output: Any) -> None:
+        """Task callback: attribute model usage since the previous task to the finished one."""
+        task_names = {task.description: name for name, task in self.tasks.items()}
+        get_usage_ledger().close_task(
+            getattr(output, "agent", None),
+            task_names.get(getattr(output, "description", None), getattr(output, "description", None))
         )
 
+    def _upstream_outputs(self, name: str) -> List[str]:
+        """
+        Outputs a sequential crew passes a task: those of every task before it
+
+        Only outputs of the current run count; task.output may still hold
+        one from an earlier run of this crew.
+        """
+        names = list(self.tasks)
+        return [self._run_outputs[other] for other in names[:names.index(name)] if other in self._run_outputs]
+
+    def _memo_lookup(self, name: str, upstream: List[str]) -> Optional[str]:
+        """Memoized output of a task for these upstream outputs, if one is still fresh"""
+        memo = get_task_memo()
+        if memo is None:
+            return None
+        max_age = memo.max_age(self.freshness.get(name))
+        if max_age == 0:
+            return None
+        raw = memo.get(memo_key(self.tasks[name], upstream), max_age)
+        if raw is not None:
+            logger.info(f"Reusing memoized output of task '{name}'")
+        return raw
+
+    def _memo_store(self, name: str, output: Any, upstream: List[str]) -> None:
+        memo = get_task_memo()
+        if memo is None or memo.max_age(self.freshness.get(name)) == 0:
+            return
+        memo.put(memo_key(self.tasks[name], upstream), name, str(getattr(output, "raw", output)))
+
+    def _apply_memo(self, tasks: List[Task]) -> List[Task]:
+        """
+        Inject memoized outputs for the leading tasks and return the tasks still to run
+
+        Only a leading run of hits is reused: once a task executes, the
+        tasks after it see a new upstream output and so a new memo key.
+        """
+        names = {id(task): name for name, task in self.tasks.items()}
+        pending = list(tasks)
+        while pending:
+            name = names[id(pending[0])]
+            raw = self._memo_lookup(name, self._upstream_outputs(name))
+            if raw is None:
+                break
+            self._checkpointer.save(name, rehydrate_output(pending.pop(0), raw))
+            self._run_outputs[name] = raw
+        if len(pending) < len(tasks):
+            self._checkpointer.links += link_sequential_context(list(self.tasks.values()))
+        return pending
+
+    def _task_completed(self, output: Any) -> None:
+        """Task callback: attribute usage, checkpoint and memoize the finished task"""
+        self._close_task_usage(output)
+        if self._checkpointer is not None:
+            self._checkpointer.task_callback(output)
+        task_names = {task.description: name for name, task in self.tasks.items()}
+        name = task_names.get(getattr(output, "description", None))
+        if name is not None:
+            self._memo_store(name, output, self._upstream_outputs(name))
+            self._run_outputs[name] = str(getattr(output, "raw", output))
+
+    def _run_task(self, name: str, dependency_outputs: Dict[str, Any]) -> Any:
+        """Execute one task with its dependencies' outputs as context, unless its output is memoized"""
+        task = self.tasks[name]
+        upstream = [str(getattr(output, "raw", output)) for output in dependency_outputs.values()]
+        raw = self._memo_lookup(name, upstream)
+        if raw is not None:
+            output = rehydrate_output(task, raw)
+        else:
+            with get_usage_ledger().attribute(getattr(task.agent, "role", None), name):
+                output = task.execute_sync(agent=task.agent, context="\n\n".join(upstream) or None)
+            self._close_task_usage(output)
+            self._memo_store(name, output, upstream)
+        self._checkpointer.save(name, output)
+        return output
+
+    def _run_dag(self, max_workers: int, completed: Optional[Dict[str, Any]] = None) -> str:
+        """Run tasks concurrently in dependency order and return the final tasks' outputs"""
+        graph = TaskGraph({
+            name: [dep for dep in deps if dep in self.tasks]
+            for name, deps in self.dependencies.items() if name in self.tasks
+        })
+        # A crewai Agent rebinds its executor and tool handler on every task, so
+        # tasks sharing an agent must not overlap
+        exclusive = {name: id(task.agent) for name, task in self.tasks.items()}
+        outcome = DagScheduler(max_workers).run(graph, self._run_task, completed, exclusive)
+        self.task_outputs = outcome["outputs"]
+        if outcome["errors"]:
+            failed = ", ".join(f"{name}: {error}" for name, error in outcome["errors"].items())
+            raise RuntimeError(f"{len(outcome['errors'])} task(s) failed ({failed}); skipped {outcome['skipped']}")
+
+        sinks = graph.sinks()
+        if len(sinks) == 1:
+            return str(getattr(self.task_outputs[sinks[0]], "raw", self.task_outputs[sinks[0]]))
+        return "\n\n".join(
+            f"## {name}\n\n{getattr(self.task_outputs[name], 'raw', self.task_outputs[name])}" for name in sinks
+        )
+
+    def run(
+        self,
+        process_type: Process = Process.sequential,
+        max_workers: Optional[int] = None,
+        run_id: Optional[str] = None,
+        resume: bool = False
+    ) -> Dict:
+        """
+        Run the crew with specified process type
+
+        With more than one worker (max_workers or MAX_PARALLEL_TASKS), a
+        sequential crew runs as a DAG built from each task's depends_on:
+        independent tasks run concurrently (one at a time per agent) and
+        each task starts as soon as its dependencies finish.
+
+        Each finished task is checkpointed under run_id (by default the
+        caller's usage run, else a new id; see self.run_id). With resume,
+        tasks already checkpointed for run_id are restored as context
+        instead of executed.
+
+        With TASK_MEMO_ENABLED, tasks whose memo key (see utils.task_memo)
+        has a fresh stored output are skipped and that output is injected;
+        per-task freshness comes from the "freshness" key in tasks.yaml.
+        """
+        max_workers = max_workers or int(os.getenv("MAX_PARALLEL_TASKS", 1))
+        ledger = get_usage_ledger()
+        # Join the caller's usage run if there is one, so its summary covers this crew
+        owns_usage_run = ledger.current_run() is None
+        self.run_id = run_id or ledger.current_run() or uuid.uuid4().hex
+        self._checkpointer = CrewCheckpointer(self.run_id, self.tasks)
+        self._checkpointer.store.start(self.run_id, {
+            "crew": type(self).__name__,
+            "topic": self.topic,
+            "analysis_depth": self.analysis_depth,
+            "branch_depth": self.branch_depth,
+            "context": self.context
+        })
+
+        use_dag = process_type == Process.sequential and max_workers > 1
+        completed = self._checkpointer.completed_outputs() if resume and use_dag else None
+        tasks = list(self.tasks.values())
+        self._run_outputs = {}
+        if resume and not use_dag:
+            tasks = self._checkpointer.restore(list(self.tasks))
+            pending = {id(task) for task in tasks}
+            self._run_outputs = {
+                name: str(task.output.raw) for name, task in self.tasks.items() if id(task) not in pending
+            }
+        if not use_dag:
+            tasks = self._apply_memo(tasks)
+        crew = None
+        if not use_dag and tasks:
+            crew = Crew(
+                agents=list(self.agents.values()),
+                tasks=tasks,
+                verbose=2,
+                process=process_type,
+                task_callback=self._task_completed
+            )
+
         try:
-            result = crew.kickoff()
+            with ledger.run(self.run_id) as run_id:
+                if use_dag:
+                    result = self._run_dag(max_workers, completed)
+                elif crew is not None:
+                    result = crew.kickoff()
+                else:
+                    # Every task was restored or memoized; the last one holds the final output
+                    result = list(self.tasks.values())[-1].output.raw
+            self.usage = ledger.summary(run_id)
+            self._checkpointer.store.finish(self.run_id)
 
             # Save results using FileOutputTool
             output_tool = self.tools["file_output_tool"]
@@ -191,7 +367,18 @@ class BaseCrew:
 
         except Exception as e:
             print(f"Error during crew execution: {str(e)}")
-            return {"error": str(e), "status": "failed"}
+            self._checkpointer.store.finish(self.run_id, "failed", str(e))
+            return {"error": str(e), "status": "failed", "run_id": self.run_id}
+        finally:
+            # Leave the tasks as built, so the crew can be run again
+            unlink_context(self._checkpointer.links)
+            # self.usage keeps the summary; a caller's run is cleared by the caller
+            if owns_usage_run:
+                ledger.clear(self.run_id)
+
+    def resume(self, run_id: str, process_type: Process = Process.sequential, max_workers: Optional[int] = None) -> Dict:
+        """Continue a checkpointed run, executing only the tasks that did not finish"""
+        return self.run(process_type, max_workers, run_id=run_id, resume=True)
 
 class OllamaCrew(BaseCrew):
     def __init__(self, *args, **kwargs):
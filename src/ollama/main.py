@@ -13,8 +13,10 @@ from typing import Dict, List, Optional, Union
 from concurrent.futures import ThreadPoolExecutor  # Add for parallel processing
 import time
 from functools import wraps
+from src.ollama.config import load_mlflow_config
+from src.ollama.utils.checkpoints import get_checkpoint_store
 from src.ollama.utils.mlflow_dashboard import MLflowDashboard
-import yaml
+from src.ollama.utils.usage_ledger import get_usage_ledger
 
 from src import ollama
 from src.ollama.crew import OllamaCrew
@@ -81,8 +83,7 @@ class OllamaRunner:
         self.setup_environment()
 
         # Initialize MLflow dashboard
-        with open(Path(__file__).parent / "config" / "mlflow_config.yaml", "r") as f:
-            mlflow_config = yaml.safe_load(f)
+        mlflow_config = load_mlflow_config()
 
         self.dashboard = MLflowDashboard(
             experiment_name=mlflow_config["dashboard"]["experiment_name"],
@@ -134,6 +135,18 @@ class OllamaRunner:
     @PerformanceMonitor().track_execution
     def run(self, custom_inputs: Optional[Dict] = None) -> Dict:
         """Run the crew with structured thinking patterns and performance monitoring"""
+        return self._execute(custom_inputs)
+
+    @PerformanceMonitor().track_execution
+    def resume(self, run_id: str) -> Dict:
+        """Resume a checkpointed run; tasks that finished are restored instead of re-executed"""
+        metadata = get_checkpoint_store().load(run_id)["metadata"]
+        custom_inputs = {key: metadata[key] for key in ("topic", "analysis_depth", "branch_depth") if key in metadata}
+        logger.info(f"Resuming run {run_id}")
+        return self._execute(custom_inputs, run_id=run_id)
+
+    def _execute(self, custom_inputs: Optional[Dict] = None, run_id: Optional[str] = None) -> Dict:
+        """Run, or with a run_id resume, the crew under MLflow tracking"""
         try:
             if not self.validate_configuration():
                 raise ValueError("Invalid configuration")
@@ -147,8 +160,17 @@ class OllamaRunner:
             logger.info("Starting crew execution")
 
             start_time = time.time()
-            result = self.crew.run()
+            resume = run_id is not None
+            ledger = get_usage_ledger()
+            with ledger.run(run_id) as run_id:
+                try:
+                    result = self.crew.resume(run_id) if resume else self.crew.run()
+                    usage = ledger.summary(run_id)
+                finally:
+                    # The ledger lives as long as the process; keep it to the runs still going
+                    ledger.clear(run_id)
             execution_time = time.time() - start_time
+            self.dashboard.log_usage(usage)
 
             # Log enhanced metrics
             self.dashboard.log_performance_data(
@@ -170,7 +192,9 @@ class OllamaRunner:
                     "time": execution_time,
                     "memory_usage_mb": psutil.Process().memory_info().rss / (1024 * 1024),
                     "validation_level": self.validation_level
-                }
+                },
+                "usage": usage,
+                "run_id": run_id
             }
 
         except Exception as e:
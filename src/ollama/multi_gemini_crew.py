@@ -6,8 +6,13 @@ from crewai import Agent, Task, Crew, Process
 import google.generativeai as genai
 import os
 import logging
+import asyncio
+import contextvars
 import json
-from typing import Any, List, Optional, Dict
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Tuple
 from pydantic import PrivateAttr # For non-validated private attributes if needed
 from pydantic_core import PydanticCustomError # If needed for custom validation
 from dotenv import load_dotenv
@@ -15,11 +20,20 @@ from src.ollama.tools.tool_factory import ToolFactory
 from src.ollama.simplified_agents import get_gemini_agents
 from src.ollama.simplified_tasks import get_sequential_tasks
 from src.ollama.knowledge.manager import KnowledgeManager
-from langchain_core.callbacks.manager import CallbackManagerForLLMRun
+from src.ollama.utils.backend_stats import get_backend_stats
+from src.ollama.utils.cassette import get_cassette
+from src.ollama.utils.checkpoints import CrewCheckpointer, get_checkpoint_store, restored_crew_output, unlink_context
+from src.ollama.utils.client_registry import get_client_registry
+from src.ollama.utils.concurrency_utils import get_limiter
+from src.ollama.utils.context_budget import get_context_budget
+from src.ollama.utils.rate_limiter import estimate_tokens, get_rate_limiter
+from src.ollama.utils.semantic_cache import get_llm_cache
+from src.ollama.utils.single_flight import get_single_flight, request_key
+from src.ollama.utils.usage_ledger import get_usage_ledger
+from langchain_core.callbacks.manager import AsyncCallbackManagerForLLMRun, CallbackManagerForLLMRun
 from langchain_core.language_models.llms import LLM
 from langchain_core.outputs import GenerationChunk, Generation, LLMResult
 from langchain_community.utilities import SerpAPIWrapper
-import aiosession
 
 
 # Load environment variables if needed
@@ -43,6 +57,12 @@ class GeminiChatLLM(LLM):
     top_p: float = float(os.getenv("GEMINI_TOP_P", 1.0))
     # top_k: Optional[int] = os.getenv("GEMINI_TOP_K") # Add if needed
     max_output_tokens: int = int(os.getenv("GEMINI_MAX_TOKENS", 8192))
+    # When enabled, _call/_acall consume the token stream so callbacks see tokens as they arrive
+    streaming: bool = os.getenv("GEMINI_STREAMING", "false").lower() == "true"
+    # Maximum prompts dispatched at once by _generate/_agenerate
+    max_concurrency: int = int(os.getenv("GEMINI_BATCH_CONCURRENCY", 4))
+    # Share one in-flight call among concurrent identical requests
+    coalesce_requests: bool = os.getenv("LLM_COALESCE_REQUESTS", "true").lower() == "true"
 
     # --- Safety Settings (Class attribute for consistency) ---
     safety_settings: Dict[str, str] = {
@@ -67,13 +87,19 @@ class GeminiChatLLM(LLM):
         """
         # Get API key from environment
         api_key = os.getenv("GEMINI_API_KEY")
+        if not api_key and get_cassette().replaying:
+            # Replayed requests never reach Gemini, so offline replay needs no key or client
+            if self.cache is None:
+                self.cache = get_llm_cache()
+            return
         if not api_key:
             # logger.error("GEMINI_API_KEY environment variable not set")
             raise ValueError("GEMINI_API_KEY environment variable not set")
 
         try:
-            # Configure the Gemini API client library
-            genai.configure(api_key=api_key)
+            # Configure the Gemini API client library once per process
+            registry = get_client_registry()
+            registry.configure(api_key)
 
             # Prepare generation config from validated class attributes
             generation_config = genai.types.GenerationConfig(
@@ -84,13 +110,17 @@ class GeminiChatLLM(LLM):
                 candidate_count=1
             )
 
-            # Initialize the generative model client instance and store it
-            self._client = genai.GenerativeModel(
-                model_name=self.model_name,
+            # Reuse the shared client for this model and configuration
+            self._client = registry.get_model(
+                self.model_name,
                 generation_config=generation_config,
                 safety_settings=self.safety_settings
             )
             # logger.info(f"Gemini client initialized for model: {self.model_name}")
+
+            # Use the response cache (plus the semantic tier, if enabled) unless the caller chose one
+            if self.cache is None:
+                self.cache = get_llm_cache()
         except Exception as e:
             # logger.exception("Failed to initialize Gemini client in model_post_init")
             raise ValueError(f"Failed to initialize Gemini client: {e}") from e
@@ -128,6 +158,10 @@ class GeminiChatLLM(LLM):
 
         return genai.types.GenerationConfig(**config_dict)
 
+    def _fit_prompt(self, prompt: str, generation_config: genai.types.GenerationConfig) -> str:
+        """Trim the prompt to fit the context window left after the requested output tokens."""
+        return get_context_budget("gemini", generation_config.max_output_tokens).fit_prompt(prompt)
+
     def _handle_gemini_response(self, response: genai.types.GenerateContentResponse) -> str:
         """Safely extracts text from the Gemini response, handling potential errors/blocks."""
         try:
@@ -151,6 +185,164 @@ class GeminiChatLLM(LLM):
                  else: raise ValueError("Invalid Gemini response: No candidates found and prompt not blocked.")
         except Exception as e: raise e # Re-raise
 
+    def _build_llm_output(self, response: genai.types.GenerateContentResponse) -> Dict[str, Any]:
+        """Extract token usage from a Gemini response into an llm_output dict."""
+        llm_output = {}
+        if hasattr(response, 'usage_metadata'):
+             llm_output["token_usage"] = {
+                 "prompt_token_count": response.usage_metadata.prompt_token_count,
+                 "candidates_token_count": response.usage_metadata.candidates_token_count,
+                 "total_token_count": response.usage_metadata.total_token_count,
+             }
+             llm_output["usage_metadata"] = response.usage_metadata
+        return llm_output
+
+    def _record_ledger(self, llm_output: Dict[str, Any], latency: float) -> None:
+        """Add a request's token usage and latency to the usage ledger."""
+        usage = llm_output.get("token_usage") or {}
+        get_usage_ledger().record(
+            "gemini",
+            self.model_name,
+            usage.get("prompt_token_count"),
+            usage.get("candidates_token_count"),
+            usage.get("total_token_count"),
+            latency
+        )
+
+    def _cassette_request(self, prompt: str, stop: Optional[List[str]], kwargs: Dict[str, Any]) -> Dict[str, Any]:
+        return {"params": self._identifying_params, "prompt": prompt, "stop": stop, "kwargs": kwargs}
+
+    @staticmethod
+    def _serialize_completion(completion: Tuple[str, Dict[str, Any]]) -> List[Any]:
+        """Cassette form of (text, llm_output); the raw usage_metadata proto is dropped."""
+        text, llm_output = completion
+        return [text, {k: v for k, v in llm_output.items() if k != "usage_metadata"}]
+
+    def _complete(
+        self,
+        prompt: str,
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> Tuple[str, Dict[str, Any]]:
+        """Run one prompt and return its text and llm_output, without end/error callbacks."""
+        cassette = get_cassette()
+        if not cassette.enabled:
+            return self._complete_live(prompt, stop=stop, run_manager=run_manager, **kwargs)
+        start_time = time.perf_counter()
+        text, llm_output = cassette.call(
+            "gemini",
+            self._cassette_request(prompt, stop, kwargs),
+            lambda: self._complete_live(prompt, stop=stop, run_manager=run_manager, **kwargs),
+            serialize=self._serialize_completion,
+            deserialize=tuple
+        )
+        if cassette.replaying:
+            self._record_ledger(llm_output, time.perf_counter() - start_time)
+        return text, llm_output
+
+    def _complete_live(
+        self,
+        prompt: str,
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> Tuple[str, Dict[str, Any]]:
+        """Run one prompt against Gemini, streaming if enabled."""
+        if self.streaming:
+            final_chunk = None
+            for chunk in self._stream(prompt, stop=stop, run_manager=run_manager, **kwargs):
+                final_chunk = chunk if final_chunk is None else final_chunk + chunk
+            if final_chunk is None:
+                return "", {}
+            return final_chunk.text, dict(final_chunk.generation_info or {})
+
+        if not self.coalesce_requests:
+            return self._request(prompt, stop=stop, **kwargs)
+        key = request_key(self._identifying_params, prompt, stop, kwargs)
+        return get_single_flight().do(key, lambda: self._request(prompt, stop=stop, **kwargs))
+
+    def _request(self, prompt: str, stop: Optional[List[str]] = None, **kwargs: Any) -> Tuple[str, Dict[str, Any]]:
+        """Send one non-streaming request under the rate and concurrency limits."""
+        generation_config = self._get_generation_config(stop=stop, **kwargs)
+        prompt = self._fit_prompt(prompt, generation_config)
+        # Reserve rate budget before taking an in-flight slot so waiting callers don't hold one
+        rate_limiter = get_rate_limiter("gemini")
+        reserved_tokens = estimate_tokens(prompt)
+        # Throttling waits count toward latency so routing can steer around them
+        with get_backend_stats().track("gemini", self.model_name, "llm"):
+            rate_limiter.acquire(reserved_tokens)
+            # Share the in-flight budget with async callers
+            with get_limiter("gemini"):
+                start_time = time.perf_counter()
+                response = self.client.generate_content(prompt, generation_config=generation_config)
+                latency = time.perf_counter() - start_time
+        rate_limiter.record_usage(reserved_tokens, response)
+        llm_output = self._build_llm_output(response)
+        self._record_ledger(llm_output, latency)
+        return self._handle_gemini_response(response), llm_output
+
+    async def _acomplete(
+        self,
+        prompt: str,
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> Tuple[str, Dict[str, Any]]:
+        """Async counterpart of _complete built on generate_content_async."""
+        cassette = get_cassette()
+        if not cassette.enabled:
+            return await self._acomplete_live(prompt, stop=stop, run_manager=run_manager, **kwargs)
+        start_time = time.perf_counter()
+        text, llm_output = await cassette.acall(
+            "gemini",
+            self._cassette_request(prompt, stop, kwargs),
+            lambda: self._acomplete_live(prompt, stop=stop, run_manager=run_manager, **kwargs),
+            serialize=self._serialize_completion,
+            deserialize=tuple
+        )
+        if cassette.replaying:
+            self._record_ledger(llm_output, time.perf_counter() - start_time)
+        return text, llm_output
+
+    async def _acomplete_live(
+        self,
+        prompt: str,
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> Tuple[str, Dict[str, Any]]:
+        """Async counterpart of _complete_live."""
+        if self.streaming:
+            final_chunk = None
+            async for chunk in self._astream(prompt, stop=stop, run_manager=run_manager, **kwargs):
+                final_chunk = chunk if final_chunk is None else final_chunk + chunk
+            if final_chunk is None:
+                return "", {}
+            return final_chunk.text, dict(final_chunk.generation_info or {})
+
+        if not self.coalesce_requests:
+            return await self._arequest(prompt, stop=stop, **kwargs)
+        key = request_key(self._identifying_params, prompt, stop, kwargs)
+        return await get_single_flight().do_async(key, lambda: self._arequest(prompt, stop=stop, **kwargs))
+
+    async def _arequest(self, prompt: str, stop: Optional[List[str]] = None, **kwargs: Any) -> Tuple[str, Dict[str, Any]]:
+        """Async counterpart of _request."""
+        generation_config = self._get_generation_config(stop=stop, **kwargs)
+        prompt = self._fit_prompt(prompt, generation_config)
+        rate_limiter = get_rate_limiter("gemini")
+        reserved_tokens = estimate_tokens(prompt)
+        with get_backend_stats().track("gemini", self.model_name, "llm"):
+            await rate_limiter.acquire_async(reserved_tokens)
+            async with get_limiter("gemini"):
+                start_time = time.perf_counter()
+                response = await self.client.generate_content_async(prompt, generation_config=generation_config)
+                latency = time.perf_counter() - start_time
+        rate_limiter.record_usage(reserved_tokens, response)
+        llm_output = self._build_llm_output(response)
+        self._record_ledger(llm_output, latency)
+        return self._handle_gemini_response(response), llm_output
+
     def _call(
         self,
         prompt: str,
@@ -159,22 +351,9 @@ class GeminiChatLLM(LLM):
         **kwargs: Any,
     ) -> str:
         """Execute a single call to the Gemini model."""
-        # Use the client property getter
-        client = self.client
         llm_output = {}
         try:
-            generation_config = self._get_generation_config(stop=stop, **kwargs)
-            if run_manager:
-                run_manager.on_llm_start({}, [prompt], invocation_params=self._identifying_params)
-            response = client.generate_content(prompt, generation_config=generation_config)
-            result_text = self._handle_gemini_response(response)
-            if hasattr(response, 'usage_metadata'):
-                 llm_output["token_usage"] = {
-                     "prompt_token_count": response.usage_metadata.prompt_token_count,
-                     "candidates_token_count": response.usage_metadata.candidates_token_count,
-                     "total_token_count": response.usage_metadata.total_token_count,
-                 }
-                 llm_output["usage_metadata"] = response.usage_metadata
+            result_text, llm_output = self._complete(prompt, stop=stop, run_manager=run_manager, **kwargs)
             if run_manager:
                 generation = Generation(text=result_text)
                 run_manager.on_llm_end(LLMResult(generations=[[generation]], llm_output=llm_output))
@@ -184,8 +363,234 @@ class GeminiChatLLM(LLM):
                 run_manager.on_llm_error(e, response=LLMResult(generations=[], llm_output=llm_output))
             raise e # Re-raise
 
-    # --- Streaming method (Optional) ---
-    # def _stream(...) -> Iterator[GenerationChunk]: ... (Implement as before if needed)
+    async def _acall(
+        self,
+        prompt: str,
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> str:
+        """
+        Execute a single call to the Gemini model without blocking the event loop.
+
+        Uses the native async generate call, so async callers (ainvoke,
+        abatch) can overlap on one loop. The process-wide "gemini" limiter
+        caps requests in flight.
+        """
+        llm_output = {}
+        try:
+            result_text, llm_output = await self._acomplete(prompt, stop=stop, run_manager=run_manager, **kwargs)
+            if run_manager:
+                generation = Generation(text=result_text)
+                await run_manager.on_llm_end(LLMResult(generations=[[generation]], llm_output=llm_output))
+            return result_text
+        except Exception as e:
+            if run_manager:
+                await run_manager.on_llm_error(e, response=LLMResult(generations=[], llm_output=llm_output))
+            raise e # Re-raise
+
+    # --- Batch generation ---
+
+    def _build_batch_result(self, results: List[Tuple[str, Dict[str, Any]]]) -> LLMResult:
+        """
+        Assemble per-prompt results (in input order) into one LLMResult.
+
+        llm_output holds the summed token usage and, for streamed requests,
+        "stream_metrics": one entry per prompt (None where a prompt was not
+        streamed) plus the mean time to first token and tokens/sec under
+        "stream_summary".
+        """
+        totals = {"prompt_token_count": 0, "candidates_token_count": 0, "total_token_count": 0}
+        generations = []
+        stream_metrics = []
+        for text, output in results:
+            usage = output.get("token_usage", {})
+            for key in totals:
+                totals[key] += usage.get(key) or 0
+            stream_metrics.append(output.get("stream_metrics"))
+            # Keep only plain values so generations stay serializable for the response cache
+            info = {key: output[key] for key in ("token_usage", "stream_metrics") if key in output}
+            generations.append([Generation(text=text, generation_info=info or None)])
+        llm_output = {"token_usage": totals, "model_name": self.model_name}
+        streamed = [metrics for metrics in stream_metrics if metrics]
+        if streamed:
+            llm_output["stream_metrics"] = stream_metrics
+            summary = {}
+            for key in ("time_to_first_token", "tokens_per_second"):
+                values = [metrics[key] for metrics in streamed if metrics.get(key) is not None]
+                summary[key] = sum(values) / len(values) if values else None
+            llm_output["stream_summary"] = summary
+        return LLMResult(generations=generations, llm_output=llm_output)
+
+    def _generate(
+        self,
+        prompts: List[str],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> LLMResult:
+        """
+        Run a batch of prompts concurrently.
+
+        LangChain's default implementation calls _call once per prompt in
+        series. Here up to max_concurrency prompts are in flight at once,
+        still subject to the process-wide "gemini" limiter.
+        """
+        def run(prompt: str) -> Tuple[str, Dict[str, Any]]:
+            return self._complete(prompt, stop=stop, run_manager=run_manager, **kwargs)
+
+        workers = max(1, min(self.max_concurrency, len(prompts)))
+        if workers == 1:
+            results = [run(prompt) for prompt in prompts]
+        else:
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                # One context copy per prompt: a Context can't be entered by two threads at once
+                futures = [executor.submit(contextvars.copy_context().run, run, prompt) for prompt in prompts]
+                results = [future.result() for future in futures]
+        return self._build_batch_result(results)
+
+    async def _agenerate(
+        self,
+        prompts: List[str],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> LLMResult:
+        """Async counterpart of _generate; prompts overlap on the event loop up to max_concurrency."""
+        semaphore = asyncio.Semaphore(max(1, self.max_concurrency))
+
+        async def run(prompt: str) -> Tuple[str, Dict[str, Any]]:
+            async with semaphore:
+                return await self._acomplete(prompt, stop=stop, run_manager=run_manager, **kwargs)
+
+        results = await asyncio.gather(*(run(prompt) for prompt in prompts))
+        return self._build_batch_result(list(results))
+
+    # --- Streaming ---
+
+    def _extract_chunk_text(self, chunk: genai.types.GenerateContentResponse) -> str:
+        """Extract text from a streamed response chunk, raising on blocked prompts or responses."""
+        if hasattr(chunk, 'prompt_feedback') and chunk.prompt_feedback.block_reason:
+            raise ValueError(f"Gemini API blocked prompt. Reason: {chunk.prompt_feedback.block_reason}")
+        if not chunk.candidates:
+            return ""
+        candidate = chunk.candidates[0]
+        if candidate.finish_reason == "SAFETY":
+            raise ValueError("Gemini API blocked streamed response due to safety settings. Finish Reason: SAFETY")
+        if hasattr(candidate, 'content') and candidate.content and candidate.content.parts:
+            return "".join(part.text for part in candidate.content.parts if hasattr(part, 'text'))
+        return ""
+
+    def _build_stream_metrics(
+        self,
+        start_time: float,
+        first_token_time: Optional[float],
+        end_time: float,
+        streamed_text: str,
+        last_chunk: Optional[genai.types.GenerateContentResponse],
+    ) -> Dict[str, Any]:
+        """
+        Build the generation_info attached to the final stream chunk.
+
+        Holds token usage (when the API reports it) and stream timing:
+        time to first token, total duration and completion tokens/sec.
+        """
+        info = self._build_llm_output(last_chunk) if last_chunk is not None else {}
+        completion_tokens = info.get("token_usage", {}).get("candidates_token_count")
+        if not completion_tokens:
+            # Rough estimate (~4 characters per token) when usage is not reported
+            completion_tokens = max(1, len(streamed_text) // 4) if streamed_text else 0
+        # Throughput is measured over the decode phase, after the first token arrives
+        decode_time = end_time - (first_token_time if first_token_time is not None else start_time)
+        info["stream_metrics"] = {
+            "time_to_first_token": (first_token_time - start_time) if first_token_time is not None else None,
+            "total_time": end_time - start_time,
+            "completion_tokens": completion_tokens,
+            "tokens_per_second": completion_tokens / decode_time if decode_time > 0 else 0.0,
+        }
+        return info
+
+    def _stream(
+        self,
+        prompt: str,
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> Iterator[GenerationChunk]:
+        """
+        Stream the Gemini response as GenerationChunks.
+
+        Each text chunk is forwarded to run_manager.on_llm_new_token as it
+        arrives. A final empty chunk carries token usage and stream metrics
+        in its generation_info.
+        """
+        client = self.client
+        generation_config = self._get_generation_config(stop=stop, **kwargs)
+        prompt = self._fit_prompt(prompt, generation_config)
+        start_time = time.perf_counter()
+        first_token_time = None
+        last_chunk = None
+        streamed_text = ""
+        rate_limiter = get_rate_limiter("gemini")
+        reserved_tokens = estimate_tokens(prompt)
+        rate_limiter.acquire(reserved_tokens)
+        with get_limiter("gemini"):
+            response = client.generate_content(prompt, generation_config=generation_config, stream=True)
+            for raw_chunk in response:
+                last_chunk = raw_chunk
+                text = self._extract_chunk_text(raw_chunk)
+                if not text:
+                    continue
+                if first_token_time is None:
+                    first_token_time = time.perf_counter()
+                streamed_text += text
+                chunk = GenerationChunk(text=text)
+                if run_manager:
+                    run_manager.on_llm_new_token(text, chunk=chunk)
+                yield chunk
+        # Streamed chunks carry cumulative usage, so the last one settles the reservation
+        rate_limiter.record_usage(reserved_tokens, last_chunk)
+        info = self._build_stream_metrics(start_time, first_token_time, time.perf_counter(), streamed_text, last_chunk)
+        self._record_ledger(info, info["stream_metrics"]["total_time"])
+        yield GenerationChunk(text="", generation_info=info)
+
+    async def _astream(
+        self,
+        prompt: str,
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> AsyncIterator[GenerationChunk]:
+        """Async counterpart of _stream built on generate_content_async."""
+        client = self.client
+        generation_config = self._get_generation_config(stop=stop, **kwargs)
+        prompt = self._fit_prompt(prompt, generation_config)
+        start_time = time.perf_counter()
+        first_token_time = None
+        last_chunk = None
+        streamed_text = ""
+        rate_limiter = get_rate_limiter("gemini")
+        reserved_tokens = estimate_tokens(prompt)
+        await rate_limiter.acquire_async(reserved_tokens)
+        async with get_limiter("gemini"):
+            response = await client.generate_content_async(prompt, generation_config=generation_config, stream=True)
+            async for raw_chunk in response:
+                last_chunk = raw_chunk
+                text = self._extract_chunk_text(raw_chunk)
+                if not text:
+                    continue
+                if first_token_time is None:
+                    first_token_time = time.perf_counter()
+                streamed_text += text
+                chunk = GenerationChunk(text=text)
+                if run_manager:
+                    await run_manager.on_llm_new_token(text, chunk=chunk)
+                yield chunk
+        # Streamed chunks carry cumulative usage, so the last one settles the reservation
+        rate_limiter.record_usage(reserved_tokens, last_chunk)
+        info = self._build_stream_metrics(start_time, first_token_time, time.perf_counter(), streamed_text, last_chunk)
+        self._record_ledger(info, info["stream_metrics"]["total_time"])
+        yield GenerationChunk(text="", generation_info=info)
 
     @property
     def _identifying_params(self) -> Dict[str, Any]:
@@ -249,7 +654,7 @@ class GeminiChatLLM(LLM):
 #         # print(response_with_stop)
 #         # print("--------------------------------")
 #
-#         # Example streaming call (uncomment _stream method first)
+#         # Example streaming call
 #         # print("\n--- Streaming Response ---")
 #         # for chunk in gemini_llm.stream(prompt):
 #         #     print(chunk, end="", flush=True)
@@ -280,6 +685,9 @@ class GeminiMultiCrew:
             topic: The topic to research, summarize, and report on
         """
         self.topic = topic
+        self.run_id = None
+        # Task contexts a resumed run replaced; put back once the crew ran
+        self._context_links = []
         self.logger = logging.getLogger(__name__)
 
         # Initialize Gemini 2.0 LLM with proper configuration from environment
@@ -378,25 +786,113 @@ class GeminiMultiCrew:
             func=save_to_knowledge
         )
 
-    def run(self):
+    def _prepare_crew(self, run_id: Optional[str], resume: bool) -> Optional[Crew]:
+        """
+        Start the run's checkpoint and build a crew for the tasks left to run.
+
+        Returns None when resuming a run whose tasks all finished.
+        """
+        self.run_id = run_id or get_usage_ledger().current_run() or uuid.uuid4().hex
+        named_tasks = {task.name or f"task_{index + 1}": task for index, task in enumerate(self.tasks)}
+        checkpointer = CrewCheckpointer(self.run_id, named_tasks)
+        checkpointer.store.start(self.run_id, {"crew": type(self).__name__, "topic": self.topic})
+        tasks = checkpointer.restore(list(named_tasks)) if resume else self.tasks
+        self._context_links = checkpointer.links
+        if not tasks:
+            unlink_context(self._context_links)
+            return None
+
+        return Crew(
+            agents=list(self.agents.values()),
+            tasks=tasks,
+            verbose=1,  # Maximum verbosity since update
+            process=Process.sequential,  # Ensure sequential execution
+            task_callback=checkpointer.task_callback
+        )
+
+    def run(self, run_id: Optional[str] = None, resume: bool = False):
         """
         Execute the crew with sequential task processing.
 
+        Each finished task is checkpointed under run_id (a new id if not
+        given; see self.run_id), so a failed run can be resumed.
+
+        Args:
+            run_id: Checkpoint run id
+            resume: Restore tasks already checkpointed for run_id instead of executing them
+
         Returns:
-            The final result from the crew execution
+            The crew's CrewOutput; when every task was restored, one built from the checkpointed outputs
         """
         self.logger.info(f"Starting GeminiMultiCrew execution for topic: {self.topic}")
 
         # Create and configure the crew
-        crew = Crew(
-            agents=list(self.agents.values()),
-            tasks=self.tasks,
-            verbose=1,  # Maximum verbosity since update
-            process=Process.sequential  # Ensure sequential execution
-        )
+        crew = self._prepare_crew(run_id, resume)
+        store = get_checkpoint_store()
+        if crew is None:
+            self.logger.info(f"All tasks of run {self.run_id} are checkpointed; nothing to execute")
+            store.finish(self.run_id)
+            return restored_crew_output(self.tasks)
 
         # Execute the crew
-        result = crew.kickoff()
+        try:
+            result = crew.kickoff()
+        except Exception as e:
+            store.finish(self.run_id, "failed", str(e))
+            self.logger.error(f"GeminiMultiCrew run {self.run_id} failed; resume it with resume('{self.run_id}')")
+            raise
+        finally:
+            unlink_context(self._context_links)
+        store.finish(self.run_id)
 
         self.logger.info("GeminiMultiCrew execution completed")
         return result
+
+    def resume(self, run_id: str):
+        """
+        Resume a checkpointed run, re-executing only the tasks that did not finish.
+
+        Completed tasks are rehydrated from the checkpoint and passed on as
+        context. If the run was for another topic, the tasks are rebuilt for it.
+
+        Returns:
+            The final result from the crew execution
+        """
+        topic = get_checkpoint_store().load(run_id)["metadata"].get("topic")
+        if topic and topic != self.topic:
+            self.topic = topic
+            self._create_agents_and_tasks()
+        return self.run(run_id=run_id, resume=True)
+
+    async def run_async(self, run_id: Optional[str] = None, resume: bool = False):
+        """
+        Execute the crew without blocking the running event loop.
+
+        CrewAI's agent loop is synchronous: kickoff_async runs kickoff on a
+        worker thread, so agent LLM calls still go through the sync
+        GeminiChatLLM._call, one thread per crew. The shared "gemini"
+        limiter bounds them together with async callers of _acall and
+        _agenerate. Tasks are checkpointed as in run().
+
+        Returns:
+            The crew's CrewOutput, as from run()
+        """
+        self.logger.info(f"Starting async GeminiMultiCrew execution for topic: {self.topic}")
+
+        crew = self._prepare_crew(run_id, resume)
+        store = get_checkpoint_store()
+        if crew is None:
+            store.finish(self.run_id)
+            return restored_crew_output(self.tasks)
+
+        try:
+            result = await crew.kickoff_async()
+        except Exception as e:
+            store.finish(self.run_id, "failed", str(e))
+            raise
+        finally:
+            unlink_context(self._context_links)
+        store.finish(self.run_id)
+
+        self.logger.info("Async GeminiMultiCrew execution completed")
+        return result
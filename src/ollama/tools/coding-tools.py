@@ -1,21 +1,17 @@
 from typing import Dict, Any, List, Optional
-import google.generativeai as genai
 from PIL import Image
 import os
 import base64
 from io import BytesIO
 import logging
 from ..utils.retry_utils import retry_with_backoff
+from ..utils.client_registry import get_gemini_model
 
 logger = logging.getLogger(__name__)
 
 class CodeExecutor:
     def __init__(self):
-        api_key = os.getenv("GEMINI_API_KEY")
-        if not api_key:
-            raise ValueError("GEMINI_API_KEY environment variable is required")
-        genai.configure(api_key=api_key)
-        self.model = genai.GenerativeModel(os.getenv("GEMINI_MODEL", "models/gemini-2.0-flash"))
+        self.model = get_gemini_model()
 
     @retry_with_backoff(retries=3)
     def execute_code(self, code: str, context: Optional[Dict] = None) -> Dict[str, Any]:
@@ -53,11 +49,7 @@ class CodeExecutor:
 
 class CodeVisionAnalyzer:
     def __init__(self):
-        api_key = os.getenv("GEMINI_API_KEY")
-        if not api_key:
-            raise ValueError("GEMINI_API_KEY environment variable is required")
-        genai.configure(api_key=api_key)
-        self.model = genai.GenerativeModel("models/gemini-pro-vision")
+        self.model = get_gemini_model("models/gemini-pro-vision")
 
     def _encode_image(self, image_path: str) -> str:
         with open(image_path, "rb") as img_file:
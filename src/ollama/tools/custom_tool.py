@@ -11,7 +11,7 @@ from functools import wraps
 from pathlib import Path
 from typing import Any, Dict, List, Optional, Type, Union
 
-from crewai import Tool
+from crewai.tools.base_tool import Tool
 from crewai.tools import BaseTool
 from pydantic import BaseModel, Field
 
@@ -103,10 +103,6 @@ class StructuredThinkingTool(BaseTool, SmartRecoveryMixin):
     description: str = "Validate and analyze XML-structured thinking patterns"
     args_schema: Type[BaseModel] = XMLStructureInput
 
-    def __init__(self):
-        super().__init__()
-        self.logger = logging.getLogger(__name__)
-
     def _validate_cdata(self, elem: ET.Element) -> List[str]:
         """Validate CDATA sections in an element."""
         issues = []
@@ -117,10 +113,17 @@ class StructuredThinkingTool(BaseTool, SmartRecoveryMixin):
                 if child.tag == '![CDATA[' and not child.text.strip():
                     issues.append(f"Empty CDATA in {elem.tag}")
         except Exception as e:
-            self.logger.error(f"CDATA validation error in {elem.tag}: {str(e)}")
+            logger.error(f"CDATA validation error in {elem.tag}: {str(e)}")
             issues.append(f"CDATA validation failed: {str(e)}")
         return issues
 
+    def _validate_structure(self, root: ET.Element, result: ValidationResult) -> None:
+        """Raise StructureError when a section appears more than once at the top level."""
+        tags = [child.tag for child in root]
+        repeated = sorted({tag for tag in tags if tags.count(tag) > 1})
+        if repeated:
+            raise StructureError(f"Repeated sections: {', '.join(repeated)}")
+
     def _calculate_score(
         self, 
         total: int, 
@@ -173,7 +176,7 @@ class StructuredThinkingTool(BaseTool, SmartRecoveryMixin):
             }
 
         except XMLValidationError as e:
-            self.logger.error(f"XML validation failed: {str(e)}")
+            logger.error(f"XML validation failed: {str(e)}")
             return {
                 "valid": False,
                 "error": str(e),
@@ -181,7 +184,7 @@ class StructuredThinkingTool(BaseTool, SmartRecoveryMixin):
                 "timestamp": datetime.now().isoformat()
             }
         except Exception as e:
-            self.logger.error(f"Unexpected error: {str(e)}")
+            logger.error(f"Unexpected error: {str(e)}")
             return {
                 "valid": False,
                 "error": f"Internal error: {str(e)}",
@@ -26,6 +26,8 @@ import uuid
 from typing import List, Dict, Any, Optional
 from langchain.tools import Tool
 
+from ..utils.cassette import get_cassette
+
 # --- Configure Logging ---
 log_level = os.getenv("LOG_LEVEL", "INFO").upper()
 valid_log_levels = ["DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"]
@@ -113,7 +115,8 @@ def _check_core_sdk_availability_and_key(require_core_sdk: bool = True) -> str |
 
 def run_hyper_browser_scrape(input_json: str) -> str:
     """Uses client.scrape.start_and_wait() for targeted extraction."""
-    if error := _check_core_sdk_availability_and_key(require_core_sdk=True): return error
+    # Replayed scrapes never reach HyperBrowser, so offline replay needs neither the SDK nor a key
+    if not get_cassette().replaying and (error := _check_core_sdk_availability_and_key(require_core_sdk=True)): return error
     logger.debug(f"Executing Core SDK 'scrape.start_and_wait' with input: {input_json[:250]}...")
     try:
         data = json.loads(input_json); url = data.get("url"); extract_query = data.get("extract_query"); selector = data.get("selector")
@@ -125,10 +128,12 @@ def run_hyper_browser_scrape(input_json: str) -> str:
         if selector: params_dict["selector"] = selector
         # Add other params like 'regex', 'schema_', 'browser' to params_dict if needed
         logger.info(f"Executing Core SDK 'scrape.start_and_wait' on URL: {url}")
-        client = CoreHyperBrowser()
-        params_obj = StartScrapeJobParams(**params_dict)
-        # Assuming start_and_wait returns the result directly
-        result = client.scrape.start_and_wait(params=params_obj)
+        # Assuming start_and_wait returns the result directly; the cassette keeps its string form
+        result = get_cassette().call(
+            "hyperbrowser_scrape", params_dict,
+            lambda: CoreHyperBrowser().scrape.start_and_wait(params=StartScrapeJobParams(**params_dict)),
+            serialize=lambda value: str(value) if value is not None else None
+        )
         logger.info("Core SDK 'scrape.start_and_wait' completed."); result_str = str(result) if result is not None else "No content scraped."
         return f"HyperBrowser Scrape Result:\n---\n{result_str}\n---"
     except json.JSONDecodeError: logger.error(f"Failed to decode JSON for scrape: {input_json[:250]}..."); return "Error: Invalid JSON input format for scrape."
@@ -137,7 +142,7 @@ def run_hyper_browser_scrape(input_json: str) -> str:
 
 def run_hyper_browser_crawl(input_json: str) -> str:
     """Uses client.crawl.start_and_wait() to crawl a website."""
-    if error := _check_core_sdk_availability_and_key(require_core_sdk=True): return error
+    if not get_cassette().replaying and (error := _check_core_sdk_availability_and_key(require_core_sdk=True)): return error
     logger.debug(f"Executing Core SDK 'crawl.start_and_wait' with input: {input_json[:250]}...")
     try:
         data = json.loads(input_json); start_url = data.get("start_url"); depth = data.get("depth", 1); match_pattern = data.get("match_pattern")
@@ -148,10 +153,11 @@ def run_hyper_browser_crawl(input_json: str) -> str:
         if match_pattern: params_dict["match"] = match_pattern
         # Add other params like 'limit', 'browser' to params_dict if needed
         logger.info(f"Executing Core SDK 'crawl.start_and_wait' starting at: {start_url} with depth {depth_int}")
-        client = CoreHyperBrowser()
-        params_obj = StartCrawlJobParams(**params_dict)
         # Assuming start_and_wait returns the list of URLs
-        result_list = client.crawl.start_and_wait(params=params_obj)
+        result_list = get_cassette().call(
+            "hyperbrowser_crawl", params_dict,
+            lambda: CoreHyperBrowser().crawl.start_and_wait(params=StartCrawlJobParams(**params_dict))
+        )
         logger.info(f"Core SDK 'crawl.start_and_wait' completed, found {len(result_list) if result_list else 0} URLs.")
         return json.dumps(result_list if result_list else [], indent=2)
     except json.JSONDecodeError: logger.error(f"Failed to decode JSON for crawl: {input_json[:250]}..."); return "Error: Invalid JSON input format for crawl."
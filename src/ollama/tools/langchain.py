@@ -259,10 +259,9 @@ class ModelManager:
         return self.models[model_type]
 
     def _init_gemini_model(self, config: Dict) -> Any:
-        import google.generativeai as genai
-        genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
-        return genai.GenerativeModel(
-            model_name=config["name"],
+        from ..utils.client_registry import get_gemini_model
+        return get_gemini_model(
+            config["name"],
             generation_config={
                 "max_output_tokens": config["max_tokens"],
                 "temperature": self.config["llm_settings"]["temperature"],
@@ -1,11 +1,19 @@
+import re
+import xml.etree.ElementTree as ET
 from abc import ABC, abstractmethod
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Set
 from ..utils.model_coordinator import ModelCoordinator
+from ..utils.llm_client import get_llm_client
+from .custom_tool import StructuredThinkingTool, XMLStructureInput
 
 class BaseModelTool(ABC):
+    # Requests are routed and tracked per task class
+    task_class = "default"
+
     def __init__(self):
         self.coordinator = ModelCoordinator()
         self.current_model = None
+        self._validator: Optional[StructuredThinkingTool] = None
 
     @abstractmethod
     def execute(self, **kwargs) -> Dict[str, Any]:
@@ -13,47 +21,92 @@ class BaseModelTool(ABC):
 
     def _get_model(self) -> Optional[Dict]:
         if not self.current_model:
-            self.current_model = self.coordinator.get_primary_model()
+            self.current_model = self.coordinator.get_primary_model(self.task_class)
         return self.current_model
 
-    def _handle_fallback(self) -> bool:
+    def _handle_fallback(self, tried: Optional[Set[str]] = None) -> bool:
         if not self.current_model:
             return False
-        fallback = self.coordinator.get_fallback_model(self.current_model["type"])
+        fallback = self.coordinator.get_fallback_model(self.current_model["type"], self.task_class, tried)
         if fallback:
             self.current_model = fallback
             return True
         return False
 
+    def _complete(self, model: Dict, prompt: str, **kwargs) -> str:
+        """Send a prompt to one backend, recording latency and outcome for routing."""
+        with self.coordinator.track(model, self.task_class):
+            client = get_llm_client(model["type"], self.coordinator.model_name(model))
+            return client.generate(prompt, **kwargs)["text"]
+
+    def _score(self, text: str) -> float:
+        """
+        Score a response for best_by_validator by its thinking structure.
+
+        Responses tagged with StructuredThinkingTool's default sections
+        (<plan>, <thoughts>, <analysis>, <execution>), with or without a root
+        element, get the tool's score. Untagged text scores up to 0.5 by how
+        many of those sections it covers as headings such as "Plan:" or
+        "## Analysis", so tagged answers rank first and prose is still ranked.
+        """
+        if self._validator is None:
+            self._validator = StructuredThinkingTool()
+        sections = XMLStructureInput(content=text).required_tags
+        scores = []
+        for content in (text, f"<response>{text}</response>"):
+            try:
+                root = ET.fromstring(content)
+            except ET.ParseError:
+                continue
+            if not len(root):
+                # Prose parses too once wrapped; only tagged sections count as structure
+                continue
+            # ElementTree drops CDATA markers while parsing, so they can't be checked here
+            scores.append(self._validator._run(content=content, required_tags=sections, check_cdata=False)["score"])
+        if scores:
+            return max(scores)
+        covered = sum(
+            1 for section in sections
+            if re.search(rf"^[\W_]*{section}\b", text, re.IGNORECASE | re.MULTILINE)
+        )
+        return 0.5 * covered / len(sections)
+
+    def _run(self, prompt: str, **kwargs) -> Dict[str, Any]:
+        """Route the prompt for this tool's task class, falling back, hedging or fanning out."""
+        complete = lambda model: self._complete(model, prompt, **kwargs)
+        if self.coordinator.parallel_execution:
+            report = self.coordinator.run_parallel(complete, self.task_class, validator=self._score)
+            report["text"] = report.pop("result")
+            return report
+
+        if self.coordinator.hedge_requests:
+            text, self.current_model = self.coordinator.run_hedged(complete, self.task_class)
+            return {"text": text, "model": self.current_model["type"]}
+
+        # Re-route on every call so traffic follows current latency and error rates
+        self.current_model = self.coordinator.get_primary_model(self.task_class)
+        tried: Set[str] = set()
+        while True:
+            try:
+                return {"text": complete(self.current_model), "model": self.current_model["type"]}
+            except Exception:
+                tried.add(self.current_model["type"])
+                if not self._handle_fallback(tried):
+                    raise
+
 class TextCompletionTool(BaseModelTool):
+    task_class = "text"
+
     def execute(self, prompt: str, **kwargs) -> Dict[str, Any]:
-        model = self._get_model()
-        try:
-            if model["type"] == "gemini":
-                response = model["model"].generate_text(prompt, **kwargs)
-                return {"text": response.text, "model": "gemini"}
-            elif model["type"] == "lmstudio":
-                # LM Studio API call implementation
-                pass
-        except Exception as e:
-            if self._handle_fallback():
-                return self.execute(prompt, **kwargs)
-            raise e
+        return self._run(prompt, **kwargs)
 
 class StructuredOutputTool(BaseModelTool):
+    task_class = "structured"
+
     def execute(self, prompt: str, format_schema: Dict, **kwargs) -> Dict[str, Any]:
-        model = self._get_model()
-        try:
-            if model["type"] == "gemini":
-                response = model["model"].generate_text(
-                    f"{prompt}\nOutput in JSON format following schema: {format_schema}",
-                    **kwargs
-                )
-                return {"result": response.text, "model": "gemini"}
-            elif model["type"] == "lmstudio":
-                # LM Studio API call implementation
-                pass
-        except Exception as e:
-            if self._handle_fallback():
-                return self.execute(prompt, format_schema, **kwargs)
-            raise e
+        output = self._run(
+            f"{prompt}\nOutput in JSON format following schema: {format_schema}",
+            **kwargs
+        )
+        output["result"] = output.pop("text")
+        return output
@@ -9,6 +9,7 @@ import time
 import logging
 import mlflow
 import requests
+from ..utils.cassette import CassetteMissError, get_cassette
 from ..utils.retry_utils import retry_with_backoff
 
 # Configure logging
@@ -26,7 +27,8 @@ class SerperSearchTool:
     def __init__(self):
         """Initialize Serper API tool"""
         self.api_key = os.getenv("SERPER_API_KEY")
-        if not self.api_key:
+        # Replayed searches never reach Serper, so offline replay needs no key
+        if not self.api_key and not get_cassette().replaying:
             raise ValueError("SERPER_API_KEY environment variable is required")
         self._setup_mlflow()
 
@@ -47,7 +49,24 @@ class SerperSearchTool:
         except Exception as e:
             logger.debug(f"Failed to log metrics: {e}")
 
-    @retry_with_backoff(max_attempts=3)
+    def _fetch(self, query: str, max_results: int) -> Dict:
+        """Send the search request and return the raw Serper response"""
+        headers = {
+            "X-API-KEY": self.api_key,
+            "Content-Type": "application/json"
+        }
+
+        response = requests.get(
+            "https://google.serper.dev/search",
+            headers=headers,
+            params={"q": query, "num": max_results},
+            timeout=10
+        )
+        response.raise_for_status()
+        return response.json()
+
+    # A replay miss won't resolve on retry
+    @retry_with_backoff(max_attempts=3, retry_on=lambda e: not isinstance(e, CassetteMissError))
     def search(self, query: str, max_results: int = 5) -> List[SearchResult]:
         """
         Execute search using Serper API
@@ -62,24 +81,16 @@ class SerperSearchTool:
         Raises:
             requests.RequestException: If API request fails
             ValueError: If API response is invalid
+            CassetteMissError: If replaying and the search was not recorded
         """
         start_time = time.time()
         results = []  # Define results here for finally block
         try:
-            headers = {
-                "X-API-KEY": self.api_key,
-                "Content-Type": "application/json"
-            }
-
-            response = requests.get(
-                "https://google.serper.dev/search",
-                headers=headers,
-                params={"q": query, "num": max_results},
-                timeout=10
-            )
-            response.raise_for_status()
-
-            raw_results = response.json().get("organic", [])
+            raw_results = get_cassette().call(
+                "serper",
+                {"q": query, "num": max_results},
+                lambda: self._fetch(query, max_results)
+            ).get("organic", [])
             results = [
                 SearchResult({
                     "title": result.get("title", ""),
@@ -91,6 +102,8 @@ class SerperSearchTool:
 
             return results
 
+        except CassetteMissError:
+            raise
         except requests.RequestException as e:
             logger.error(f"Serper API request failed: {e}")
             return []
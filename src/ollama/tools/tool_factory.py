@@ -14,6 +14,8 @@ from langchain.tools import Tool
 from langchain_community.utilities import GoogleSerperAPIWrapper as SerpAPIWrapper
 from langchain_core.utils import get_from_dict_or_env
 
+from ..utils.cassette import get_cassette
+
 # --- Define a single safe base directory for file operations ---
 SAFE_FILE_DIR = os.path.abspath("./knowledge")
 
@@ -120,6 +122,14 @@ class ToolFactory:
 
     def _create_web_search_tool(self) -> Tool:
         """Creates the Google Serper web search tool."""
+        cassette = get_cassette()
+        if cassette.replaying:
+            # Replayed searches never reach Serper, so offline replay needs no key
+            return Tool(
+                name="web_search",
+                description="Search the web for information using Google Serper. Input should be a search query string.",
+                func=lambda query: cassette.call("serper_web_search", {"query": query}, lambda: None)
+            )
         # Ensure SERPER_API_KEY is used, matching the service
         serper_api_key = get_from_dict_or_env(
             {}, "serper_api_key", "SERPER_API_KEY" # Use helper for flexibility
@@ -137,7 +147,7 @@ class ToolFactory:
             return Tool(
                 name="web_search",
                 description="Search the web for information using Google Serper. Input should be a search query string.",
-                func=search.run
+                func=lambda query: cassette.call("serper_web_search", {"query": query}, lambda: search.run(query))
             )
         except ImportError:
              # Should not happen if langchain_community installed, but good practice
@@ -0,0 +1,153 @@
+"""
+Per-backend latency and error tracking for model routing.
+"""
+import logging
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Deque, Dict, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Default number of requests a backend serves concurrently before queueing
+DEFAULT_CAPACITY = {"gemini": 8, "lmstudio": 1, "ollama": 1}
+
+
+class LatencyStats:
+    """EWMA latency, windowed p95 and EWMA error rate for one backend/model/task class."""
+
+    def __init__(self, alpha: float = 0.2, window: int = 200):
+        self.alpha = alpha
+        self.ewma_latency: Optional[float] = None
+        self.error_rate = 0.0
+        self.requests = 0
+        self.errors = 0
+        self._latencies: Deque[float] = deque(maxlen=window)
+
+    def record(self, latency: float, success: bool) -> None:
+        self.requests += 1
+        self.error_rate = (1 - self.alpha) * self.error_rate + self.alpha * (0.0 if success else 1.0)
+        if not success:
+            self.errors += 1
+            return
+        self._latencies.append(latency)
+        if self.ewma_latency is None:
+            self.ewma_latency = latency
+        else:
+            self.ewma_latency = (1 - self.alpha) * self.ewma_latency + self.alpha * latency
+
+    def p95(self) -> Optional[float]:
+        if not self._latencies:
+            return None
+        ordered = sorted(self._latencies)
+        return ordered[int(0.95 * (len(ordered) - 1))]
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "ewma_latency": self.ewma_latency,
+            "p95_latency": self.p95(),
+            "error_rate": self.error_rate,
+            "requests": self.requests,
+            "errors": self.errors
+        }
+
+
+class BackendStatsRegistry:
+    """
+    Process-wide latency/error statistics keyed on (backend, model, task class).
+
+    Also counts requests in flight per backend so routing can account for
+    queueing on backends that serve few requests at a time.
+    """
+
+    def __init__(self, prior_latency: float = 2.0):
+        """
+        Args:
+            prior_latency: Expected latency in seconds assumed for backends with no samples
+        """
+        self.prior_latency = prior_latency
+        self._stats: Dict[Tuple[str, str, str], LatencyStats] = {}
+        self._in_flight: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def record(self, backend: str, model: str, latency: float, success: bool, task_class: str = "default") -> None:
+        """Record the outcome of one request."""
+        with self._lock:
+            stats = self._stats.setdefault((backend, model, task_class), LatencyStats())
+            stats.record(latency, success)
+
+    @contextmanager
+    def track(self, backend: str, model: str, task_class: str = "default") -> Iterator[None]:
+        """Time a request, counting it as in flight and recording success or failure."""
+        with self._lock:
+            self._in_flight[backend] = self._in_flight.get(backend, 0) + 1
+        start = time.monotonic()
+        success = False
+        try:
+            yield
+            success = True
+        finally:
+            with self._lock:
+                self._in_flight[backend] -= 1
+            self.record(backend, model, time.monotonic() - start, success, task_class)
+
+    def in_flight(self, backend: str) -> int:
+        with self._lock:
+            return self._in_flight.get(backend, 0)
+
+    def _matching(self, backend: str, task_class: Optional[str]) -> List[LatencyStats]:
+        with self._lock:
+            by_class = [s for (b, _, c), s in self._stats.items() if b == backend and c == task_class]
+            if by_class:
+                return by_class
+            # Fall back to everything seen for the backend when the task class has no samples yet
+            return [s for (b, _, _), s in self._stats.items() if b == backend]
+
+    def _aggregate(self, backend: str, task_class: Optional[str]) -> Tuple[Optional[float], float, Optional[float]]:
+        """Request-weighted EWMA latency, error rate and worst p95 for a backend."""
+        stats = self._matching(backend, task_class)
+        with_latency = [s for s in stats if s.ewma_latency is not None]
+        total = sum(s.requests for s in stats)
+        if not stats or total == 0:
+            return None, 0.0, None
+        error_rate = sum(s.error_rate * s.requests for s in stats) / total
+        latency = None
+        if with_latency:
+            weight = sum(s.requests for s in with_latency)
+            latency = sum(s.ewma_latency * s.requests for s in with_latency) / weight
+        p95_values = [p for p in (s.p95() for s in stats) if p is not None]
+        return latency, error_rate, max(p95_values) if p95_values else None
+
+    def p95(self, backend: str, task_class: Optional[str] = None) -> Optional[float]:
+        """Tracked p95 latency for a backend, or None without samples."""
+        return self._aggregate(backend, task_class)[2]
+
+    def expected_time(self, backend: str, task_class: Optional[str] = None) -> float:
+        """
+        Expected seconds to a successful completion on a backend.
+
+        EWMA latency (or the prior) is scaled up by queueing, i.e. requests in
+        flight relative to the backend's capacity, and by the expected number
+        of attempts given the error rate.
+        """
+        latency, error_rate, _ = self._aggregate(backend, task_class)
+        if latency is None:
+            latency = self.prior_latency
+        capacity = int(os.getenv(f"{backend.upper()}_MAX_CONCURRENCY", DEFAULT_CAPACITY.get(backend, 1)))
+        queueing = 1 + self.in_flight(backend) / max(1, capacity)
+        return latency * queueing / max(0.05, 1 - error_rate)
+
+    def summary(self) -> Dict[str, Dict[str, Any]]:
+        """Return all statistics keyed as "backend/model/task_class"."""
+        with self._lock:
+            return {f"{b}/{m}/{c}": s.summary() for (b, m, c), s in self._stats.items()}
+
+
+_backend_stats = BackendStatsRegistry(prior_latency=float(os.getenv("MODEL_PRIOR_LATENCY", 2.0)))
+
+
+def get_backend_stats() -> BackendStatsRegistry:
+    """Get the process-wide backend statistics."""
+    return _backend_stats
@@ -0,0 +1,218 @@
+"""
+Record/replay cassettes for LLM, search and scrape traffic.
+"""
+import asyncio
+import json
+import logging
+import os
+import threading
+import time
+from collections import Counter, defaultdict, deque
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional
+
+from .single_flight import request_key
+
+logger = logging.getLogger(__name__)
+
+CASSETTE_MODES = ("off", "record", "replay")
+
+
+class CassetteMissError(LookupError):
+    """Raised in replay mode when the cassette has no entry for a request."""
+
+
+def _to_json(value: Any) -> Any:
+    """JSON round-trip; values JSON can't represent are stored as null."""
+    return json.loads(json.dumps(value, default=lambda o: None))
+
+
+class Cassette:
+    """
+    Records external calls to a JSONL file and serves them back offline.
+
+    In record mode every call runs live and its request, response and
+    latency are appended to the cassette. In replay mode calls never leave
+    the process: responses are served from the cassette in recorded order
+    per request key (the last one is reused once a key runs out), after an
+    optional simulated delay. Replay of a request that was never recorded
+    raises CassetteMissError. Failed calls are not recorded.
+    """
+
+    def __init__(
+        self,
+        mode: str = "off",
+        path: str = "./cassettes/default.jsonl",
+        latency: str = "recorded",
+        latency_scale: float = 1.0
+    ):
+        """
+        Initialize the cassette.
+
+        Args:
+            mode: "off", "record" or "replay"
+            path: JSONL file to append to or replay from
+            latency: Replay delay: "recorded", "none" or a fixed number of seconds
+            latency_scale: Multiplier applied to the replay delay
+        """
+        if mode not in CASSETTE_MODES:
+            raise ValueError(f"Unknown cassette mode: {mode}; expected one of {', '.join(CASSETTE_MODES)}")
+        self.mode = mode
+        self.path = Path(path)
+        self.latency = latency
+        self.latency_scale = latency_scale
+        self.hits: Counter = Counter()
+        self.misses: Counter = Counter()
+        self.recorded: Counter = Counter()
+        self._entries: Optional[Dict[str, Deque[Dict[str, Any]]]] = None
+        self._last: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> "Cassette":
+        """Read CASSETTE_MODE, CASSETTE_PATH, CASSETTE_LATENCY and CASSETTE_LATENCY_SCALE."""
+        return cls(
+            mode=os.getenv("CASSETTE_MODE", "off").lower(),
+            path=os.getenv("CASSETTE_PATH", "./cassettes/default.jsonl"),
+            latency=os.getenv("CASSETTE_LATENCY", "recorded").lower(),
+            latency_scale=float(os.getenv("CASSETTE_LATENCY_SCALE", 1.0))
+        )
+
+    @property
+    def enabled(self) -> bool:
+        return self.mode != "off"
+
+    @property
+    def replaying(self) -> bool:
+        return self.mode == "replay"
+
+    def _load(self) -> Dict[str, Deque[Dict[str, Any]]]:
+        if self._entries is None:
+            entries: Dict[str, Deque[Dict[str, Any]]] = defaultdict(deque)
+            if self.path.exists():
+                with open(self.path, encoding="utf-8") as f:
+                    for line in f:
+                        if line.strip():
+                            entry = json.loads(line)
+                            entries[entry["key"]].append(entry)
+            else:
+                logger.warning(f"Cassette {self.path} does not exist; every replayed call will miss")
+            self._entries = entries
+            logger.info(f"Loaded {sum(len(e) for e in entries.values())} cassette entries from {self.path}")
+        return self._entries
+
+    def _next(self, kind: str, key: str) -> Dict[str, Any]:
+        with self._lock:
+            queue = self._load().get(key)
+            if queue:
+                entry = queue.popleft()
+                self._last[key] = entry
+            else:
+                entry = self._last.get(key)
+            if entry is None:
+                self.misses[kind] += 1
+                raise CassetteMissError(f"No {kind} entry in cassette {self.path} for request {key[:12]}")
+            self.hits[kind] += 1
+            return entry
+
+    def _delay(self, entry: Dict[str, Any]) -> float:
+        if self.latency == "none":
+            return 0.0
+        base = entry.get("latency", 0.0) if self.latency == "recorded" else float(self.latency)
+        return max(0.0, base * self.latency_scale)
+
+    def _append(self, kind: str, key: str, request: Any, response: Any, latency: float) -> None:
+        entry = {
+            "kind": kind,
+            "key": key,
+            "request": _to_json(request),
+            "response": response,
+            "latency": latency,
+            "timestamp": time.time()
+        }
+        line = json.dumps(entry)
+        with self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+            self.recorded[kind] += 1
+
+    def call(
+        self,
+        kind: str,
+        request: Any,
+        fn: Callable[[], Any],
+        serialize: Callable[[Any], Any] = _to_json,
+        deserialize: Callable[[Any], Any] = lambda value: value
+    ) -> Any:
+        """
+        Run fn through the cassette.
+
+        Args:
+            kind: Traffic type, e.g. "gemini" or "serper"; part of the key
+            request: JSON-serializable description of the request; part of the key
+            fn: Performs the live call
+            serialize: Turns fn's result into a JSON-serializable response
+            deserialize: Turns a recorded response back into fn's result type
+
+        Returns:
+            The live result, or the replayed one
+        """
+        if not self.enabled:
+            return fn()
+        key = request_key(kind, request)
+        if self.replaying:
+            entry = self._next(kind, key)
+            time.sleep(self._delay(entry))
+            return deserialize(entry["response"])
+        start = time.perf_counter()
+        result = fn()
+        self._append(kind, key, request, serialize(result), time.perf_counter() - start)
+        return result
+
+    async def acall(
+        self,
+        kind: str,
+        request: Any,
+        fn: Callable[[], Awaitable[Any]],
+        serialize: Callable[[Any], Any] = _to_json,
+        deserialize: Callable[[Any], Any] = lambda value: value
+    ) -> Any:
+        """Async counterpart of call; fn returns an awaitable."""
+        if not self.enabled:
+            return await fn()
+        key = request_key(kind, request)
+        if self.replaying:
+            entry = self._next(kind, key)
+            await asyncio.sleep(self._delay(entry))
+            return deserialize(entry["response"])
+        start = time.perf_counter()
+        result = await fn()
+        self._append(kind, key, request, serialize(result), time.perf_counter() - start)
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        """Replay hits and misses and recorded entries per traffic kind."""
+        with self._lock:
+            return {
+                "mode": self.mode,
+                "path": str(self.path),
+                "hits": dict(self.hits),
+                "misses": dict(self.misses),
+                "recorded": dict(self.recorded)
+            }
+
+
+_cassette: Optional[Cassette] = None
+_cassette_lock = threading.Lock()
+
+
+def get_cassette() -> Cassette:
+    """Get the process-wide cassette, configured from the environment on first use."""
+    global _cassette
+    with _cassette_lock:
+        if _cassette is None:
+            _cassette = Cassette.from_env()
+            if _cassette.enabled:
+                logger.info(f"Cassette {_cassette.mode} mode using {_cassette.path}")
+        return _cassette
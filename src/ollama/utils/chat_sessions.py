@@ -0,0 +1,229 @@
+"""
+Multi-turn chat sessions with rolling-summary compaction.
+"""
+import logging
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional
+
+from .context_budget import MESSAGE_OVERHEAD_TOKENS, get_context_budget
+from .rate_limiter import estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+SUMMARY_PROMPT = (
+    "Update the running summary of a conversation. Keep facts, decisions, "
+    "constraints and open questions; drop pleasantries and repetition. "
+    "Answer with the summary only, in at most {max_words} words.\n\n"
+    "Current summary:\n{summary}\n\nNew turns:\n{turns}"
+)
+
+
+def to_gemini_history(messages: List[Dict[str, str]]) -> List[Dict[str, Any]]:
+    """Convert OpenAI-style messages to Gemini contents."""
+    # Gemini has no system role in chat history; fold system content into an opening exchange
+    preamble = "\n\n".join(m["content"] for m in messages if m.get("role") == "system")
+    history = []
+    if preamble:
+        history.append({"role": "user", "parts": [preamble]})
+        history.append({"role": "model", "parts": ["Understood."]})
+    for m in messages:
+        if m.get("role") != "system":
+            history.append({"role": "model" if m["role"] == "assistant" else "user", "parts": [m["content"]]})
+    return history
+
+
+class ChatSession:
+    """
+    One conversation: recent turns verbatim plus a rolling summary of older ones.
+
+    When the history passes ``compact_at`` of the token budget, all but the
+    last ``keep_recent`` messages are folded into the summary, so prompt size
+    stays bounded however long the dialogue runs.
+    """
+
+    def __init__(
+        self,
+        conversation_id: str,
+        complete: Callable[[List[Dict[str, str]]], str],
+        summarize: Callable[[str], str],
+        token_budget: int,
+        keep_recent: int = 4,
+        compact_at: float = 0.8
+    ):
+        """
+        Initialize the session.
+
+        Args:
+            conversation_id: Caller-chosen conversation identifier
+            complete: Sends chat messages to the backend and returns the reply text
+            summarize: Sends a single prompt to the backend and returns the text
+            token_budget: Prompt tokens the conversation may use
+            keep_recent: Messages always kept verbatim
+            compact_at: Fraction of the budget that triggers compaction
+        """
+        self.conversation_id = conversation_id
+        self.complete = complete
+        self.summarize = summarize
+        self.token_budget = token_budget
+        self.keep_recent = keep_recent
+        self.compact_at = compact_at
+        self.system: List[Dict[str, str]] = []
+        self.history: List[Dict[str, str]] = []
+        self.summary = ""
+        self.compactions = 0
+        self.lock = threading.Lock()
+
+    def seed(self, messages: List[Dict[str, str]]) -> None:
+        """Load prior messages into a new session; ignored once the session has history."""
+        with self.lock:
+            if self.history or self.system:
+                return
+            self.system = [m for m in messages if m.get("role") == "system"]
+            self.history = [m for m in messages if m.get("role") != "system"]
+
+    def messages(self) -> List[Dict[str, str]]:
+        """Messages to send: system prompts, the summary, then recent turns."""
+        preamble = list(self.system)
+        if self.summary:
+            preamble.append({"role": "system", "content": f"Summary of the earlier conversation:\n{self.summary}"})
+        return preamble + self.history
+
+    def tokens(self) -> int:
+        return sum(estimate_tokens(m.get("content") or "") + MESSAGE_OVERHEAD_TOKENS for m in self.messages())
+
+    def send(self, content: str) -> str:
+        """Add a user message, compacting first if needed, and return the reply."""
+        with self.lock:
+            self.history.append({"role": "user", "content": content})
+            self._compact_if_needed()
+            try:
+                reply = self._complete()
+            except Exception:
+                self.history.pop()
+                raise
+            self.history.append({"role": "assistant", "content": reply})
+            return reply
+
+    def _complete(self) -> str:
+        return self.complete(self.messages())
+
+    def _compact_if_needed(self) -> None:
+        if self.tokens() <= self.token_budget * self.compact_at or len(self.history) <= self.keep_recent:
+            return
+        # Start the kept turns on a user message so roles still alternate after the summary
+        split = len(self.history) - self.keep_recent
+        while split < len(self.history) - 1 and self.history[split].get("role") != "user":
+            split += 1
+        older, recent = self.history[:split], self.history[split:]
+        turns = "\n".join(f"{m['role']}: {m['content']}" for m in older)
+        # Keep the summary to about a quarter of the budget (~0.75 words per token)
+        max_words = max(50, int(self.token_budget * 0.25 * 0.75))
+        self.summary = self.summarize(
+            SUMMARY_PROMPT.format(max_words=max_words, summary=self.summary or "(none)", turns=turns)
+        ).strip()
+        self.history = recent
+        self.compactions += 1
+        self._on_compact()
+        logger.info(
+            f"Compacted {len(older)} message(s) of conversation {self.conversation_id}; "
+            f"now ~{self.tokens()} tokens"
+        )
+
+    def _on_compact(self) -> None:
+        """Hook for sessions that hold backend state derived from the history."""
+
+
+class GeminiChatSession(ChatSession):
+    """
+    Chat session backed by a reusable Gemini ChatSession.
+
+    Each turn is sent with send_message on the same chat object, which keeps
+    its own history. The chat object is rebuilt only after compaction, from
+    the summary and recent turns.
+    """
+
+    def __init__(self, conversation_id: str, model: Any, token_budget: int, **kwargs: Any):
+        super().__init__(
+            conversation_id,
+            complete=None,
+            summarize=lambda prompt: model.generate_content(prompt).text,
+            token_budget=token_budget,
+            **kwargs
+        )
+        self.model = model
+        self._chat = None
+
+    def _complete(self) -> str:
+        messages = self.messages()
+        if self._chat is None:
+            self._chat = self.model.start_chat(history=to_gemini_history(messages[:-1]))
+        try:
+            return self._chat.send_message(messages[-1]["content"]).text
+        except Exception:
+            # The chat object may hold the failed turn; rebuild it from our history next time
+            self._chat = None
+            raise
+
+    def _on_compact(self) -> None:
+        self._chat = None
+
+
+class ChatSessionManager:
+    """Keeps the most recently used sessions for one backend, keyed on conversation id."""
+
+    def __init__(self, factory: Callable[[str], ChatSession], max_sessions: int = 256):
+        self.factory = factory
+        self.max_sessions = max_sessions
+        self._sessions: "OrderedDict[str, ChatSession]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_session(self, conversation_id: str) -> ChatSession:
+        """Return the session for a conversation, creating it on first use."""
+        with self._lock:
+            session = self._sessions.get(conversation_id)
+            if session is None:
+                session = self.factory(conversation_id)
+                self._sessions[conversation_id] = session
+                while len(self._sessions) > self.max_sessions:
+                    self._sessions.popitem(last=False)
+            else:
+                self._sessions.move_to_end(conversation_id)
+            return session
+
+    def chat(self, conversation_id: Optional[str], messages: List[Dict[str, str]]) -> str:
+        """
+        Send the last message of a conversation and return the reply.
+
+        Earlier messages seed a new session; for an existing session only the
+        last message is sent, since the session already holds the rest. Without
+        a conversation id a throwaway session is used.
+        """
+        session = self.get_session(conversation_id) if conversation_id else self.factory("")
+        session.seed(messages[:-1])
+        return session.send(messages[-1]["content"])
+
+    def drop(self, conversation_id: str) -> None:
+        with self._lock:
+            self._sessions.pop(conversation_id, None)
+
+
+def session_token_budget(model_type: str) -> int:
+    """Prompt tokens per conversation: CHAT_SESSION_TOKEN_BUDGET, capped by the context window."""
+    budget = int(os.getenv("CHAT_SESSION_TOKEN_BUDGET", 16000))
+    return min(budget, get_context_budget(model_type).prompt_budget)
+
+
+_managers: Dict[str, ChatSessionManager] = {}
+_managers_lock = threading.Lock()
+
+
+def get_session_manager(model_type: str, factory: Callable[[str], ChatSession]) -> ChatSessionManager:
+    """Get the shared session manager for a backend, created with `factory` on first use."""
+    with _managers_lock:
+        manager = _managers.get(model_type)
+        if manager is None:
+            manager = ChatSessionManager(factory, max_sessions=int(os.getenv("CHAT_SESSION_MAX_SESSIONS", 256)))
+            _managers[model_type] = manager
+        return manager
@@ -0,0 +1,229 @@
+"""
+Run-scoped checkpoints of crew task outputs, for resuming failed runs.
+"""
+import json
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from crewai import Task
+from crewai.crews.crew_output import CrewOutput
+from crewai.tasks.task_output import TaskOutput
+
+logger = logging.getLogger(__name__)
+
+
+def rehydrate_output(task: Task, raw: str) -> TaskOutput:
+    """Give a task a stored output, as if it had just run; CrewAI reads it as context."""
+    task.output = TaskOutput(
+        description=task.description,
+        expected_output=task.expected_output,
+        raw=raw,
+        agent=getattr(task.agent, "role", "") or ""
+    )
+    return task.output
+
+
+def link_sequential_context(tasks: List[Task]) -> List[Tuple[Task, Any]]:
+    """
+    Give each task without an explicit context every task before it as context.
+
+    That is what a sequential crew passes implicitly, so a crew built from
+    a subset of the tasks still sees the outputs of the ones left out.
+    Returns the (task, previous context) pairs to hand to unlink_context
+    once the crew has run, so the tasks can be run again as built.
+    """
+    links = []
+    for index, task in enumerate(tasks):
+        # CrewAI marks an unset context with a (truthy) sentinel, not a list
+        if index and not (isinstance(task.context, list) and task.context):
+            links.append((task, task.context))
+            task.context = tasks[:index]
+    return links
+
+
+def unlink_context(links: List[Tuple[Task, Any]]) -> None:
+    """Put back the contexts link_sequential_context replaced."""
+    for task, context in reversed(links):
+        task.context = context
+
+
+def restored_crew_output(tasks: List[Task]) -> CrewOutput:
+    """The CrewOutput a crew would have returned for tasks that all hold an output."""
+    outputs = [task.output for task in tasks]
+    return CrewOutput(raw=outputs[-1].raw, tasks_output=outputs)
+
+
+class CheckpointStore:
+    """
+    One JSON file per crew run holding run metadata and each finished task's output.
+
+    Files are rewritten atomically after every task, so a crash leaves the
+    last completed task on disk.
+    """
+
+    def __init__(self, root: Optional[str] = None):
+        self.root = Path(root or os.getenv("CHECKPOINT_DIR", "./checkpoints"))
+        self._lock = threading.Lock()
+
+    def path(self, run_id: str) -> Path:
+        return self.root / f"{run_id}.json"
+
+    def _read(self, run_id: str) -> Optional[Dict[str, Any]]:
+        path = self.path(run_id)
+        if not path.exists():
+            return None
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+
+    def _write(self, checkpoint: Dict[str, Any]) -> None:
+        checkpoint["updated"] = time.time()
+        self.root.mkdir(parents=True, exist_ok=True)
+        path = self.path(checkpoint["run_id"])
+        tmp_path = path.with_suffix(".json.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(checkpoint, f, indent=2, default=str)
+        os.replace(tmp_path, path)
+
+    def start(self, run_id: str, metadata: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Create the run's checkpoint, or mark an existing one as running again."""
+        with self._lock:
+            checkpoint = self._read(run_id) or {
+                "run_id": run_id,
+                "created": time.time(),
+                "metadata": metadata or {},
+                "tasks": {},
+                "attempts": 0
+            }
+            checkpoint["status"] = "running"
+            checkpoint["attempts"] += 1
+            checkpoint.pop("error", None)
+            self._write(checkpoint)
+            return checkpoint
+
+    def save_task(self, run_id: str, name: str, output: Any, task: Optional[Task] = None) -> None:
+        """Record a finished task's output."""
+        with self._lock:
+            checkpoint = self._read(run_id)
+            if checkpoint is None:
+                raise KeyError(f"No checkpoint for run {run_id}")
+            checkpoint["tasks"][name] = {
+                "output": str(getattr(output, "raw", output)),
+                "agent": getattr(output, "agent", None),
+                "description": getattr(task, "description", None) or getattr(output, "description", None),
+                "completed_at": time.time()
+            }
+            self._write(checkpoint)
+        logger.info(f"Checkpointed task '{name}' of run {run_id}")
+
+    def finish(self, run_id: str, status: str = "completed", error: Optional[str] = None) -> None:
+        with self._lock:
+            checkpoint = self._read(run_id)
+            if checkpoint is None:
+                return
+            checkpoint["status"] = status
+            if error:
+                checkpoint["error"] = error
+            self._write(checkpoint)
+
+    def load(self, run_id: str) -> Dict[str, Any]:
+        """Return a run's checkpoint; raises KeyError if there is none."""
+        with self._lock:
+            checkpoint = self._read(run_id)
+        if checkpoint is None:
+            raise KeyError(f"No checkpoint for run {run_id} in {self.root}")
+        return checkpoint
+
+    def runs(self) -> List[Dict[str, Any]]:
+        """Id, status, attempts and completed task names of every checkpointed run."""
+        summaries = []
+        for path in sorted(self.root.glob("*.json")):
+            with open(path, encoding="utf-8") as f:
+                checkpoint = json.load(f)
+            summaries.append({
+                "run_id": checkpoint["run_id"],
+                "status": checkpoint.get("status"),
+                "attempts": checkpoint.get("attempts"),
+                "tasks": list(checkpoint.get("tasks", {}))
+            })
+        return summaries
+
+
+class CrewCheckpointer:
+    """
+    Checkpoints the named tasks of one crew run and rehydrates them on resume.
+
+    A checkpointed task is only reused if its description still matches,
+    so a crew rebuilt with different inputs re-executes it.
+    """
+
+    def __init__(self, run_id: str, tasks: Dict[str, Task], store: Optional[CheckpointStore] = None):
+        self.run_id = run_id
+        self.tasks = tasks
+        self.store = store or get_checkpoint_store()
+        self._names = {task.description: name for name, task in tasks.items()}
+        # Contexts replaced by restore(); pass to unlink_context after the crew ran
+        self.links: List[Tuple[Task, Any]] = []
+
+    def task_callback(self, output: Any) -> None:
+        """Crew task_callback: checkpoint the task that produced `output`."""
+        name = self._names.get(getattr(output, "description", None))
+        if name is None:
+            logger.warning(f"Finished task is not part of run {self.run_id}; not checkpointed")
+            return
+        self.save(name, output)
+
+    def save(self, name: str, output: Any) -> None:
+        self.store.save_task(self.run_id, name, output, self.tasks.get(name))
+
+    def completed_outputs(self) -> Dict[str, str]:
+        """Checkpointed outputs of tasks that are unchanged since they ran."""
+        try:
+            saved = self.store.load(self.run_id)["tasks"]
+        except KeyError:
+            return {}
+        outputs = {}
+        for name, entry in saved.items():
+            task = self.tasks.get(name)
+            if task is None or entry.get("description") != task.description:
+                logger.warning(f"Task '{name}' changed since run {self.run_id} checkpointed it; it will run again")
+                continue
+            outputs[name] = entry["output"]
+        return outputs
+
+    def restore(self, order: List[str]) -> List[Task]:
+        """
+        Rehydrate checkpointed tasks and return the tasks still to run, in order.
+
+        Restored tasks get their saved output, and pending tasks are linked
+        to the tasks before them (see link_sequential_context); the replaced
+        contexts are kept in self.links.
+        """
+        outputs = self.completed_outputs()
+        pending = []
+        for name in order:
+            task = self.tasks[name]
+            if name in outputs:
+                rehydrate_output(task, outputs[name])
+            else:
+                pending.append(task)
+        self.links += link_sequential_context([self.tasks[name] for name in order])
+        if outputs:
+            logger.info(f"Resuming run {self.run_id}: reusing {len(outputs)} task output(s), {len(pending)} task(s) to run")
+        return pending
+
+
+_checkpoint_store: Optional[CheckpointStore] = None
+_checkpoint_store_lock = threading.Lock()
+
+
+def get_checkpoint_store() -> CheckpointStore:
+    """Get the process-wide checkpoint store (CHECKPOINT_DIR, default ./checkpoints)."""
+    global _checkpoint_store
+    with _checkpoint_store_lock:
+        if _checkpoint_store is None:
+            _checkpoint_store = CheckpointStore()
+        return _checkpoint_store
@@ -0,0 +1,121 @@
+"""
+Process-wide registry of shared, pre-configured Gemini clients.
+"""
+import logging
+import os
+import threading
+from collections import Counter
+from typing import Any, Dict, Hashable, Optional
+
+import google.generativeai as genai
+
+from .rate_limiter import RateLimitedModel, rate_limited
+from .single_flight import request_key
+
+logger = logging.getLogger(__name__)
+
+
+class ClientRegistry:
+    """
+    Hands out one GenerativeModel per (model, generation config, safety settings).
+
+    GenerativeModel holds no per-request state, so a single instance can be
+    shared across agents, tools and threads. ``genai.configure`` runs once
+    per API key instead of on every construction. Construction and reuse
+    counts are kept per model name for instrumentation.
+    """
+
+    def __init__(self):
+        self._models: Dict[Hashable, Any] = {}
+        self._wrapped: Dict[Hashable, RateLimitedModel] = {}
+        self._configured_key: Optional[str] = None
+        self._lock = threading.Lock()
+        self.constructions: Counter = Counter()
+        self.hits: Counter = Counter()
+
+    def configure(self, api_key: Optional[str] = None) -> None:
+        """Configure the genai library, skipping the call if the key is unchanged."""
+        api_key = api_key or os.getenv("GEMINI_API_KEY")
+        if not api_key:
+            raise ValueError("GEMINI_API_KEY environment variable is required")
+        with self._lock:
+            if self._configured_key != api_key:
+                genai.configure(api_key=api_key)
+                self._configured_key = api_key
+
+    def get_model(
+        self,
+        model_name: str,
+        generation_config: Optional[Any] = None,
+        safety_settings: Optional[Any] = None
+    ) -> Any:
+        """Return the shared GenerativeModel for this configuration, building it on first use."""
+        key = request_key(model_name, generation_config, safety_settings)
+        with self._lock:
+            model = self._models.get(key)
+            if model is not None:
+                self.hits[model_name] += 1
+                return model
+        self.configure()
+        with self._lock:
+            # Another thread may have built it while this one was configuring
+            model = self._models.get(key)
+            if model is None:
+                model = genai.GenerativeModel(
+                    model_name=model_name,
+                    generation_config=generation_config,
+                    safety_settings=safety_settings
+                )
+                self._models[key] = model
+                self.constructions[model_name] += 1
+                logger.debug(f"Constructed Gemini client for {model_name}")
+            else:
+                self.hits[model_name] += 1
+            return model
+
+    def get_rate_limited(
+        self,
+        model_name: str,
+        generation_config: Optional[Any] = None,
+        safety_settings: Optional[Any] = None,
+        limiter: str = "gemini"
+    ) -> RateLimitedModel:
+        """Return the shared model wrapped in the shared rate limiter for `limiter`."""
+        model = self.get_model(model_name, generation_config, safety_settings)
+        key = (id(model), limiter)
+        with self._lock:
+            wrapped = self._wrapped.get(key)
+            if wrapped is None:
+                wrapped = rate_limited(model, limiter)
+                self._wrapped[key] = wrapped
+            return wrapped
+
+    def stats(self) -> Dict[str, Any]:
+        """Return construction and reuse counts per model name."""
+        with self._lock:
+            return {
+                "clients": len(self._models),
+                "constructions": dict(self.constructions),
+                "hits": dict(self.hits)
+            }
+
+
+_client_registry = ClientRegistry()
+
+
+def get_client_registry() -> ClientRegistry:
+    """Get the process-wide client registry."""
+    return _client_registry
+
+
+def get_gemini_model(
+    model_name: Optional[str] = None,
+    generation_config: Optional[Any] = None,
+    limiter: str = "gemini"
+) -> RateLimitedModel:
+    """Shared, rate-limited Gemini model; defaults to GEMINI_MODEL."""
+    return _client_registry.get_rate_limited(
+        model_name or os.getenv("GEMINI_MODEL", "models/gemini-2.0-flash"),
+        generation_config,
+        limiter=limiter
+    )
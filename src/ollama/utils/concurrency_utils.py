@@ -0,0 +1,107 @@
+"""
+Concurrency utilities for bounding in-flight model requests.
+"""
+import asyncio
+import logging
+import os
+import threading
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class ConcurrencyLimiter:
+    """
+    Process-wide cap on in-flight requests.
+
+    Backed by a threading semaphore so the same budget is shared by worker
+    threads and by any number of event loops. Sync callers block on the
+    semaphore; async callers poll it without tying up a thread.
+    """
+
+    def __init__(self, max_concurrency: int, poll_interval: float = 0.005, max_poll_interval: float = 0.05):
+        """
+        Initialize the limiter.
+
+        Args:
+            max_concurrency: Maximum number of concurrent holders
+            poll_interval: Initial async poll interval in seconds
+            max_poll_interval: Upper bound for the async poll interval in seconds
+        """
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be at least 1")
+        self.max_concurrency = max_concurrency
+        self.poll_interval = poll_interval
+        self.max_poll_interval = max_poll_interval
+        self._semaphore = threading.BoundedSemaphore(max_concurrency)
+        self._lock = threading.Lock()
+        self._in_flight = 0
+
+    @property
+    def in_flight(self) -> int:
+        """Number of slots currently held."""
+        return self._in_flight
+
+    def _mark_acquired(self) -> None:
+        with self._lock:
+            self._in_flight += 1
+
+    def acquire(self, timeout: Optional[float] = None) -> bool:
+        """Block until a slot is free. Returns False if the timeout expires."""
+        acquired = self._semaphore.acquire(timeout=timeout) if timeout is not None else self._semaphore.acquire()
+        if acquired:
+            self._mark_acquired()
+        return acquired
+
+    async def acquire_async(self) -> None:
+        """Wait for a slot without blocking the event loop."""
+        delay = self.poll_interval
+        while not self._semaphore.acquire(blocking=False):
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, self.max_poll_interval)
+        self._mark_acquired()
+
+    def release(self) -> None:
+        """Release a previously acquired slot."""
+        with self._lock:
+            self._in_flight -= 1
+        self._semaphore.release()
+
+    def __enter__(self) -> "ConcurrencyLimiter":
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.release()
+
+    async def __aenter__(self) -> "ConcurrencyLimiter":
+        await self.acquire_async()
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        self.release()
+
+
+_limiters: Dict[str, ConcurrencyLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def get_limiter(name: str, default_limit: int = 8) -> ConcurrencyLimiter:
+    """
+    Get the shared limiter for a backend, creating it on first use.
+
+    The limit is read from the ``<NAME>_MAX_CONCURRENCY`` environment variable
+    (e.g. ``GEMINI_MAX_CONCURRENCY``) when the limiter is first created.
+
+    Args:
+        name: Backend name, e.g. "gemini" or "lmstudio"
+        default_limit: Limit used when the environment variable is not set
+    """
+    with _limiters_lock:
+        limiter = _limiters.get(name)
+        if limiter is None:
+            limit = int(os.getenv(f"{name.upper()}_MAX_CONCURRENCY", default_limit))
+            limiter = ConcurrencyLimiter(limit)
+            _limiters[name] = limiter
+            logger.debug(f"Created {name} concurrency limiter with limit {limit}")
+        return limiter
@@ -0,0 +1,137 @@
+"""
+Pre-flight context-window budgeting for model requests.
+"""
+import logging
+import os
+from typing import Any, Dict, List, Optional
+
+from .rate_limiter import estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+# Approximate per-message framing cost of chat templates
+MESSAGE_OVERHEAD_TOKENS = 4
+TRUNCATION_MARKER = "\n\n[... earlier context truncated to fit the context window ...]\n\n"
+
+
+class ContextBudget:
+    """
+    Keeps prompts within ``context_size - max_tokens`` before they are sent.
+
+    Token counts are estimates (~4 characters per token), so a small reserve
+    is held back. When a request is over budget the oldest context goes
+    first: for chat requests the oldest non-system messages, and for plain
+    prompts the text just after the opening instructions, which is where
+    CrewAI places the earliest task context.
+    """
+
+    def __init__(self, context_size: int, max_tokens: int, reserve_tokens: int = 64, head_fraction: float = 0.25):
+        """
+        Initialize the budget.
+
+        Args:
+            context_size: Model context window in tokens
+            max_tokens: Tokens reserved for the completion
+            reserve_tokens: Safety margin for estimation error
+            head_fraction: Share of the prompt budget kept from the start of a truncated prompt
+        """
+        self.context_size = context_size
+        self.max_tokens = max_tokens
+        self.reserve_tokens = reserve_tokens
+        self.head_fraction = head_fraction
+
+    @property
+    def prompt_budget(self) -> int:
+        """Tokens available for the prompt."""
+        return max(0, self.context_size - self.max_tokens - self.reserve_tokens)
+
+    def count_messages(self, messages: List[Dict[str, Any]]) -> int:
+        return sum(estimate_tokens(m.get("content") or "") + MESSAGE_OVERHEAD_TOKENS for m in messages)
+
+    def fit_prompt(self, prompt: str, budget: Optional[int] = None) -> str:
+        """
+        Return the prompt, trimmed from just after its head if it exceeds the budget.
+
+        Raises:
+            ValueError: If the budget is too small to keep any of the prompt
+        """
+        budget = self.prompt_budget if budget is None else budget
+        estimated = estimate_tokens(prompt)
+        if estimated <= budget:
+            return prompt
+
+        # Convert the token budget back to characters using the estimator's ratio
+        max_chars = (budget - 1) * 4 - len(TRUNCATION_MARKER)
+        if max_chars <= 0:
+            raise ValueError(
+                f"Prompt of ~{estimated} tokens cannot be fitted into a budget of {budget} tokens "
+                f"(context_size={self.context_size}, max_tokens={self.max_tokens}); "
+                "lower max_tokens or raise the context size"
+            )
+        head_chars = int(max_chars * self.head_fraction)
+        tail_chars = max_chars - head_chars
+        trimmed = prompt[:head_chars] + TRUNCATION_MARKER + (prompt[-tail_chars:] if tail_chars else "")
+        logger.warning(
+            f"Prompt of ~{estimated} tokens exceeds budget of {budget}; "
+            f"dropped ~{estimated - estimate_tokens(trimmed)} tokens of oldest context"
+        )
+        return trimmed
+
+    def fit_messages(self, messages: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Return messages that fit the budget.
+
+        System messages and the latest message are always kept. Older
+        messages are dropped oldest first, then the latest message is trimmed
+        if it still does not fit.
+
+        Raises:
+            ValueError: If the kept messages leave no room for the latest one
+        """
+        budget = self.prompt_budget
+        if not messages or self.count_messages(messages) <= budget:
+            return messages
+
+        fitted = list(messages)
+        dropped = 0
+        index = 0
+        while self.count_messages(fitted) > budget and index < len(fitted) - 1:
+            if fitted[index].get("role") == "system":
+                index += 1
+                continue
+            del fitted[index]
+            dropped += 1
+
+        if dropped:
+            logger.warning(f"Dropped {dropped} oldest message(s) to fit context budget of {budget} tokens")
+
+        overflow = self.count_messages(fitted) - budget
+        if overflow > 0:
+            last = dict(fitted[-1])
+            content = last.get("content") or ""
+            if isinstance(content, str):
+                last["content"] = self.fit_prompt(content, max(0, estimate_tokens(content) - overflow))
+                fitted[-1] = last
+        return fitted
+
+
+def get_context_budget(model_type: str, max_tokens: Optional[int] = None) -> ContextBudget:
+    """
+    Build the context budget for a backend from its environment settings.
+
+    Args:
+        model_type: "lmstudio" (LMSTUDIO_CONTEXT_SIZE / LMSTUDIO_MAX_TOKENS) or
+            "gemini" (GEMINI_CONTEXT_SIZE / GEMINI_MAX_TOKENS)
+        max_tokens: Completion tokens requested, if different from the default
+    """
+    if model_type == "lmstudio":
+        return ContextBudget(
+            context_size=int(os.getenv("LMSTUDIO_CONTEXT_SIZE", 4096)),
+            max_tokens=int(max_tokens if max_tokens is not None else os.getenv("LMSTUDIO_MAX_TOKENS", 2048))
+        )
+    if model_type == "gemini":
+        return ContextBudget(
+            context_size=int(os.getenv("GEMINI_CONTEXT_SIZE", 1048576)),
+            max_tokens=int(max_tokens if max_tokens is not None else os.getenv("GEMINI_MAX_TOKENS", 8192))
+        )
+    raise ValueError(f"Unknown model type: {model_type}")
@@ -0,0 +1,104 @@
+"""
+Shared HTTP transport with connection pooling for local inference servers.
+"""
+import logging
+import os
+import threading
+from typing import Any, Dict, Optional, Tuple, Union
+
+import requests
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+Timeout = Union[float, Tuple[float, float]]
+
+
+class HTTPTransport:
+    """
+    Keep-alive HTTP transport for one base URL.
+
+    Wraps a single requests.Session with a sized connection pool so repeated
+    completions reuse TCP connections instead of opening one per request.
+    Every request gets a (connect, read) timeout unless the caller passes one.
+    """
+
+    def __init__(
+        self,
+        base_url: str,
+        pool_size: int = 10,
+        connect_timeout: float = 3.05,
+        read_timeout: float = 120.0
+    ):
+        """
+        Initialize the transport.
+
+        Args:
+            base_url: Server root, e.g. "http://localhost:1234"
+            pool_size: Maximum number of pooled keep-alive connections
+            connect_timeout: Default connect timeout in seconds
+            read_timeout: Default read timeout in seconds
+        """
+        self.base_url = base_url.rstrip("/")
+        self.pool_size = pool_size
+        self.default_timeout: Tuple[float, float] = (connect_timeout, read_timeout)
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, pool_block=False)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.headers.update({"Content-Type": "application/json", "Connection": "keep-alive"})
+
+    def _url(self, path: str) -> str:
+        if path.startswith(("http://", "https://")):
+            return path
+        return f"{self.base_url}/{path.lstrip('/')}"
+
+    def request(self, method: str, path: str, timeout: Optional[Timeout] = None, **kwargs: Any) -> requests.Response:
+        """Send a request through the pooled session."""
+        return self.session.request(
+            method,
+            self._url(path),
+            timeout=timeout if timeout is not None else self.default_timeout,
+            **kwargs
+        )
+
+    def get(self, path: str, **kwargs: Any) -> requests.Response:
+        return self.request("GET", path, **kwargs)
+
+    def post(self, path: str, **kwargs: Any) -> requests.Response:
+        return self.request("POST", path, **kwargs)
+
+    def close(self) -> None:
+        """Close all pooled connections."""
+        self.session.close()
+
+
+_transports: Dict[str, HTTPTransport] = {}
+_transports_lock = threading.Lock()
+
+
+def get_lmstudio_transport(base_url: Optional[str] = None) -> HTTPTransport:
+    """
+    Get the process-wide transport for an LM Studio server.
+
+    Pool size and timeouts come from LMSTUDIO_POOL_SIZE,
+    LMSTUDIO_CONNECT_TIMEOUT and LMSTUDIO_READ_TIMEOUT when the transport
+    for a base URL is first created.
+
+    Args:
+        base_url: Server root (defaults to LMSTUDIO_API_URL)
+    """
+    base_url = (base_url or os.getenv("LMSTUDIO_API_URL", "http://localhost:1234")).rstrip("/")
+    with _transports_lock:
+        transport = _transports.get(base_url)
+        if transport is None:
+            transport = HTTPTransport(
+                base_url,
+                pool_size=int(os.getenv("LMSTUDIO_POOL_SIZE", 10)),
+                connect_timeout=float(os.getenv("LMSTUDIO_CONNECT_TIMEOUT", 3.05)),
+                read_timeout=float(os.getenv("LMSTUDIO_READ_TIMEOUT", 120))
+            )
+            _transports[base_url] = transport
+            logger.debug(f"Created pooled LM Studio transport for {base_url}")
+        return transport
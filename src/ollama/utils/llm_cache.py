@@ -0,0 +1,211 @@
+"""
+Persistent LLM response cache backed by a local SQLite file.
+"""
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional, Sequence
+
+from langchain_core.caches import BaseCache
+from langchain_core.load.dump import dumps
+from langchain_core.load.load import loads
+from langchain_core.outputs import Generation
+
+from .single_flight import get_single_flight
+
+logger = logging.getLogger(__name__)
+
+
+class ResponseCache(BaseCache):
+    """
+    On-disk response cache with TTL expiry and an LRU size cap.
+
+    Works as a LangChain cache (lookup/update keyed on prompt and llm_string,
+    which LangChain builds from _identifying_params and the stop sequences)
+    and as a plain key/value store for clients that talk to the model
+    servers directly.
+    """
+
+    def __init__(
+        self,
+        path: str = "./cache/llm_cache.sqlite",
+        ttl_seconds: Optional[float] = None,
+        max_entries: int = 10000
+    ):
+        """
+        Initialize the cache.
+
+        Args:
+            path: SQLite file location
+            ttl_seconds: Entry lifetime in seconds (None disables expiry)
+            max_entries: Maximum number of entries before least recently used ones are evicted
+        """
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, "
+            "created_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_responses_accessed ON responses (accessed_at)")
+        self._conn.commit()
+
+    @staticmethod
+    def make_key(*parts: str) -> str:
+        """Hash the given parts into a cache key."""
+        return hashlib.sha256("\x1f".join(parts).encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the stored value for a key, or None on a miss or expired entry."""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, created_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            value, created_at = row
+            if self.ttl_seconds is not None and now - created_at > self.ttl_seconds:
+                self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self._conn.commit()
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            self.hits += 1
+            return value
+
+    def put(self, key: str, value: str) -> None:
+        """Store a value, evicting least recently used entries past max_entries."""
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, value, created_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, value, now, now)
+            )
+            (count,) = self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()
+            overflow = count - self.max_entries
+            if overflow > 0:
+                self._conn.execute(
+                    "DELETE FROM responses WHERE key IN "
+                    "(SELECT key FROM responses ORDER BY accessed_at ASC LIMIT ?)",
+                    (overflow,)
+                )
+                self.evictions += overflow
+            self._conn.commit()
+
+    # --- LangChain BaseCache interface ---
+
+    def lookup(self, prompt: str, llm_string: str) -> Optional[Sequence[Generation]]:
+        value = self.get(self.make_key(llm_string, prompt))
+        if value is None:
+            return None
+        try:
+            return [loads(item) for item in json.loads(value)]
+        except Exception as e:
+            logger.warning(f"Discarding unreadable cache entry: {str(e)}")
+            return None
+
+    def update(self, prompt: str, llm_string: str, return_val: Sequence[Generation]) -> None:
+        self.put(self.make_key(llm_string, prompt), json.dumps([dumps(gen) for gen in return_val]))
+
+    def clear(self, **kwargs: Any) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM responses")
+            self._conn.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss counters and current size."""
+        with self._lock:
+            (entries,) = self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": entries
+        }
+
+
+def cached_post(
+    transport: Any,
+    path: str,
+    data: Dict[str, Any],
+    cache: Optional[ResponseCache] = None,
+    timeout: Optional[float] = None
+) -> Dict[str, Any]:
+    """
+    POST a JSON payload through an HTTP transport, serving identical payloads from the cache.
+
+    Concurrent identical payloads share one in-flight request unless
+    LLM_COALESCE_REQUESTS is "false".
+
+    Args:
+        transport: HTTPTransport to send the request with
+        path: Request path, e.g. "/v1/chat/completions"
+        data: JSON request body (the full body is part of the cache key)
+        cache: Optional response cache; None sends every request
+        timeout: Optional per-request timeout
+    """
+    payload = json.dumps(data, sort_keys=True)
+    cache_key = None
+    if cache is not None:
+        cache_key = cache.make_key(transport.base_url, path, payload)
+        cached = cache.get(cache_key)
+        if cached is not None:
+            return json.loads(cached)
+
+    def send() -> Dict[str, Any]:
+        response = transport.post(path, json=data, timeout=timeout)
+        response.raise_for_status()
+        return response.json()
+
+    if os.getenv("LLM_COALESCE_REQUESTS", "true").lower() == "true":
+        result = get_single_flight().do(("post", transport.base_url, path, payload), send)
+    else:
+        result = send()
+    if cache_key is not None:
+        cache.put(cache_key, json.dumps(result))
+    return result
+
+
+_response_cache: Optional[ResponseCache] = None
+_response_cache_lock = threading.Lock()
+
+
+def get_response_cache() -> Optional[ResponseCache]:
+    """
+    Get the process-wide response cache, or None when caching is disabled.
+
+    Configured from CACHE_ENABLED, CACHE_DIR, CACHE_RETENTION_DAYS (TTL) and
+    LLM_CACHE_MAX_ENTRIES.
+    """
+    global _response_cache
+    if os.getenv("CACHE_ENABLED", "false").lower() != "true":
+        return None
+    with _response_cache_lock:
+        if _response_cache is None:
+            retention_days = os.getenv("CACHE_RETENTION_DAYS")
+            _response_cache = ResponseCache(
+                path=str(Path(os.getenv("CACHE_DIR", "./cache")) / "llm_cache.sqlite"),
+                ttl_seconds=float(retention_days) * 86400 if retention_days else None,
+                max_entries=int(os.getenv("LLM_CACHE_MAX_ENTRIES", 10000))
+            )
+            logger.info(f"LLM response cache enabled at {_response_cache.path}")
+        return _response_cache
@@ -0,0 +1,443 @@
+"""
+Async-first LLM client protocol with sync shims for Gemini and LM Studio.
+"""
+import asyncio
+import contextvars
+import json
+import logging
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+import aiohttp
+from google.api_core import exceptions as google_exceptions
+
+from .cassette import get_cassette
+from .chat_sessions import to_gemini_history
+from .client_registry import get_client_registry
+from .concurrency_utils import get_limiter
+from .context_budget import get_context_budget
+from .llm_cache import get_response_cache
+from .rate_limiter import estimate_tokens, get_rate_limiter
+from .retry_utils import aretry_with_backoff
+from .single_flight import get_single_flight
+from .usage_ledger import get_usage_ledger
+
+logger = logging.getLogger(__name__)
+
+RETRYABLE_STATUS = {408, 429, 500, 502, 503, 504}
+RETRYABLE_GOOGLE_ERRORS = (
+    google_exceptions.ResourceExhausted,
+    google_exceptions.ServiceUnavailable,
+    google_exceptions.DeadlineExceeded,
+    google_exceptions.InternalServerError
+)
+
+
+@dataclass
+class ClientConfig:
+    """Timeouts, pooling and retry settings shared by every client of a backend."""
+    connect_timeout: float = 3.05
+    read_timeout: float = 120.0
+    pool_size: int = 10
+    max_retries: int = 2
+    retry_backoff: float = 1.0
+
+    @classmethod
+    def from_env(cls, prefix: str) -> "ClientConfig":
+        """Read <PREFIX>_CONNECT_TIMEOUT, _READ_TIMEOUT, _POOL_SIZE, _MAX_RETRIES and _RETRY_BACKOFF."""
+        return cls(
+            connect_timeout=float(os.getenv(f"{prefix}_CONNECT_TIMEOUT", cls.connect_timeout)),
+            read_timeout=float(os.getenv(f"{prefix}_READ_TIMEOUT", cls.read_timeout)),
+            pool_size=int(os.getenv(f"{prefix}_POOL_SIZE", cls.pool_size)),
+            max_retries=int(os.getenv(f"{prefix}_MAX_RETRIES", cls.max_retries)),
+            retry_backoff=float(os.getenv(f"{prefix}_RETRY_BACKOFF", cls.retry_backoff))
+        )
+
+
+class ClientMetrics:
+    """Request, error, retry, cache and token counters for one client."""
+
+    def __init__(self):
+        self.requests = 0
+        self.errors = 0
+        self.retries = 0
+        self.cache_hits = 0
+        self.total_latency = 0.0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self._lock = threading.Lock()
+
+    def record(self, latency: float, success: bool, usage: Optional[Dict[str, int]] = None) -> None:
+        with self._lock:
+            self.requests += 1
+            self.total_latency += latency
+            if not success:
+                self.errors += 1
+            if usage:
+                self.prompt_tokens += usage.get("prompt_tokens") or 0
+                self.completion_tokens += usage.get("completion_tokens") or 0
+
+    def record_retry(self) -> None:
+        with self._lock:
+            self.retries += 1
+
+    def record_cache_hit(self) -> None:
+        with self._lock:
+            self.cache_hits += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "errors": self.errors,
+                "retries": self.retries,
+                "cache_hits": self.cache_hits,
+                "mean_latency": self.total_latency / self.requests if self.requests else None,
+                "prompt_tokens": self.prompt_tokens,
+                "completion_tokens": self.completion_tokens
+            }
+
+
+class _LoopThread:
+    """Background event loop that runs coroutines for the sync shims."""
+
+    def __init__(self):
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._lock = threading.Lock()
+
+    def loop(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                threading.Thread(target=self._loop.run_forever, name="llm-client-loop", daemon=True).start()
+            return self._loop
+
+    def run(self, coro: Awaitable[Any]) -> Any:
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            context = contextvars.copy_context()
+            return asyncio.run_coroutine_threadsafe(_in_context(context, coro), self.loop()).result()
+        coro.close()
+        raise RuntimeError("Sync client method called from a running event loop; await the async method instead")
+
+    async def arun(self, coro: Awaitable[Any]) -> Any:
+        """Await coro on the background loop from any event loop."""
+        loop = self.loop()
+        if asyncio.get_running_loop() is loop:
+            return await coro
+        future = asyncio.run_coroutine_threadsafe(_in_context(contextvars.copy_context(), coro), loop)
+        # Cancelling the caller cancels the task on the background loop too
+        return await asyncio.wrap_future(future)
+
+
+async def _in_context(context: contextvars.Context, coro: Awaitable[Any]) -> Any:
+    """Await coro with the caller's context variables (e.g. the usage run) set in this task."""
+    for var, value in context.items():
+        var.set(value)
+    return await coro
+
+
+_loop_thread = _LoopThread()
+
+
+def run_sync(coro: Awaitable[Any]) -> Any:
+    """Run a coroutine on the shared client loop and wait for its result."""
+    return _loop_thread.run(coro)
+
+
+class LLMClient(ABC):
+    """
+    Async-first client protocol.
+
+    Subclasses implement _agenerate and _achat. Callers use agenerate/achat
+    from an event loop or generate/chat from threads; the sync shims run on
+    one shared background loop so connection pools are reused across calls.
+    Results are dicts with "text", "model", "model_name", "usage",
+    "cached", "latency" and the backend's "raw" response. Usage of requests
+    that reached the backend is added to the usage ledger. Requests go
+    through the cassette, so they can be recorded and replayed offline.
+    """
+
+    model_type = ""
+
+    def __init__(self, model: str, config: ClientConfig):
+        self.model = model
+        self.config = config
+        self.metrics = ClientMetrics()
+
+    @abstractmethod
+    async def _agenerate(self, prompt: str, **kwargs: Any) -> Dict[str, Any]:
+        pass
+
+    @abstractmethod
+    async def _achat(self, messages: List[Dict[str, str]], **kwargs: Any) -> Dict[str, Any]:
+        pass
+
+    def _is_retryable(self, error: Exception) -> bool:
+        return isinstance(error, asyncio.TimeoutError)
+
+    async def _retry(self, call: Callable[[], Awaitable[Any]]) -> Any:
+        return await aretry_with_backoff(
+            call,
+            max_attempts=self.config.max_retries + 1,
+            initial_wait=self.config.retry_backoff,
+            retry_on=self._is_retryable,
+            on_retry=lambda e: self.metrics.record_retry(),
+            logger=logger
+        )
+
+    async def _measure(self, coro: Awaitable[Dict[str, Any]]) -> Dict[str, Any]:
+        start = time.monotonic()
+        try:
+            result = await coro
+        except Exception:
+            self.metrics.record(time.monotonic() - start, False)
+            raise
+        result["latency"] = time.monotonic() - start
+        self.metrics.record(result["latency"], True, result.get("usage"))
+        usage = result.get("usage")
+        # Cache hits cost nothing, so only requests that reached the backend go in the ledger
+        if usage and not result.get("cached"):
+            get_usage_ledger().record(
+                self.model_type,
+                self.model,
+                usage.get("prompt_tokens"),
+                usage.get("completion_tokens"),
+                usage.get("total_tokens"),
+                result["latency"]
+            )
+        return result
+
+    def _result(self, text: str, usage: Optional[Dict[str, int]], raw: Any, cached: bool = False) -> Dict[str, Any]:
+        return {
+            "text": text,
+            "model": self.model_type,
+            "model_name": self.model,
+            "usage": usage,
+            "cached": cached,
+            "raw": raw
+        }
+
+    async def _replayable(self, call: str, value: Any, kwargs: Dict[str, Any], fn: Callable[[], Awaitable[Dict[str, Any]]]) -> Dict[str, Any]:
+        request = {
+            "model": self.model,
+            "call": call,
+            "input": value,
+            # Timeouts don't change the response, so they stay out of the cassette key
+            "kwargs": {k: v for k, v in kwargs.items() if k != "timeout"}
+        }
+        return await get_cassette().acall(self.model_type, request, fn)
+
+    async def agenerate(self, prompt: str, **kwargs: Any) -> Dict[str, Any]:
+        """Complete a prompt."""
+        return await self._measure(self._replayable("generate", prompt, kwargs, lambda: self._agenerate(prompt, **kwargs)))
+
+    async def achat(self, messages: List[Dict[str, str]], **kwargs: Any) -> Dict[str, Any]:
+        """Reply to a list of OpenAI-style chat messages."""
+        return await self._measure(self._replayable("chat", messages, kwargs, lambda: self._achat(messages, **kwargs)))
+
+    def generate(self, prompt: str, **kwargs: Any) -> Dict[str, Any]:
+        """Sync shim for agenerate."""
+        return run_sync(self.agenerate(prompt, **kwargs))
+
+    def chat(self, messages: List[Dict[str, str]], **kwargs: Any) -> Dict[str, Any]:
+        """Sync shim for achat."""
+        return run_sync(self.achat(messages, **kwargs))
+
+    async def aclose(self) -> None:
+        """Release pooled connections."""
+
+
+class LMStudioLLMClient(LLMClient):
+    """
+    OpenAI-compatible LM Studio client on one pooled aiohttp session.
+
+    aiohttp sessions are bound to the loop that created them, so the session
+    lives on the shared client loop and requests from other loops are
+    handed to it. A short-lived loop (e.g. asyncio.run) then never owns a
+    session that outlives it.
+    """
+
+    model_type = "lmstudio"
+
+    def __init__(self, model: Optional[str] = None, base_url: Optional[str] = None, config: Optional[ClientConfig] = None):
+        super().__init__(model or os.getenv("LMSTUDIO_MODEL", "gemma-3-4b-it"), config or ClientConfig.from_env("LMSTUDIO"))
+        self.base_url = (base_url or os.getenv("LMSTUDIO_API_URL", "http://localhost:1234")).rstrip("/")
+        self.cache = get_response_cache()
+        self._client_session: Optional[aiohttp.ClientSession] = None
+
+    def _session(self) -> aiohttp.ClientSession:
+        # Only called on the shared client loop, so no lock is needed
+        if self._client_session is None or self._client_session.closed:
+            self._client_session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.config.pool_size),
+                timeout=aiohttp.ClientTimeout(
+                    total=None,
+                    connect=self.config.connect_timeout,
+                    sock_read=self.config.read_timeout
+                ),
+                headers={"Content-Type": "application/json"}
+            )
+        return self._client_session
+
+    async def _post_json(self, path: str, data: Dict[str, Any], timeout: Optional[float]) -> Dict[str, Any]:
+        request_timeout = aiohttp.ClientTimeout(total=timeout) if timeout is not None else None
+        async with self._session().post(f"{self.base_url}{path}", json=data, timeout=request_timeout) as response:
+            response.raise_for_status()
+            return await response.json()
+
+    def _is_retryable(self, error: Exception) -> bool:
+        if isinstance(error, aiohttp.ClientResponseError):
+            return error.status in RETRYABLE_STATUS
+        return isinstance(error, (aiohttp.ClientConnectionError, asyncio.TimeoutError))
+
+    def build_payload(self, field: str, value: Any, stream: bool = False, **kwargs: Any) -> Dict[str, Any]:
+        """Build a completion payload, trimming the prompt or messages to the context budget."""
+        max_tokens = kwargs.get("max_tokens", int(os.getenv("LMSTUDIO_MAX_TOKENS", 2048)))
+        budget = get_context_budget("lmstudio", max_tokens)
+        value = budget.fit_messages(value) if field == "messages" else budget.fit_prompt(value)
+        return {
+            "model": self.model,
+            field: value,
+            "max_tokens": max_tokens,
+            "temperature": kwargs.get("temperature", float(os.getenv("LMSTUDIO_TEMPERATURE", 0.7))),
+            "top_p": kwargs.get("top_p", float(os.getenv("LMSTUDIO_TOP_P", 0.95))),
+            "stream": stream
+        }
+
+    async def post(self, path: str, data: Dict[str, Any], timeout: Optional[float] = None) -> Tuple[Dict[str, Any], bool]:
+        """
+        POST a JSON payload with retries, serving identical payloads from the response cache.
+
+        Returns the response JSON and whether it came from the cache.
+
+        Uses the same cache keys as llm_cache.cached_post, and coalesces
+        identical in-flight payloads unless LLM_COALESCE_REQUESTS is "false".
+        """
+        payload = json.dumps(data, sort_keys=True)
+        cache_key = None
+        if self.cache is not None:
+            cache_key = self.cache.make_key(self.base_url, path, payload)
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                self.metrics.record_cache_hit()
+                return json.loads(cached), True
+
+        async def send() -> Dict[str, Any]:
+            return await _loop_thread.arun(self._post_json(path, data, timeout))
+
+        if os.getenv("LLM_COALESCE_REQUESTS", "true").lower() == "true":
+            result = await get_single_flight().do_async(("post", self.base_url, path, payload), lambda: self._retry(send))
+        else:
+            result = await self._retry(send)
+        if cache_key is not None:
+            self.cache.put(cache_key, json.dumps(result))
+        return result, False
+
+    async def _agenerate(self, prompt: str, **kwargs: Any) -> Dict[str, Any]:
+        raw, cached = await self.post("/v1/completions", self.build_payload("prompt", prompt, **kwargs), kwargs.get("timeout"))
+        return self._result(raw["choices"][0]["text"], raw.get("usage"), raw, cached)
+
+    async def _achat(self, messages: List[Dict[str, str]], **kwargs: Any) -> Dict[str, Any]:
+        raw, cached = await self.post("/v1/chat/completions", self.build_payload("messages", messages, **kwargs), kwargs.get("timeout"))
+        return self._result(raw["choices"][0]["message"]["content"], raw.get("usage"), raw, cached)
+
+    async def aclose(self) -> None:
+        session, self._client_session = self._client_session, None
+        if session is not None:
+            await _loop_thread.arun(session.close())
+
+
+class GeminiLLMClient(LLMClient):
+    """Gemini client on the shared model from the client registry, drawing on the "gemini" rate budget."""
+
+    model_type = "gemini"
+
+    def __init__(self, model: Optional[str] = None, config: Optional[ClientConfig] = None):
+        super().__init__(model or os.getenv("GEMINI_MODEL", "models/gemini-2.0-flash"), config or ClientConfig.from_env("GEMINI"))
+        self.client = None
+        # Replayed requests never reach Gemini, so replay works without an API key
+        if not get_cassette().replaying:
+            # Same generation config as ModelManager, so both share one registry client
+            self.client = get_client_registry().get_model(self.model, generation_config={
+                "temperature": float(os.getenv("GEMINI_TEMPERATURE", 0.7)),
+                "top_p": float(os.getenv("GEMINI_TOP_P", 0.95)),
+                "max_output_tokens": int(os.getenv("GEMINI_MAX_TOKENS", 8192))
+            })
+
+    def _is_retryable(self, error: Exception) -> bool:
+        return isinstance(error, RETRYABLE_GOOGLE_ERRORS + (asyncio.TimeoutError,))
+
+    def _generation_config(self, kwargs: Dict[str, Any]) -> Tuple[Dict[str, Any], int]:
+        config = dict(kwargs.get("generation_config") or {})
+        if "temperature" in kwargs:
+            config["temperature"] = kwargs["temperature"]
+        if "top_p" in kwargs:
+            config["top_p"] = kwargs["top_p"]
+        max_tokens = kwargs.get("max_tokens", config.get("max_output_tokens"))
+        if max_tokens is not None:
+            config["max_output_tokens"] = max_tokens
+        return config, max_tokens
+
+    async def _send(self, contents: Any, kwargs: Dict[str, Any]) -> Dict[str, Any]:
+        generation_config, _ = self._generation_config(kwargs)
+        timeout = kwargs.get("timeout", self.config.read_timeout)
+
+        rate_limiter = get_rate_limiter("gemini")
+        reserved_tokens = estimate_tokens(contents)
+
+        async def send() -> Any:
+            # Reserve rate budget before taking an in-flight slot so waiting callers don't hold one,
+            # and time out on the network call only
+            await rate_limiter.acquire_async(reserved_tokens)
+            # Share the in-flight budget with GeminiChatLLM
+            async with get_limiter("gemini"):
+                response = await asyncio.wait_for(
+                    self.client.generate_content_async(contents, generation_config=generation_config or None),
+                    timeout=timeout
+                )
+            rate_limiter.record_usage(reserved_tokens, response)
+            return response
+
+        response = await self._retry(send)
+        metadata = getattr(response, "usage_metadata", None)
+        usage = None
+        if metadata is not None:
+            usage = {
+                "prompt_tokens": getattr(metadata, "prompt_token_count", 0),
+                "completion_tokens": getattr(metadata, "candidates_token_count", 0),
+                "total_tokens": getattr(metadata, "total_token_count", 0)
+            }
+        return self._result(response.text, usage, response)
+
+    async def _agenerate(self, prompt: str, **kwargs: Any) -> Dict[str, Any]:
+        _, max_tokens = self._generation_config(kwargs)
+        return await self._send(get_context_budget("gemini", max_tokens).fit_prompt(prompt), kwargs)
+
+    async def _achat(self, messages: List[Dict[str, str]], **kwargs: Any) -> Dict[str, Any]:
+        _, max_tokens = self._generation_config(kwargs)
+        messages = get_context_budget("gemini", max_tokens).fit_messages(messages)
+        return await self._send(to_gemini_history(messages), kwargs)
+
+
+CLIENT_TYPES = {"gemini": GeminiLLMClient, "lmstudio": LMStudioLLMClient}
+
+_clients: Dict[Tuple[str, Optional[str]], LLMClient] = {}
+_clients_lock = threading.Lock()
+
+
+def get_llm_client(model_type: str, model: Optional[str] = None) -> LLMClient:
+    """Get the shared client for a backend and model (defaults to the backend's env model)."""
+    if model_type not in CLIENT_TYPES:
+        raise ValueError(f"Unknown model type: {model_type}")
+    with _clients_lock:
+        client = _clients.get((model_type, model))
+        if client is None:
+            client = CLIENT_TYPES[model_type](model)
+            _clients[(model_type, model)] = client
+        return client
@@ -1,54 +1,150 @@
-import requests
 import json
-from typing import Dict, Any, Optional
+import time
+from typing import Any, Callable, Dict, Iterator, List, Optional
 import os
+import requests
+from .http_transport import get_lmstudio_transport
+from .llm_client import get_llm_client
+from .usage_ledger import get_usage_ledger
+
+
+class CompletionStream:
+    """
+    Iterator over text deltas from an OpenAI-compatible server-sent event stream.
+
+    The request is sent when iteration starts, so time to first token covers
+    connection setup and prompt processing. Latency metrics are available
+    from metrics() while and after the stream is consumed.
+    """
+
+    def __init__(self, open_response: Callable[[], requests.Response], chat: bool = True, model: Optional[str] = None):
+        """
+        Args:
+            open_response: Callable that sends the streaming request
+            chat: True for /v1/chat/completions deltas, False for /v1/completions text
+            model: Model name; when set, reported usage is added to the usage ledger
+        """
+        self._open_response = open_response
+        self.chat = chat
+        self.model = model
+        self.time_to_first_token: Optional[float] = None
+        self.inter_token_latencies: List[float] = []
+        self.total_time: Optional[float] = None
+        self.finish_reason: Optional[str] = None
+        self.usage: Optional[Dict[str, Any]] = None
+        self._parts: List[str] = []
+
+    @property
+    def text(self) -> str:
+        """Text received so far."""
+        return "".join(self._parts)
+
+    def _delta(self, event: Dict[str, Any]) -> Optional[str]:
+        if event.get("usage"):
+            self.usage = event["usage"]
+        choices = event.get("choices") or []
+        if not choices:
+            return None
+        choice = choices[0]
+        if choice.get("finish_reason"):
+            self.finish_reason = choice["finish_reason"]
+        if self.chat:
+            return (choice.get("delta") or {}).get("content")
+        return choice.get("text")
+
+    def __iter__(self) -> Iterator[str]:
+        start_time = time.perf_counter()
+        last_token_time = None
+        response = self._open_response()
+        try:
+            response.raise_for_status()
+            for line in response.iter_lines(decode_unicode=True):
+                if not line or not line.startswith("data:"):
+                    continue
+                payload = line[len("data:"):].strip()
+                if payload == "[DONE]":
+                    break
+                delta = self._delta(json.loads(payload))
+                if not delta:
+                    continue
+                now = time.perf_counter()
+                if last_token_time is None:
+                    self.time_to_first_token = now - start_time
+                else:
+                    self.inter_token_latencies.append(now - last_token_time)
+                last_token_time = now
+                self._parts.append(delta)
+                yield delta
+        finally:
+            self.total_time = time.perf_counter() - start_time
+            response.close()
+            if self.model and self.usage:
+                get_usage_ledger().record(
+                    "lmstudio",
+                    self.model,
+                    self.usage.get("prompt_tokens"),
+                    self.usage.get("completion_tokens"),
+                    self.usage.get("total_tokens"),
+                    self.total_time
+                )
+
+    def metrics(self) -> Dict[str, Any]:
+        """Return time to first token, inter-token latency stats and throughput."""
+        latencies = sorted(self.inter_token_latencies)
+        chunks = len(self._parts)
+        decode_time = sum(latencies)
+        return {
+            "time_to_first_token": self.time_to_first_token,
+            "mean_inter_token_latency": decode_time / len(latencies) if latencies else None,
+            "p95_inter_token_latency": latencies[int(0.95 * (len(latencies) - 1))] if latencies else None,
+            "max_inter_token_latency": latencies[-1] if latencies else None,
+            "chunks": chunks,
+            "chunks_per_second": (chunks - 1) / decode_time if decode_time > 0 else None,
+            "total_time": self.total_time,
+            "finish_reason": self.finish_reason,
+            "usage": self.usage
+        }
+
 
 class LMStudioClient:
     def __init__(self):
         self.api_url = os.getenv("LMSTUDIO_API_URL", "http://localhost:1234")
         self.model = os.getenv("LMSTUDIO_MODEL", "gemma-3-4b-it")
+        # Non-streaming requests go through the shared async client; streaming uses the pooled transport
+        self.client = get_llm_client("lmstudio", self.model)
+        self.transport = get_lmstudio_transport(self.api_url)
+        self.cache = self.client.cache
 
-    def generate_text(self, prompt: str, **kwargs) -> Dict[str, Any]:
-        headers = {"Content-Type": "application/json"}
-        data = {
-            "model": self.model,
-            "prompt": prompt,
-            "max_tokens": kwargs.get("max_tokens", int(os.getenv("LMSTUDIO_MAX_TOKENS", 2048))),
-            "temperature": kwargs.get("temperature", float(os.getenv("LMSTUDIO_TEMPERATURE", 0.7))),
-            "top_p": kwargs.get("top_p", float(os.getenv("LMSTUDIO_TOP_P", 0.95))),
-            "stream": False
-        }
+    def _build_payload(self, field: str, value: Any, stream: bool, **kwargs) -> Dict[str, Any]:
+        return self.client.build_payload(field, value, stream=stream, **kwargs)
 
-        response = requests.post(
-            f"{self.api_url}/v1/completions",
-            headers=headers,
-            json=data
-        )
-        response.raise_for_status()
-        return response.json()
+    def generate_text(self, prompt: str, **kwargs) -> Dict[str, Any]:
+        return self.client.generate(prompt, **kwargs)["raw"]
 
     def chat_completion(self, messages: list, **kwargs) -> Dict[str, Any]:
-        headers = {"Content-Type": "application/json"}
-        data = {
-            "model": self.model,
-            "messages": messages,
-            "max_tokens": kwargs.get("max_tokens", int(os.getenv("LMSTUDIO_MAX_TOKENS", 2048))),
-            "temperature": kwargs.get("temperature", float(os.getenv("LMSTUDIO_TEMPERATURE", 0.7))),
-            "top_p": kwargs.get("top_p", float(os.getenv("LMSTUDIO_TOP_P", 0.95))),
-            "stream": False
-        }
+        return self.client.chat(messages, **kwargs)["raw"]
+
+    def stream_completion(self, prompt: str, **kwargs) -> CompletionStream:
+        """Stream a text completion; iterate the result for text deltas."""
+        data = self._build_payload("prompt", prompt, stream=True, **kwargs)
+        return CompletionStream(
+            lambda: self.transport.post("/v1/completions", json=data, stream=True, timeout=kwargs.get("timeout")),
+            chat=False,
+            model=self.model
+        )
 
-        response = requests.post(
-            f"{self.api_url}/v1/chat/completions",
-            headers=headers,
-            json=data
+    def stream_chat_completion(self, messages: list, **kwargs) -> CompletionStream:
+        """Stream a chat completion; iterate the result for content deltas."""
+        data = self._build_payload("messages", messages, stream=True, **kwargs)
+        return CompletionStream(
+            lambda: self.transport.post("/v1/chat/completions", json=data, stream=True, timeout=kwargs.get("timeout")),
+            chat=True,
+            model=self.model
         )
-        response.raise_for_status()
-        return response.json()
 
     def get_model_info(self) -> Optional[Dict[str, Any]]:
         try:
-            response = requests.get(f"{self.api_url}/v1/models")
+            response = self.transport.get("/v1/models")
             response.raise_for_status()
             return response.json()
         except:
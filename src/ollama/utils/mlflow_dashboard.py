@@ -18,6 +18,8 @@ import sys
 import yaml
 from dotenv import load_dotenv
 
+from .usage_ledger import usage_metrics
+
 # Load environment variables
 load_dotenv()
 
@@ -222,6 +224,14 @@ class MLflowDashboard:
         except Exception as e:
             logger.error(f"Error logging model metrics: {str(e)}")
 
+    def log_usage(self, usage: Dict[str, Any]) -> None:
+        """Log a usage ledger summary as metrics plus the full breakdown as a JSON artifact"""
+        try:
+            self.log_metrics(usage_metrics(usage))
+            mlflow.log_dict(usage, "usage/usage_summary.json")
+        except Exception as e:
+            logger.error(f"Error logging usage: {str(e)}")
+
     def _check_metric_thresholds(self, metrics: Dict[str, float]) -> None:
         """Check metrics against thresholds and trigger alerts"""
         for metric_name, value in metrics.items():
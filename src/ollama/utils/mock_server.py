@@ -0,0 +1,418 @@
+"""
+OpenAI-compatible mock inference server for load-testing the LM Studio path.
+
+Run it with ``python -m src.ollama.utils.mock_server --profile gpu`` and
+point LMSTUDIO_API_URL at it (default http://localhost:1234).
+"""
+import argparse
+import asyncio
+import json
+import logging
+import math
+import os
+import random
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field, fields, replace
+from typing import Any, Dict, List, Optional
+
+from aiohttp import web
+
+from .rate_limiter import estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+DISTRIBUTIONS = ("fixed", "uniform", "normal", "lognormal", "exponential")
+
+FILLER_WORDS = (
+    "the", "model", "considers", "each", "factor", "in", "turn", "and", "notes", "that",
+    "evidence", "suggests", "a", "clear", "trend", "with", "some", "uncertainty", "remaining", "overall"
+)
+
+
+@dataclass
+class LatencyDistribution:
+    """Latency in seconds drawn from a named distribution with a mean and a spread."""
+    kind: str = "fixed"
+    mean: float = 0.0
+    spread: float = 0.0
+
+    @classmethod
+    def parse(cls, spec: str) -> "LatencyDistribution":
+        """Parse "kind:mean[:spread]", e.g. "lognormal:0.8:0.3", or a bare number of seconds."""
+        parts = spec.split(":")
+        if len(parts) == 1:
+            return cls("fixed", float(parts[0]))
+        if parts[0] not in DISTRIBUTIONS:
+            raise ValueError(f"Unknown latency distribution: {parts[0]}; expected one of {', '.join(DISTRIBUTIONS)}")
+        return cls(parts[0], float(parts[1]), float(parts[2]) if len(parts) > 2 else 0.0)
+
+    def sample(self, rng: random.Random) -> float:
+        """
+        Draw one latency.
+
+        spread is the standard deviation for normal and lognormal and the
+        half-width for uniform; exponential uses only the mean.
+        """
+        if self.kind == "uniform":
+            value = rng.uniform(self.mean - self.spread, self.mean + self.spread)
+        elif self.kind == "normal":
+            value = rng.gauss(self.mean, self.spread)
+        elif self.kind == "lognormal" and self.mean > 0:
+            # Parameterized so the samples have the requested mean and standard deviation
+            sigma2 = math.log(1 + (self.spread / self.mean) ** 2)
+            value = rng.lognormvariate(math.log(self.mean) - sigma2 / 2, math.sqrt(sigma2))
+        elif self.kind == "exponential" and self.mean > 0:
+            value = rng.expovariate(1 / self.mean)
+        else:
+            value = self.mean
+        return max(0.0, value)
+
+
+@dataclass
+class MockProfile:
+    """How the mock server behaves: latency, throughput, limits and fault injection."""
+    first_token_latency: LatencyDistribution = field(default_factory=LatencyDistribution)
+    prefill_tokens_per_second: float = 0.0
+    tokens_per_second: float = 0.0
+    completion_tokens: int = 128
+    context_length: int = 4096
+    max_concurrency: int = 1
+    error_rate: float = 0.0
+    rate_limit_rate: float = 0.0
+    retry_after: float = 1.0
+    models: List[str] = field(default_factory=lambda: [os.getenv("LMSTUDIO_MODEL", "gemma-3-4b-it")])
+    seed: Optional[int] = None
+
+    @classmethod
+    def from_env(cls, base: Optional["MockProfile"] = None) -> "MockProfile":
+        """
+        Apply MOCK_LMSTUDIO_* overrides to a profile (default: MOCK_LMSTUDIO_PROFILE).
+
+        Reads _TTFT (a latency spec), _PREFILL_TPS, _TPS, _COMPLETION_TOKENS,
+        _CONTEXT_LENGTH, _MAX_CONCURRENCY, _ERROR_RATE, _RATE_LIMIT_RATE,
+        _RETRY_AFTER, _MODELS (comma-separated) and _SEED.
+        """
+        profile = base or PROFILES[os.getenv("MOCK_LMSTUDIO_PROFILE", "gpu")]
+        overrides: Dict[str, Any] = {}
+        if spec := os.getenv("MOCK_LMSTUDIO_TTFT"):
+            overrides["first_token_latency"] = LatencyDistribution.parse(spec)
+        for name, env, cast in (
+            ("prefill_tokens_per_second", "PREFILL_TPS", float),
+            ("tokens_per_second", "TPS", float),
+            ("completion_tokens", "COMPLETION_TOKENS", int),
+            ("context_length", "CONTEXT_LENGTH", int),
+            ("max_concurrency", "MAX_CONCURRENCY", int),
+            ("error_rate", "ERROR_RATE", float),
+            ("rate_limit_rate", "RATE_LIMIT_RATE", float),
+            ("retry_after", "RETRY_AFTER", float),
+            ("seed", "SEED", int)
+        ):
+            if (value := os.getenv(f"MOCK_LMSTUDIO_{env}")) is not None:
+                overrides[name] = cast(value)
+        if models := os.getenv("MOCK_LMSTUDIO_MODELS"):
+            overrides["models"] = [m.strip() for m in models.split(",") if m.strip()]
+        return replace(profile, **overrides)
+
+    @classmethod
+    def from_file(cls, path: str) -> "MockProfile":
+        """Load a profile from JSON; "first_token_latency" is a latency spec string."""
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        base = PROFILES[data.pop("base", "gpu")]
+        if "first_token_latency" in data:
+            data["first_token_latency"] = LatencyDistribution.parse(data["first_token_latency"])
+        unknown = set(data) - {f.name for f in fields(cls)}
+        if unknown:
+            raise ValueError(f"Unknown mock profile field(s): {', '.join(sorted(unknown))}")
+        return replace(base, **data)
+
+
+PROFILES: Dict[str, MockProfile] = {
+    # No latency at all, for measuring client overhead
+    "instant": MockProfile(max_concurrency=64),
+    # A small model on a consumer GPU, served one request at a time like LM Studio
+    "gpu": MockProfile(
+        first_token_latency=LatencyDistribution("lognormal", 0.15, 0.05),
+        prefill_tokens_per_second=2000.0,
+        tokens_per_second=60.0,
+        context_length=8192
+    ),
+    # The same model on CPU
+    "cpu": MockProfile(
+        first_token_latency=LatencyDistribution("lognormal", 0.8, 0.3),
+        prefill_tokens_per_second=150.0,
+        tokens_per_second=8.0,
+        context_length=4096
+    ),
+    # A GPU server that sheds load and fails now and then
+    "flaky": MockProfile(
+        first_token_latency=LatencyDistribution("exponential", 0.3),
+        prefill_tokens_per_second=2000.0,
+        tokens_per_second=40.0,
+        context_length=8192,
+        error_rate=0.05,
+        rate_limit_rate=0.1
+    )
+}
+
+
+class MockInferenceServer:
+    """
+    aiohttp application serving /v1/models, /v1/completions and /v1/chat/completions.
+
+    Requests beyond max_concurrency queue for a decode slot, as on a single
+    GPU. Each request then waits for its first-token latency plus prefill
+    time, and produces tokens at tokens_per_second, either as one JSON body
+    or as server-sent events. Faults are injected before queueing: 429 with
+    Retry-After at rate_limit_rate, 500 at error_rate, and 400
+    context_length_exceeded when prompt plus max_tokens exceed the context.
+    Counters are served at /mock/stats.
+    """
+
+    def __init__(self, profile: MockProfile):
+        self.profile = profile
+        self.rng = random.Random(profile.seed)
+        self.stats: Dict[str, Any] = {
+            "requests": 0, "completed": 0, "rate_limited": 0, "errors": 0,
+            "context_errors": 0, "in_flight": 0, "queued": 0, "peak_queued": 0,
+            "prompt_tokens": 0, "completion_tokens": 0
+        }
+        self._slots: Optional[asyncio.Semaphore] = None
+
+    def app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_get("/v1/models", self.models)
+        app.router.add_post("/v1/completions", self.completions)
+        app.router.add_post("/v1/chat/completions", self.chat_completions)
+        app.router.add_get("/mock/stats", self.get_stats)
+        return app
+
+    async def models(self, request: web.Request) -> web.Response:
+        return web.json_response({
+            "object": "list",
+            "data": [{"id": m, "object": "model", "owned_by": "mock"} for m in self.profile.models]
+        })
+
+    async def get_stats(self, request: web.Request) -> web.Response:
+        return web.json_response(self.stats)
+
+    async def completions(self, request: web.Request) -> web.StreamResponse:
+        return await self._handle(request, chat=False)
+
+    async def chat_completions(self, request: web.Request) -> web.StreamResponse:
+        return await self._handle(request, chat=True)
+
+    @staticmethod
+    def _error(status: int, message: str, error_type: str, code: Optional[str] = None, headers: Optional[Dict[str, str]] = None) -> web.Response:
+        return web.json_response(
+            {"error": {"message": message, "type": error_type, "param": None, "code": code}},
+            status=status,
+            headers=headers
+        )
+
+    def _reply_tokens(self, max_tokens: int) -> List[str]:
+        count = min(max_tokens, self.profile.completion_tokens)
+        start = self.rng.randrange(len(FILLER_WORDS))
+        return [
+            ("" if i == 0 else " ") + FILLER_WORDS[(start + i) % len(FILLER_WORDS)]
+            for i in range(count)
+        ]
+
+    async def _handle(self, request: web.Request, chat: bool) -> web.StreamResponse:
+        self.stats["requests"] += 1
+        try:
+            body = await request.json()
+        except json.JSONDecodeError:
+            return self._error(400, "Request body is not valid JSON", "invalid_request_error")
+        if not isinstance(body, dict):
+            return self._error(400, "Request body must be a JSON object", "invalid_request_error")
+        prompt = body.get("messages") if chat else body.get("prompt")
+        if not prompt:
+            return self._error(400, f"'{'messages' if chat else 'prompt'}' is required", "invalid_request_error")
+        if chat and not (isinstance(prompt, list) and all(isinstance(m, dict) for m in prompt)):
+            return self._error(400, "'messages' must be a list of message objects", "invalid_request_error")
+
+        if self.rng.random() < self.profile.rate_limit_rate:
+            self.stats["rate_limited"] += 1
+            return self._error(
+                429, "Rate limit reached; retry later", "rate_limit_error", "rate_limit_exceeded",
+                headers={"Retry-After": str(self.profile.retry_after)}
+            )
+        if self.rng.random() < self.profile.error_rate:
+            self.stats["errors"] += 1
+            return self._error(500, "Injected server error", "server_error")
+
+        if chat:
+            prompt_tokens = sum(estimate_tokens(m.get("content") or "") for m in prompt)
+        else:
+            prompt_tokens = estimate_tokens(prompt)
+        max_tokens = int(body.get("max_tokens") or self.profile.completion_tokens)
+        if prompt_tokens + max_tokens > self.profile.context_length:
+            self.stats["context_errors"] += 1
+            return self._error(
+                400,
+                f"This model's maximum context length is {self.profile.context_length} tokens. "
+                f"However, you requested {prompt_tokens + max_tokens} tokens "
+                f"({prompt_tokens} in the prompt, {max_tokens} for the completion).",
+                "invalid_request_error",
+                "context_length_exceeded"
+            )
+
+        if self._slots is None:
+            # Created lazily so it binds to the server's event loop
+            self._slots = asyncio.Semaphore(self.profile.max_concurrency)
+        self.stats["queued"] += 1
+        self.stats["peak_queued"] = max(self.stats["peak_queued"], self.stats["queued"])
+        async with self._slots:
+            self.stats["queued"] -= 1
+            self.stats["in_flight"] += 1
+            try:
+                return await self._generate(request, body, chat, prompt_tokens, max_tokens)
+            finally:
+                self.stats["in_flight"] -= 1
+
+    async def _generate(self, request: web.Request, body: Dict[str, Any], chat: bool, prompt_tokens: int, max_tokens: int) -> web.StreamResponse:
+        profile = self.profile
+        delay = profile.first_token_latency.sample(self.rng)
+        if profile.prefill_tokens_per_second > 0:
+            delay += prompt_tokens / profile.prefill_tokens_per_second
+        await asyncio.sleep(delay)
+
+        tokens = self._reply_tokens(max_tokens)
+        finish_reason = "length" if len(tokens) >= max_tokens else "stop"
+        usage = {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": len(tokens),
+            "total_tokens": prompt_tokens + len(tokens)
+        }
+        token_interval = 1 / profile.tokens_per_second if profile.tokens_per_second > 0 else 0.0
+        completion_id = f"{'chatcmpl' if chat else 'cmpl'}-{uuid.uuid4().hex[:24]}"
+        base = {"id": completion_id, "created": int(time.time()), "model": body.get("model") or profile.models[0]}
+
+        if not body.get("stream"):
+            await asyncio.sleep(token_interval * len(tokens))
+            text = "".join(tokens)
+            choice = {"index": 0, "finish_reason": finish_reason}
+            choice.update({"message": {"role": "assistant", "content": text}} if chat else {"text": text})
+            self._record(usage)
+            return web.json_response({**base, "object": "chat.completion" if chat else "text_completion", "choices": [choice], "usage": usage})
+
+        response = web.StreamResponse(headers={"Content-Type": "text/event-stream", "Cache-Control": "no-cache"})
+        await response.prepare(request)
+        chunk_object = "chat.completion.chunk" if chat else "text_completion"
+
+        async def send(event: Dict[str, Any]) -> None:
+            await response.write(f"data: {json.dumps(event)}\n\n".encode("utf-8"))
+
+        for i, token in enumerate(tokens):
+            if i:
+                await asyncio.sleep(token_interval)
+            choice = {"index": 0, "finish_reason": None}
+            choice.update({"delta": {"role": "assistant", "content": token} if i == 0 else {"content": token}} if chat else {"text": token})
+            await send({**base, "object": chunk_object, "choices": [choice]})
+        final = {"index": 0, "finish_reason": finish_reason}
+        final.update({"delta": {}} if chat else {"text": ""})
+        await send({**base, "object": chunk_object, "choices": [final], "usage": usage})
+        await response.write(b"data: [DONE]\n\n")
+        await response.write_eof()
+        self._record(usage)
+        return response
+
+    def _record(self, usage: Dict[str, int]) -> None:
+        self.stats["completed"] += 1
+        self.stats["prompt_tokens"] += usage["prompt_tokens"]
+        self.stats["completion_tokens"] += usage["completion_tokens"]
+
+
+class MockServerThread:
+    """
+    Runs a mock server on a background thread, e.g. inside a benchmark script.
+
+    Use as a context manager; ``url`` is the base URL to set as
+    LMSTUDIO_API_URL. Port 0 picks a free port.
+    """
+
+    def __init__(self, profile: Optional[MockProfile] = None, host: str = "127.0.0.1", port: int = 0):
+        self.server = MockInferenceServer(profile or MockProfile.from_env())
+        self.host = host
+        self.port = port
+        self.url: Optional[str] = None
+        self._loop = asyncio.new_event_loop()
+        self._runner: Optional[web.AppRunner] = None
+        self._thread = threading.Thread(target=self._loop.run_forever, name="mock-lmstudio", daemon=True)
+
+    async def _start(self) -> None:
+        self._runner = web.AppRunner(self.server.app())
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self.host, self.port)
+        await site.start()
+        port = self._runner.addresses[0][1]
+        self.url = f"http://{self.host}:{port}"
+
+    def start(self) -> "MockServerThread":
+        self._thread.start()
+        asyncio.run_coroutine_threadsafe(self._start(), self._loop).result()
+        logger.info(f"Mock LM Studio server listening on {self.url}")
+        return self
+
+    def stop(self) -> None:
+        if self._runner is not None:
+            asyncio.run_coroutine_threadsafe(self._runner.cleanup(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+
+    def __enter__(self) -> "MockServerThread":
+        return self.start()
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.stop()
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Launch the mock server; flags override the profile and MOCK_LMSTUDIO_* settings."""
+    parser = argparse.ArgumentParser(description="OpenAI-compatible mock inference server")
+    parser.add_argument("--host", default=os.getenv("MOCK_LMSTUDIO_HOST", "127.0.0.1"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("MOCK_LMSTUDIO_PORT", 1234)))
+    parser.add_argument("--profile", choices=sorted(PROFILES), default=os.getenv("MOCK_LMSTUDIO_PROFILE", "gpu"))
+    parser.add_argument("--profile-file", help="JSON profile; its optional 'base' names the profile it extends")
+    parser.add_argument("--ttft", type=LatencyDistribution.parse, help='First-token latency, e.g. "lognormal:0.8:0.3"')
+    parser.add_argument("--prefill-tps", type=float, help="Prompt tokens processed per second")
+    parser.add_argument("--tps", type=float, help="Completion tokens generated per second")
+    parser.add_argument("--completion-tokens", type=int, help="Reply length when max_tokens allows")
+    parser.add_argument("--context-length", type=int)
+    parser.add_argument("--max-concurrency", type=int, help="Requests decoded at once; the rest queue")
+    parser.add_argument("--error-rate", type=float, help="Fraction of requests answered with 500")
+    parser.add_argument("--rate-limit-rate", type=float, help="Fraction of requests answered with 429")
+    parser.add_argument("--retry-after", type=float, help="Retry-After seconds sent with 429")
+    parser.add_argument("--model", action="append", dest="models", help="Model id to list; repeatable")
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args(argv)
+
+    profile = MockProfile.from_file(args.profile_file) if args.profile_file else MockProfile.from_env(PROFILES[args.profile])
+    overrides = {
+        name: getattr(args, arg) for name, arg in (
+            ("first_token_latency", "ttft"),
+            ("prefill_tokens_per_second", "prefill_tps"),
+            ("tokens_per_second", "tps"),
+            ("completion_tokens", "completion_tokens"),
+            ("context_length", "context_length"),
+            ("max_concurrency", "max_concurrency"),
+            ("error_rate", "error_rate"),
+            ("rate_limit_rate", "rate_limit_rate"),
+            ("retry_after", "retry_after"),
+            ("models", "models"),
+            ("seed", "seed")
+        )
+        if getattr(args, arg) is not None
+    }
+    profile = replace(profile, **overrides)
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    logger.info(f"Mock LM Studio server on http://{args.host}:{args.port} with {profile}")
+    web.run_app(MockInferenceServer(profile).app(), host=args.host, port=args.port, print=None)
+
+
+if __name__ == "__main__":
+    main()
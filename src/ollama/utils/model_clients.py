@@ -1,24 +1,39 @@
 import os
-import google.generativeai as genai
-import requests
 from typing import Dict, Any, List
 from ..tools.search_tools import SearchManager
+from .chat_sessions import ChatSession, GeminiChatSession, get_session_manager, session_token_budget
+from .client_registry import get_gemini_model
+from .http_transport import get_lmstudio_transport
+from .llm_client import get_llm_client
+from .lmstudio_client import CompletionStream
 
 class GeminiClient:
     def __init__(self):
         self.api_key = os.getenv("GEMINI_API_KEY")
-        genai.configure(api_key=self.api_key)
-        self.model = genai.GenerativeModel(os.getenv("GEMINI_MODEL", "models/gemini-2.0-flash"))
+        self.model = get_gemini_model()
+        self.client = get_llm_client("gemini")
         self.search_manager = SearchManager()
+        self.sessions = get_session_manager(
+            "gemini",
+            lambda conversation_id: GeminiChatSession(conversation_id, self.model, session_token_budget("gemini"))
+        )
 
     def generate_text(self, prompt: str, **kwargs) -> Dict[str, Any]:
-        response = self.model.generate_content(prompt)
-        return {"text": response.text, "model": "gemini"}
+        return {"text": self.client.generate(prompt, **kwargs)["text"], "model": "gemini"}
 
     def chat_completion(self, messages: List[Dict[str, str]], **kwargs) -> Dict[str, Any]:
-        chat = self.model.start_chat(history=[])
-        response = chat.send_message(messages[-1]["content"])
-        return {"response": response.text, "model": "gemini"}
+        """Reply to the last message; pass conversation_id to keep and reuse the session."""
+        conversation_id = kwargs.pop("conversation_id", None)
+        if conversation_id is None:
+            return {
+                "response": self.client.chat(messages, **kwargs)["text"],
+                "model": "gemini"
+            }
+        return {
+            "response": self.sessions.chat(conversation_id, messages),
+            "model": "gemini",
+            "conversation_id": conversation_id
+        }
 
     def search_and_generate(self, query: str, search_tool: str = "selenium") -> Dict[str, Any]:
         # First perform web search
@@ -41,40 +56,57 @@ class LMStudioClient:
     def __init__(self):
         self.api_url = os.getenv("LMSTUDIO_API_URL", "http://localhost:1234")
         self.model = os.getenv("LMSTUDIO_MODEL", "gemma-3-4b-it")
+        self.client = get_llm_client("lmstudio", self.model)
+        self.transport = get_lmstudio_transport(self.api_url)
         self.search_manager = SearchManager()
+        self.sessions = get_session_manager(
+            "lmstudio",
+            lambda conversation_id: ChatSession(
+                conversation_id,
+                complete=lambda messages: self.client.chat(messages)["text"],
+                summarize=lambda prompt: self.client.generate(prompt)["text"],
+                token_budget=session_token_budget("lmstudio")
+            )
+        )
 
     def generate_text(self, prompt: str, **kwargs) -> Dict[str, Any]:
-        response = requests.post(
-            f"{self.api_url}/v1/completions",
-            json={
-                "model": self.model,
-                "prompt": prompt,
-                "max_tokens": int(os.getenv("LMSTUDIO_MAX_TOKENS", 2048)),
-                "temperature": float(os.getenv("LMSTUDIO_TEMPERATURE", 0.7))
-            }
-        )
-        response.raise_for_status()
         return {
-            "text": response.json()["choices"][0]["text"],
+            "text": self.client.generate(prompt, **kwargs)["text"],
             "model": "lmstudio"
         }
 
     def chat_completion(self, messages: List[Dict[str, str]], **kwargs) -> Dict[str, Any]:
-        response = requests.post(
-            f"{self.api_url}/v1/chat/completions",
-            json={
-                "model": self.model,
-                "messages": messages,
-                "max_tokens": int(os.getenv("LMSTUDIO_MAX_TOKENS", 2048)),
-                "temperature": float(os.getenv("LMSTUDIO_TEMPERATURE", 0.7))
+        """Reply to the last message; pass conversation_id to keep and reuse the session."""
+        conversation_id = kwargs.pop("conversation_id", None)
+        if conversation_id is None:
+            return {
+                "response": self.client.chat(messages, **kwargs)["text"],
+                "model": "lmstudio"
             }
-        )
-        response.raise_for_status()
         return {
-            "response": response.json()["choices"][0]["message"]["content"],
-            "model": "lmstudio"
+            "response": self.sessions.chat(conversation_id, messages),
+            "model": "lmstudio",
+            "conversation_id": conversation_id
         }
 
+    def stream_completion(self, prompt: str, **kwargs) -> CompletionStream:
+        """Stream a text completion; iterate the result for text deltas."""
+        data = self.client.build_payload("prompt", prompt, stream=True, **kwargs)
+        return CompletionStream(
+            lambda: self.transport.post("/v1/completions", json=data, stream=True, timeout=kwargs.get("timeout")),
+            chat=False,
+            model=self.model
+        )
+
+    def stream_chat_completion(self, messages: List[Dict[str, str]], **kwargs) -> CompletionStream:
+        """Stream a chat completion; iterate the result for content deltas."""
+        data = self.client.build_payload("messages", messages, stream=True, **kwargs)
+        return CompletionStream(
+            lambda: self.transport.post("/v1/chat/completions", json=data, stream=True, timeout=kwargs.get("timeout")),
+            chat=True,
+            model=self.model
+        )
+
     def search_and_generate(self, query: str, search_tool: str = "selenium") -> Dict[str, Any]:
         search_results = self.search_manager.search(query, tool=search_tool)
 
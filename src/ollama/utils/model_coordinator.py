@@ -1,6 +1,82 @@
-from typing import Dict, List, Optional
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from collections import Counter
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+import contextvars
+import json
+import logging
 import os
+import threading
+import time
 from .model_utils import ModelManager
+from .model_health import get_health_registry
+from .backend_stats import get_backend_stats
+
+logger = logging.getLogger(__name__)
+
+ROUTING_POLICIES = ("priority", "fastest", "cost_weighted")
+PARALLEL_STRATEGIES = ("first_success", "best_by_validator", "majority_vote")
+
+
+class HedgeBudget:
+    """
+    Caps hedged requests to a fraction of all requests.
+
+    Every request earns ``ratio`` of a hedge, up to ``burst`` saved; each
+    hedge spends one. With ratio 0.1, at most about one request in ten is
+    duplicated, however slow the primary backend gets.
+    """
+
+    def __init__(self, ratio: float = 0.1, burst: float = 5.0):
+        self.ratio = ratio
+        self.burst = burst
+        self.hedges = 0
+        self.requests = 0
+        self._tokens = burst
+        self._lock = threading.Lock()
+
+    def record_request(self) -> None:
+        with self._lock:
+            self.requests += 1
+            self._tokens = min(self.burst, self._tokens + self.ratio)
+
+    def try_acquire(self) -> bool:
+        with self._lock:
+            if self._tokens < 1:
+                return False
+            self._tokens -= 1
+            self.hedges += 1
+            return True
+
+
+_hedge_budget = HedgeBudget(
+    ratio=float(os.getenv("MODEL_HEDGE_BUDGET", 0.1)),
+    burst=float(os.getenv("MODEL_HEDGE_BURST", 5))
+)
+# Shared by hedged and parallel requests; work runs in the submitter's context so usage stays attributed
+_request_executor = ThreadPoolExecutor(
+    max_workers=int(os.getenv("MODEL_REQUEST_WORKERS", 8)),
+    thread_name_prefix="model-request"
+)
+# Hedged and first_success parallel requests whose losing attempts may still hold _request_executor workers
+_hedge_slots = threading.BoundedSemaphore(int(os.getenv("MODEL_HEDGE_MAX_INFLIGHT", 2)))
+
+
+def _release_when_done(futures: List[Future], slots: threading.BoundedSemaphore) -> None:
+    """Release one of the slots once every future has finished or been cancelled."""
+    remaining = len(futures)
+    lock = threading.Lock()
+
+    def on_done(_: Future) -> None:
+        nonlocal remaining
+        with lock:
+            remaining -= 1
+            finished = remaining == 0
+        if finished:
+            slots.release()
+
+    for future in futures:
+        future.add_done_callback(on_done)
+
 
 class ModelCoordinator:
     def __init__(self):
@@ -8,39 +84,226 @@ class ModelCoordinator:
         self.model_priority = eval(os.getenv("MODEL_PRIORITY", "['gemini', 'lmstudio', 'ollama']"))
         self.enable_fallback = os.getenv("ENABLE_MODEL_FALLBACK", "true").lower() == "true"
         self.parallel_execution = os.getenv("PARALLEL_MODEL_EXECUTION", "false").lower() == "true"
+        self.parallel_strategy = os.getenv("PARALLEL_MODEL_STRATEGY", "first_success").lower()
+        if self.parallel_strategy not in PARALLEL_STRATEGIES:
+            raise ValueError(f"Unknown parallel strategy: {self.parallel_strategy}")
+        self.health = get_health_registry(self.model_priority)
+        self.stats = get_backend_stats()
+        self.routing_policy = os.getenv("MODEL_ROUTING_POLICY", "priority").lower()
+        if self.routing_policy not in ROUTING_POLICIES:
+            raise ValueError(f"Unknown routing policy: {self.routing_policy}")
+        # Relative cost per request; cost_weighted scales expected time by (1 + weight * cost)
+        self.model_costs = json.loads(os.getenv("MODEL_COSTS", '{"gemini": 1.0, "lmstudio": 0.0, "ollama": 0.0}'))
+        self.cost_weight = float(os.getenv("MODEL_COST_WEIGHT", 1.0))
+        self.hedge_requests = os.getenv("MODEL_HEDGE_REQUESTS", "false").lower() == "true"
+        # Hedge delay used until the primary backend has latency samples
+        self.hedge_delay = float(os.getenv("MODEL_HEDGE_DELAY", 10))
+        self.hedge_budget = _hedge_budget
 
     def get_available_models(self) -> List[str]:
-        available = []
-        for model_type in self.model_priority:
-            if self.model_manager.validate_model_config(model_type):
-                available.append(model_type)
-        return available
+        # Served from the cached health registry; no network round trip on the hot path
+        return [model_type for model_type in self.model_priority if self.health.is_available(model_type)]
 
-    def get_primary_model(self) -> Optional[Dict]:
+    def rank_models(self, task_class: Optional[str] = None) -> List[str]:
+        """Order available backends by the routing policy; priority order breaks ties."""
         available = self.get_available_models()
-        if not available:
-            raise RuntimeError("No models available")
+        if self.routing_policy == "priority":
+            return available
 
-        primary = available[0]
-        if primary == "gemini":
+        def score(model_type: str) -> float:
+            expected = self.stats.expected_time(model_type, task_class)
+            if self.routing_policy == "cost_weighted":
+                expected *= 1 + self.cost_weight * float(self.model_costs.get(model_type, 0.0))
+            return expected
+
+        scores = {model_type: score(model_type) for model_type in available}
+        return sorted(available, key=lambda model_type: (scores[model_type], available.index(model_type)))
+
+    def _build_model(self, model_type: str) -> Optional[Dict]:
+        if model_type == "gemini":
             return {"type": "gemini", "model": self.model_manager.get_gemini_model()}
-        elif primary == "lmstudio":
+        elif model_type == "lmstudio":
             return {"type": "lmstudio", "model": self.model_manager.get_lmstudio_model()}
         return None
 
-    def get_fallback_model(self, failed_type: str) -> Optional[Dict]:
+    def get_primary_model(self, task_class: Optional[str] = None) -> Optional[Dict]:
+        ranked = self.rank_models(task_class)
+        if not ranked:
+            raise RuntimeError("No models available")
+        return self._build_model(ranked[0])
+
+    def get_fallback_model(
+        self,
+        failed_type: str,
+        task_class: Optional[str] = None,
+        tried: Optional[Set[str]] = None
+    ) -> Optional[Dict]:
+        """
+        Best-ranked backend other than the failed one and those already tried.
+
+        The failure itself is recorded before this is called, so under the
+        latency-based policies the failed backend may now rank below the
+        healthy ones; picking by exclusion rather than by position keeps
+        those reachable.
+        """
         if not self.enable_fallback:
             return None
 
-        available = self.get_available_models()
-        try:
-            current_index = available.index(failed_type)
-            if current_index + 1 < len(available):
-                next_type = available[current_index + 1]
-                if next_type == "gemini":
-                    return {"type": "gemini", "model": self.model_manager.get_gemini_model()}
-                elif next_type == "lmstudio":
-                    return {"type": "lmstudio", "model": self.model_manager.get_lmstudio_model()}
-        except ValueError:
-            pass
+        excluded = set(tried or ()) | {failed_type}
+        for model_type in self.rank_models(task_class):
+            if model_type not in excluded:
+                return self._build_model(model_type)
         return None
+
+    def model_name(self, model: Dict) -> str:
+        """Name of the concrete model behind a backend entry, used to key latency stats."""
+        if model["type"] == "gemini":
+            return getattr(model["model"], "model_name", "gemini")
+        return model["model"].get("model", model["type"])
+
+    def track(self, model: Dict, task_class: Optional[str] = None):
+        """Context manager that times a request to a backend and feeds the outcome into routing."""
+        return self.stats.track(model["type"], self.model_name(model), task_class or "default")
+
+    def run_hedged(self, fn: Callable[[Dict], Any], task_class: Optional[str] = None) -> Tuple[Any, Dict]:
+        """
+        Run fn against the primary backend, hedging to the fallback on slow responses.
+
+        If the primary has not answered within its tracked p95 latency, the
+        same request is sent to the fallback (budget permitting) and the first
+        success wins. A primary that fails outright falls back as usual.
+
+        The losing attempt can't be interrupted and keeps its executor worker
+        until it returns, so at most MODEL_HEDGE_MAX_INFLIGHT hedged requests
+        may have both attempts running; beyond that, requests wait for the
+        primary instead of hedging.
+
+        Returns:
+            The winning result and the model entry that produced it
+        """
+        ranked = self.rank_models(task_class)
+        if not ranked:
+            raise RuntimeError("No models available")
+        primary = self._build_model(ranked[0])
+        fallback = self._build_model(ranked[1]) if self.enable_fallback and len(ranked) > 1 else None
+        self.hedge_budget.record_request()
+
+        primary_future = _request_executor.submit(contextvars.copy_context().run, fn, primary)
+        pending: Dict[Future, Dict] = {primary_future: primary}
+        fallback_sent = False
+        delay = self.stats.p95(primary["type"], task_class)
+        done, _ = wait(pending, timeout=self.hedge_delay if delay is None else delay)
+        if not done and fallback:
+            if not _hedge_slots.acquire(blocking=False):
+                logger.debug(f"Not hedging slow {primary['type']} request: too many hedged requests in flight")
+            elif not self.hedge_budget.try_acquire():
+                _hedge_slots.release()
+            else:
+                logger.info(f"Hedging slow {primary['type']} request to {fallback['type']}")
+                hedge_future = _request_executor.submit(contextvars.copy_context().run, fn, fallback)
+                pending[hedge_future] = fallback
+                fallback_sent = True
+                _release_when_done([primary_future, hedge_future], _hedge_slots)
+
+        error: Optional[BaseException] = None
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                model = pending.pop(future)
+                try:
+                    result = future.result()
+                except Exception as e:
+                    error = e
+                    continue
+                # Drop the loser; a call already running finishes in the background and is discarded
+                for other in pending:
+                    other.cancel()
+                return result, model
+            if not pending and fallback and not fallback_sent:
+                pending[_request_executor.submit(contextvars.copy_context().run, fn, fallback)] = fallback
+                fallback_sent = True
+        raise error
+
+    def run_parallel(
+        self,
+        fn: Callable[[Dict], Any],
+        task_class: Optional[str] = None,
+        strategy: Optional[str] = None,
+        validator: Optional[Callable[[Any], float]] = None
+    ) -> Dict[str, Any]:
+        """
+        Run fn against every available backend concurrently and pick one result.
+
+        Strategies:
+            first_success: the first backend to answer successfully wins
+            best_by_validator: wait for all, highest validator score wins
+            majority_vote: wait for all, the most common normalized answer wins
+
+        Ties go to the backend ranked first by the routing policy.
+
+        Returning on the first success leaves the other calls running in the
+        background, so first_success takes one of the MODEL_HEDGE_MAX_INFLIGHT
+        slots shared with run_hedged until they all finish. Without a free
+        slot it waits for every backend and picks the fastest success.
+
+        Returns:
+            Dict with the winning "result" and "model" type, the "strategy",
+            per-backend "latencies" in seconds (None if unfinished), "errors",
+            and "scores" or "votes" where the strategy produces them
+        """
+        strategy = (strategy or self.parallel_strategy).lower()
+        if strategy not in PARALLEL_STRATEGIES:
+            raise ValueError(f"Unknown parallel strategy: {strategy}")
+        if strategy == "best_by_validator" and validator is None:
+            raise ValueError("best_by_validator requires a validator")
+        ranked = self.rank_models(task_class)
+        if not ranked:
+            raise RuntimeError("No models available")
+
+        def timed(model: Dict) -> Tuple[Any, float]:
+            start = time.monotonic()
+            return fn(model), time.monotonic() - start
+
+        abandon_losers = strategy == "first_success" and _hedge_slots.acquire(blocking=False)
+        pending: Dict[Future, str] = {
+            _request_executor.submit(contextvars.copy_context().run, timed, self._build_model(model_type)): model_type
+            for model_type in ranked
+        }
+        if abandon_losers:
+            _release_when_done(list(pending), _hedge_slots)
+        results: Dict[str, Any] = {}
+        latencies: Dict[str, Optional[float]] = {model_type: None for model_type in ranked}
+        errors: Dict[str, str] = {}
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                model_type = pending.pop(future)
+                try:
+                    results[model_type], latencies[model_type] = future.result()
+                except Exception as e:
+                    errors[model_type] = str(e)
+            if abandon_losers and results:
+                for other in pending:
+                    other.cancel()
+                break
+
+        if not results:
+            raise RuntimeError(f"All backends failed: {errors}")
+
+        report: Dict[str, Any] = {"strategy": strategy, "latencies": latencies, "errors": errors}
+        candidates = [model_type for model_type in ranked if model_type in results]
+        if strategy == "first_success":
+            winner = min(candidates, key=lambda model_type: latencies[model_type])
+        elif strategy == "best_by_validator":
+            scores = {model_type: validator(results[model_type]) for model_type in candidates}
+            winner = max(candidates, key=lambda model_type: scores[model_type])
+            report["scores"] = scores
+        else:
+            normalized = {model_type: " ".join(str(results[model_type]).lower().split()) for model_type in candidates}
+            votes = Counter(normalized.values())
+            winner = max(candidates, key=lambda model_type: votes[normalized[model_type]])
+            report["votes"] = {model_type: votes[normalized[model_type]] for model_type in candidates}
+
+        logger.info(f"Parallel {strategy} picked {winner}; latencies: {latencies}")
+        report.update({"result": results[winner], "model": winner})
+        return report
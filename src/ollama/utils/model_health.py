@@ -0,0 +1,160 @@
+"""
+Cached model backend health with a background refresher.
+"""
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+from .model_utils import ModelManager
+
+logger = logging.getLogger(__name__)
+
+# How long a probe result is trusted before the hot path re-probes, per backend
+DEFAULT_MAX_AGE = {"gemini": 300.0, "lmstudio": 30.0}
+
+
+@dataclass
+class BackendHealth:
+    """Last probe result for one backend."""
+    available: bool
+    checked_at: float
+    probe_seconds: float
+    error: Optional[str] = None
+
+
+class ModelHealthRegistry:
+    """
+    In-memory backend availability, kept fresh by a daemon thread.
+
+    Model selection reads the cached status instead of probing. A backend
+    whose last result is older than its staleness bound (or that was never
+    probed) is re-probed synchronously with a short timeout; with the
+    refresher running, that only happens at startup.
+    """
+
+    def __init__(
+        self,
+        backends: List[str],
+        model_manager: Optional[ModelManager] = None,
+        refresh_interval: float = 15.0,
+        probe_timeout: float = 2.0,
+        max_age: Optional[Dict[str, float]] = None
+    ):
+        """
+        Initialize the registry.
+
+        Args:
+            backends: Backend names to track, e.g. ["gemini", "lmstudio"]
+            model_manager: ModelManager used for probing
+            refresh_interval: Seconds between background refreshes
+            probe_timeout: Timeout in seconds for each network probe
+            max_age: Per-backend staleness bounds in seconds
+        """
+        self.backends = list(backends)
+        self.model_manager = model_manager or ModelManager()
+        self.refresh_interval = refresh_interval
+        self.probe_timeout = probe_timeout
+        self.max_age = {**DEFAULT_MAX_AGE, **(max_age or {})}
+        self._status: Dict[str, BackendHealth] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def probe(self, backend: str) -> BackendHealth:
+        """Probe a backend now and store the result."""
+        start = time.monotonic()
+        error = None
+        try:
+            available = self.model_manager.validate_model_config(backend, timeout=self.probe_timeout)
+        except Exception as e:
+            available = False
+            error = str(e)
+        health = BackendHealth(
+            available=available,
+            checked_at=time.monotonic(),
+            probe_seconds=time.monotonic() - start,
+            error=error
+        )
+        with self._lock:
+            previous = self._status.get(backend)
+            self._status[backend] = health
+        if previous is None or previous.available != health.available:
+            logger.info(f"Backend {backend} is {'available' if available else 'unavailable'}")
+        return health
+
+    def refresh(self) -> None:
+        """Probe every tracked backend."""
+        for backend in self.backends:
+            self.probe(backend)
+
+    def is_available(self, backend: str) -> bool:
+        """Return cached availability, re-probing only if the result is missing or stale."""
+        with self._lock:
+            health = self._status.get(backend)
+        max_age = self.max_age.get(backend, self.refresh_interval * 2)
+        if health is None or time.monotonic() - health.checked_at > max_age:
+            health = self.probe(backend)
+        return health.available
+
+    def snapshot(self) -> Dict[str, BackendHealth]:
+        """Return a copy of the current health table."""
+        with self._lock:
+            return dict(self._status)
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self.refresh()
+            except Exception as e:
+                logger.error(f"Model health refresh failed: {str(e)}")
+            self._stop.wait(self.refresh_interval)
+
+    def start(self) -> None:
+        """Start the background refresher if it is not already running."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="model-health-refresher", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the background refresher."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.probe_timeout + 1)
+
+
+_registry: Optional[ModelHealthRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_health_registry(backends: List[str]) -> ModelHealthRegistry:
+    """
+    Get the process-wide health registry, starting its refresher on first use.
+
+    Configured from MODEL_HEALTH_REFRESH_INTERVAL, MODEL_HEALTH_PROBE_TIMEOUT
+    and <BACKEND>_HEALTH_MAX_AGE (e.g. LMSTUDIO_HEALTH_MAX_AGE).
+    """
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            max_age = {}
+            for backend in backends:
+                value = os.getenv(f"{backend.upper()}_HEALTH_MAX_AGE")
+                if value:
+                    max_age[backend] = float(value)
+            _registry = ModelHealthRegistry(
+                backends,
+                refresh_interval=float(os.getenv("MODEL_HEALTH_REFRESH_INTERVAL", 15)),
+                probe_timeout=float(os.getenv("MODEL_HEALTH_PROBE_TIMEOUT", 2)),
+                max_age=max_age
+            )
+            _registry.start()
+        else:
+            for backend in backends:
+                if backend not in _registry.backends:
+                    _registry.backends.append(backend)
+        return _registry
@@ -1,8 +1,9 @@
 from typing import Dict, Optional
 import os
-import google.generativeai as genai
-import requests
 from ..config import load_model_config
+from .client_registry import get_client_registry
+from .http_transport import get_lmstudio_transport
+from .rate_limiter import RateLimitedModel
 
 class ModelManager:
     def __init__(self):
@@ -13,23 +14,21 @@ class ModelManager:
         # Initialize Gemini
         api_key = os.getenv("GEMINI_API_KEY")
         if api_key:
-            genai.configure(api_key=api_key)
+            get_client_registry().configure(api_key)
             self.default_model = os.getenv("GEMINI_MODEL", "models/gemini-2.0-flash")
+            # Read once; the registry hands back the same client for the same config
+            self.gemini_generation_config = {
+                "temperature": float(os.getenv("GEMINI_TEMPERATURE", 0.7)),
+                "top_p": float(os.getenv("GEMINI_TOP_P", 0.95)),
+                "max_output_tokens": int(os.getenv("GEMINI_MAX_TOKENS", 8192))
+            }
 
         # Initialize LM Studio
         self.lmstudio_url = os.getenv("LMSTUDIO_API_URL", "http://localhost:1234")
 
-    def get_gemini_model(self, model_name: Optional[str] = None) -> genai.GenerativeModel:
+    def get_gemini_model(self, model_name: Optional[str] = None) -> RateLimitedModel:
         model = model_name or self.default_model
-        generation_config = {
-            "temperature": float(os.getenv("GEMINI_TEMPERATURE", 0.7)),
-            "top_p": float(os.getenv("GEMINI_TOP_P", 0.95)),
-            "max_output_tokens": int(os.getenv("GEMINI_MAX_TOKENS", 8192))
-        }
-        return genai.GenerativeModel(
-            model_name=model,
-            generation_config=generation_config
-        )
+        return get_client_registry().get_rate_limited(model, self.gemini_generation_config)
 
     def get_lmstudio_model(self, model_name: Optional[str] = None) -> Dict:
         model = model_name or os.getenv("LMSTUDIO_MODEL", "gemma-3-4b-it")
@@ -42,12 +41,12 @@ class ModelManager:
             "top_p": float(os.getenv("LMSTUDIO_TOP_P", 0.95))
         }
 
-    def validate_model_config(self, model_type: str) -> bool:
+    def validate_model_config(self, model_type: str, timeout: Optional[float] = None) -> bool:
         if model_type == "gemini":
             return bool(os.getenv("GEMINI_API_KEY"))
         elif model_type == "lmstudio":
             try:
-                response = requests.get(f"{self.lmstudio_url}/v1/models")
+                response = get_lmstudio_transport(self.lmstudio_url).get("/v1/models", timeout=timeout)
                 return response.status_code == 200
             except:
                 return False
@@ -0,0 +1,268 @@
+"""
+Process-wide token-bucket rate limiting for model APIs.
+"""
+import asyncio
+import logging
+import os
+import threading
+import time
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Gemini bills an image input as a fixed number of tokens
+IMAGE_TOKEN_ESTIMATE = 258
+
+
+def estimate_tokens(contents: Any) -> int:
+    """
+    Roughly estimate the prompt tokens in generate_content contents.
+
+    Uses ~4 characters per token for text and a flat cost for other parts
+    (images). Estimates are corrected from usage_metadata after the call.
+    """
+    if contents is None:
+        return 0
+    if isinstance(contents, str):
+        return len(contents) // 4 + 1
+    if isinstance(contents, dict):
+        return sum(estimate_tokens(value) for value in contents.values())
+    if isinstance(contents, (list, tuple)):
+        return sum(estimate_tokens(part) for part in contents)
+    text = getattr(contents, "text", None)
+    if isinstance(text, str):
+        return estimate_tokens(text)
+    parts = getattr(contents, "parts", None)
+    if parts is not None:
+        return estimate_tokens(list(parts))
+    return IMAGE_TOKEN_ESTIMATE
+
+
+class TokenBucketRateLimiter:
+    """
+    Requests-per-minute and tokens-per-minute budgets shared by all callers.
+
+    Both buckets refill continuously. A caller reserves one request and its
+    estimated tokens up front, then reconciles the token bucket once the
+    actual usage is known. A limit of 0 disables that bucket.
+    """
+
+    def __init__(self, requests_per_minute: float, tokens_per_minute: float):
+        """
+        Initialize the limiter.
+
+        Args:
+            requests_per_minute: Request budget per minute (0 = unlimited)
+            tokens_per_minute: Token budget per minute (0 = unlimited)
+        """
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self._requests = float(requests_per_minute)
+        self._tokens = float(tokens_per_minute)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+        self.total_requests = 0
+        self.total_tokens = 0
+        self.total_wait_seconds = 0.0
+
+    def _refill(self, now: float) -> None:
+        elapsed = now - self._updated
+        self._updated = now
+        if self.requests_per_minute:
+            self._requests = min(self.requests_per_minute, self._requests + elapsed * self.requests_per_minute / 60.0)
+        if self.tokens_per_minute:
+            self._tokens = min(self.tokens_per_minute, self._tokens + elapsed * self.tokens_per_minute / 60.0)
+
+    def _try_acquire(self, tokens: int) -> float:
+        """Take a request and tokens if available; otherwise return the seconds to wait."""
+        with self._lock:
+            self._refill(time.monotonic())
+            # A single oversized prompt may use at most the whole bucket, never more
+            if self.tokens_per_minute:
+                tokens = min(tokens, self.tokens_per_minute)
+
+            wait = 0.0
+            if self.requests_per_minute and self._requests < 1:
+                wait = max(wait, (1 - self._requests) * 60.0 / self.requests_per_minute)
+            if self.tokens_per_minute and self._tokens < tokens:
+                wait = max(wait, (tokens - self._tokens) * 60.0 / self.tokens_per_minute)
+            if wait > 0:
+                self.total_wait_seconds += wait
+                return wait
+
+            if self.requests_per_minute:
+                self._requests -= 1
+            if self.tokens_per_minute:
+                self._tokens -= tokens
+            self.total_requests += 1
+            self.total_tokens += tokens
+            return 0.0
+
+    def acquire(self, tokens: int = 0) -> None:
+        """Block until one request and the given tokens fit in the budget."""
+        while True:
+            wait = self._try_acquire(tokens)
+            if wait <= 0:
+                return
+            time.sleep(wait)
+
+    async def acquire_async(self, tokens: int = 0) -> None:
+        """Wait without blocking the event loop until the request fits in the budget."""
+        while True:
+            wait = self._try_acquire(tokens)
+            if wait <= 0:
+                return
+            await asyncio.sleep(wait)
+
+    def reconcile(self, reserved: int, actual: int) -> None:
+        """Correct the token bucket once the actual usage of a reserved request is known."""
+        with self._lock:
+            if self.tokens_per_minute:
+                self._refill(time.monotonic())
+                # An over-estimate refunds tokens, but never past a full bucket
+                self._tokens = min(self.tokens_per_minute, self._tokens + reserved - actual)
+            self.total_tokens += actual - reserved
+
+    def record_usage(self, reserved: int, response: Any) -> None:
+        """Reconcile a reservation against a response's usage_metadata, if it has one."""
+        usage = getattr(response, "usage_metadata", None)
+        actual = getattr(usage, "total_token_count", None) if usage is not None else None
+        if actual:
+            self.reconcile(reserved, actual)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return cumulative usage and time spent waiting for budget."""
+        with self._lock:
+            return {
+                "total_requests": self.total_requests,
+                "total_tokens": self.total_tokens,
+                "total_wait_seconds": self.total_wait_seconds
+            }
+
+
+class _ReconcilingStream:
+    """
+    Streamed response that reconciles its reservation once fully consumed.
+
+    Streamed chunks carry cumulative usage, so the last one settles the
+    reservation. Other attributes pass through to the wrapped response.
+    """
+
+    def __init__(self, response: Any, limiter: TokenBucketRateLimiter, reserved: int):
+        self._response = response
+        self._limiter = limiter
+        self._reserved = reserved
+
+    def __iter__(self) -> Any:
+        last_chunk = None
+        for chunk in self._response:
+            last_chunk = chunk
+            yield chunk
+        self._limiter.record_usage(self._reserved, last_chunk)
+
+    async def __aiter__(self) -> Any:
+        last_chunk = None
+        async for chunk in self._response:
+            last_chunk = chunk
+            yield chunk
+        self._limiter.record_usage(self._reserved, last_chunk)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._response, name)
+
+
+def _settle(limiter: TokenBucketRateLimiter, reserved: int, response: Any, stream: bool) -> Any:
+    """Reconcile a finished call now, or a streamed one when its stream ends."""
+    if stream:
+        return _ReconcilingStream(response, limiter, reserved)
+    limiter.record_usage(reserved, response)
+    return response
+
+
+class RateLimitedChat:
+    """Chat session wrapper that reserves budget for every send_message."""
+
+    def __init__(self, chat: Any, limiter: TokenBucketRateLimiter):
+        self._chat = chat
+        self._limiter = limiter
+
+    def send_message(self, content: Any, *args: Any, **kwargs: Any) -> Any:
+        reserved = estimate_tokens(content)
+        self._limiter.acquire(reserved)
+        response = self._chat.send_message(content, *args, **kwargs)
+        return _settle(self._limiter, reserved, response, kwargs.get("stream"))
+
+    async def send_message_async(self, content: Any, *args: Any, **kwargs: Any) -> Any:
+        reserved = estimate_tokens(content)
+        await self._limiter.acquire_async(reserved)
+        response = await self._chat.send_message_async(content, *args, **kwargs)
+        return _settle(self._limiter, reserved, response, kwargs.get("stream"))
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._chat, name)
+
+
+class RateLimitedModel:
+    """
+    GenerativeModel wrapper that reserves budget before every generate call.
+
+    Attributes other than the generate/chat entry points pass through to the
+    wrapped model. Streamed calls are reconciled once the caller has
+    consumed the stream, since usage is only known then.
+    """
+
+    def __init__(self, model: Any, limiter: TokenBucketRateLimiter):
+        self._model = model
+        self._limiter = limiter
+
+    def generate_content(self, contents: Any, *args: Any, **kwargs: Any) -> Any:
+        reserved = estimate_tokens(contents)
+        self._limiter.acquire(reserved)
+        response = self._model.generate_content(contents, *args, **kwargs)
+        return _settle(self._limiter, reserved, response, kwargs.get("stream"))
+
+    async def generate_content_async(self, contents: Any, *args: Any, **kwargs: Any) -> Any:
+        reserved = estimate_tokens(contents)
+        await self._limiter.acquire_async(reserved)
+        response = await self._model.generate_content_async(contents, *args, **kwargs)
+        return _settle(self._limiter, reserved, response, kwargs.get("stream"))
+
+    def start_chat(self, *args: Any, **kwargs: Any) -> RateLimitedChat:
+        return RateLimitedChat(self._model.start_chat(*args, **kwargs), self._limiter)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._model, name)
+
+
+_rate_limiters: Dict[str, TokenBucketRateLimiter] = {}
+_rate_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(name: str = "gemini") -> TokenBucketRateLimiter:
+    """
+    Get the shared rate limiter for a backend, creating it on first use.
+
+    Budgets come from ``<NAME>_REQUESTS_PER_MINUTE`` and
+    ``<NAME>_TOKENS_PER_MINUTE`` (e.g. GEMINI_REQUESTS_PER_MINUTE).
+    """
+    with _rate_limiters_lock:
+        limiter = _rate_limiters.get(name)
+        if limiter is None:
+            limiter = TokenBucketRateLimiter(
+                requests_per_minute=float(os.getenv(f"{name.upper()}_REQUESTS_PER_MINUTE", 60)),
+                tokens_per_minute=float(os.getenv(f"{name.upper()}_TOKENS_PER_MINUTE", 1000000))
+            )
+            _rate_limiters[name] = limiter
+            logger.debug(
+                f"Created {name} rate limiter: {limiter.requests_per_minute} req/min, "
+                f"{limiter.tokens_per_minute} tokens/min"
+            )
+        return limiter
+
+
+def rate_limited(model: Any, name: str = "gemini") -> RateLimitedModel:
+    """Wrap a GenerativeModel so every call draws from the shared budget for `name`."""
+    if isinstance(model, RateLimitedModel):
+        return model
+    return RateLimitedModel(model, get_rate_limiter(name))
@@ -1,10 +1,11 @@
 """
 Retry utilities for handling transient failures.
 """
+import asyncio
 import time
 import logging
 from functools import wraps
-from typing import Callable, Any, Optional
+from typing import Awaitable, Callable, Any, Optional
 
 logger = logging.getLogger(__name__)
 
@@ -12,6 +13,7 @@ def retry_with_backoff(
     max_attempts: int = 3,
     initial_wait: float = 1.0,
     exponential_base: float = 2.0,
+    retry_on: Callable[[Exception], bool] = lambda e: True,
     logger: Optional[logging.Logger] = None
 ) -> Callable:
     """
@@ -21,6 +23,7 @@ def retry_with_backoff(
         max_attempts: Maximum number of retry attempts (default: 3)
         initial_wait: Initial wait time in seconds (default: 1.0)
         exponential_base: Base for exponential backoff (default: 2.0)
+        retry_on: Predicate deciding whether an exception is worth retrying
         logger: Optional logger instance for retry logging
     """
     if logger is None:
@@ -34,6 +37,8 @@ def retry_with_backoff(
                 try:
                     return func(*args, **kwargs)
                 except Exception as e:
+                    if not retry_on(e):
+                        raise
                     attempts += 1
                     if attempts == max_attempts:
                         logger.error(
@@ -50,3 +55,44 @@ def retry_with_backoff(
             return None
         return wrapper
     return decorator
+
+async def aretry_with_backoff(
+    call: Callable[[], Awaitable[Any]],
+    max_attempts: int = 3,
+    initial_wait: float = 1.0,
+    exponential_base: float = 2.0,
+    retry_on: Callable[[Exception], bool] = lambda e: True,
+    on_retry: Optional[Callable[[Exception], None]] = None,
+    logger: Optional[logging.Logger] = None
+) -> Any:
+    """
+    Await call() with exponential backoff between failed attempts.
+
+    Args:
+        call: Zero-argument coroutine function to (re)invoke
+        max_attempts: Maximum number of attempts (default: 3)
+        initial_wait: Initial wait time in seconds (default: 1.0)
+        exponential_base: Base for exponential backoff (default: 2.0)
+        retry_on: Predicate deciding whether an exception is worth retrying
+        on_retry: Optional callback invoked before each retry
+        logger: Optional logger instance for retry logging
+    """
+    if logger is None:
+        logger = logging.getLogger(__name__)
+
+    attempts = 0
+    while True:
+        try:
+            return await call()
+        except Exception as e:
+            attempts += 1
+            if attempts >= max_attempts or not retry_on(e):
+                raise
+            wait_time = initial_wait * (exponential_base ** (attempts - 1))
+            logger.warning(
+                f"Attempt {attempts} failed: {str(e)}. "
+                f"Retrying in {wait_time:.2f} seconds..."
+            )
+            if on_retry is not None:
+                on_retry(e)
+            await asyncio.sleep(wait_time)
@@ -0,0 +1,216 @@
+"""
+Semantic prompt cache using the LM Studio embedding model.
+"""
+import logging
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from langchain_core.caches import BaseCache
+from langchain_core.outputs import Generation
+
+from .http_transport import get_lmstudio_transport
+from .llm_cache import ResponseCache, get_response_cache
+
+logger = logging.getLogger(__name__)
+
+# Most query vectors kept between a miss and the update that follows it
+_PENDING_LIMIT = 256
+
+
+class _Namespace:
+    """Normalized prompt vectors and cached generations for one llm_string."""
+
+    def __init__(self):
+        self.vectors: Optional[np.ndarray] = None
+        self.values: List[Sequence[Generation]] = []
+
+
+class SemanticCache(BaseCache):
+    """
+    Embedding-similarity cache for prompts that differ only slightly.
+
+    Prompts are embedded through the local /v1/embeddings endpoint and kept,
+    L2-normalized, in one NumPy matrix per llm_string, so a lookup is a
+    single matrix-vector product. A cached completion is returned when the
+    best cosine similarity reaches the threshold. Only entries produced by
+    the same model settings (same llm_string) are ever matched.
+    """
+
+    def __init__(
+        self,
+        threshold: float = 0.95,
+        max_entries: int = 2000,
+        embedding_model: Optional[str] = None,
+        api_url: Optional[str] = None
+    ):
+        """
+        Initialize the semantic cache.
+
+        Args:
+            threshold: Minimum cosine similarity for a hit
+            max_entries: Maximum entries per llm_string; the oldest are dropped first
+            embedding_model: LM Studio embedding model (defaults to LMSTUDIO_MODEL_EMB)
+            api_url: LM Studio server root (defaults to LMSTUDIO_API_URL)
+        """
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.embedding_model = embedding_model or os.getenv(
+            "LMSTUDIO_MODEL_EMB", "text-embedding-nomic-embed-text-v1.5"
+        )
+        self.transport = get_lmstudio_transport(api_url)
+        self.hits = 0
+        self.misses = 0
+        self._namespaces: "OrderedDict[str, _Namespace]" = OrderedDict()
+        # Query vectors of recent misses, reused when update() stores the completion
+        self._pending: "OrderedDict[Tuple[str, str], np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _embed(self, text: str) -> Optional[np.ndarray]:
+        """Embed text and return a unit vector, or None if the endpoint fails."""
+        try:
+            response = self.transport.post(
+                "/v1/embeddings",
+                json={"model": self.embedding_model, "input": text}
+            )
+            response.raise_for_status()
+            vector = np.asarray(response.json()["data"][0]["embedding"], dtype=np.float32)
+        except Exception as e:
+            logger.warning(f"Embedding request failed, skipping semantic cache: {str(e)}")
+            return None
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm > 0 else None
+
+    def lookup(self, prompt: str, llm_string: str) -> Optional[Sequence[Generation]]:
+        with self._lock:
+            namespace = self._namespaces.get(llm_string)
+            if namespace is None or namespace.vectors is None:
+                self.misses += 1
+                return None
+
+        query = self._embed(prompt)
+
+        with self._lock:
+            if query is not None and namespace.vectors is not None and namespace.vectors.shape[1] == query.shape[0]:
+                similarities = namespace.vectors @ query
+                best = int(np.argmax(similarities))
+                if similarities[best] >= self.threshold:
+                    self.hits += 1
+                    logger.debug(f"Semantic cache hit (similarity {similarities[best]:.3f})")
+                    return namespace.values[best]
+            self.misses += 1
+            if query is not None:
+                # A miss is normally followed by update() for the same prompt; spare it a second embedding
+                self._pending[(prompt, llm_string)] = query
+                while len(self._pending) > _PENDING_LIMIT:
+                    self._pending.popitem(last=False)
+        return None
+
+    def update(self, prompt: str, llm_string: str, return_val: Sequence[Generation]) -> None:
+        with self._lock:
+            vector = self._pending.pop((prompt, llm_string), None)
+        if vector is None:
+            vector = self._embed(prompt)
+        if vector is None:
+            return
+        with self._lock:
+            namespace = self._namespaces.setdefault(llm_string, _Namespace())
+            if namespace.vectors is None or namespace.vectors.shape[1] != vector.shape[0]:
+                namespace.vectors = vector[np.newaxis, :]
+                namespace.values = [return_val]
+                return
+            namespace.vectors = np.vstack([namespace.vectors, vector])
+            namespace.values.append(return_val)
+            overflow = len(namespace.values) - self.max_entries
+            if overflow > 0:
+                namespace.vectors = namespace.vectors[overflow:]
+                namespace.values = namespace.values[overflow:]
+
+    def clear(self, **kwargs: Any) -> None:
+        with self._lock:
+            self._namespaces.clear()
+            self._pending.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss counters and current size."""
+        with self._lock:
+            entries = sum(len(ns.values) for ns in self._namespaces.values())
+            hits, misses = self.hits, self.misses
+        lookups = hits + misses
+        return {
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": hits / lookups if lookups else 0.0,
+            "entries": entries
+        }
+
+
+class TieredCache(BaseCache):
+    """Exact-match cache backed by a semantic tier that is consulted on exact misses."""
+
+    def __init__(self, exact: Optional[ResponseCache], semantic: SemanticCache):
+        self.exact = exact
+        self.semantic = semantic
+
+    def lookup(self, prompt: str, llm_string: str) -> Optional[Sequence[Generation]]:
+        if self.exact is not None:
+            cached = self.exact.lookup(prompt, llm_string)
+            if cached is not None:
+                return cached
+        return self.semantic.lookup(prompt, llm_string)
+
+    def update(self, prompt: str, llm_string: str, return_val: Sequence[Generation]) -> None:
+        if self.exact is not None:
+            self.exact.update(prompt, llm_string, return_val)
+        self.semantic.update(prompt, llm_string, return_val)
+
+    def clear(self, **kwargs: Any) -> None:
+        if self.exact is not None:
+            self.exact.clear(**kwargs)
+        self.semantic.clear(**kwargs)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "exact": self.exact.stats() if self.exact is not None else {},
+            "semantic": self.semantic.stats()
+        }
+
+
+_semantic_cache: Optional[SemanticCache] = None
+_semantic_cache_lock = threading.Lock()
+
+
+def get_semantic_cache() -> Optional[SemanticCache]:
+    """
+    Get the process-wide semantic cache, or None when it is disabled.
+
+    Configured from SEMANTIC_CACHE_ENABLED, SEMANTIC_CACHE_THRESHOLD,
+    SEMANTIC_CACHE_MAX_ENTRIES and LMSTUDIO_MODEL_EMB.
+    """
+    global _semantic_cache
+    if os.getenv("SEMANTIC_CACHE_ENABLED", "false").lower() != "true":
+        return None
+    with _semantic_cache_lock:
+        if _semantic_cache is None:
+            _semantic_cache = SemanticCache(
+                threshold=float(os.getenv("SEMANTIC_CACHE_THRESHOLD", 0.95)),
+                max_entries=int(os.getenv("SEMANTIC_CACHE_MAX_ENTRIES", 2000))
+            )
+            logger.info(f"Semantic cache enabled with model {_semantic_cache.embedding_model}")
+        return _semantic_cache
+
+
+def get_llm_cache() -> Optional[BaseCache]:
+    """
+    Get the cache LangChain LLMs should use.
+
+    Returns the exact-match response cache, wrapped in a TieredCache when the
+    semantic tier is enabled, or None when both are disabled.
+    """
+    exact = get_response_cache()
+    semantic = get_semantic_cache()
+    if semantic is None:
+        return exact
+    return TieredCache(exact, semantic)
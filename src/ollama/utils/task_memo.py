@@ -0,0 +1,172 @@
+"""
+Cross-run memoization of crew task outputs.
+"""
+import hashlib
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Union
+
+from .single_flight import request_key
+
+logger = logging.getLogger(__name__)
+
+_DURATION_UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400, "w": 604800}
+
+
+def parse_duration(value: Union[str, float, int, None]) -> Optional[float]:
+    """
+    Parse a freshness policy into seconds.
+
+    Accepts a number of seconds or "<n>s|m|h|d|w" (e.g. "24h"). "forever"
+    means no expiry (None); "never", "none" or 0 disable memoization (0.0).
+    """
+    if value is None:
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    text = str(value).strip().lower()
+    if text == "forever":
+        return None
+    if text in ("never", "none", "off", ""):
+        return 0.0
+    match = re.fullmatch(r"(\d+(?:\.\d+)?)\s*([smhdw]?)", text)
+    if not match:
+        raise ValueError(f"Invalid freshness policy: {value!r}")
+    return float(match.group(1)) * _DURATION_UNITS.get(match.group(2) or "s")
+
+
+def model_identity(llm: Any) -> Any:
+    """Identify the model behind an agent's LLM for memo keys."""
+    if llm is None:
+        return None
+    params = getattr(llm, "_identifying_params", None)
+    if isinstance(params, dict):
+        return params
+    return {
+        "type": type(llm).__name__,
+        "model": getattr(llm, "model", None) or getattr(llm, "model_name", None),
+        "temperature": getattr(llm, "temperature", None)
+    }
+
+
+def memo_key(task: Any, upstream_outputs: List[str]) -> str:
+    """
+    Content address of a task execution.
+
+    Covers the rendered description and expected output, the agent's role,
+    goal and backstory, the tool set, the model and the hashes of the
+    upstream outputs the task receives as context.
+    """
+    agent = getattr(task, "agent", None)
+    tools = getattr(task, "tools", None) or getattr(agent, "tools", None) or []
+    return request_key(
+        "task",
+        getattr(task, "description", None),
+        getattr(task, "expected_output", None),
+        getattr(agent, "role", None),
+        getattr(agent, "goal", None),
+        getattr(agent, "backstory", None),
+        sorted(getattr(tool, "name", type(tool).__name__) for tool in tools),
+        model_identity(getattr(agent, "llm", None)),
+        [hashlib.sha256(output.encode("utf-8")).hexdigest() for output in upstream_outputs]
+    )
+
+
+class TaskMemoStore:
+    """
+    SQLite store of task outputs keyed on memo_key.
+
+    Freshness is checked on lookup against the task's policy, so changing a
+    policy applies to outputs already stored. Tasks with a policy of 0 are
+    neither looked up nor stored.
+    """
+
+    def __init__(self, path: str = "./cache/task_memo.sqlite", default_max_age: Optional[float] = 86400.0):
+        """
+        Initialize the store.
+
+        Args:
+            path: SQLite file location
+            default_max_age: Freshness in seconds for tasks without a policy (None never expires)
+        """
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.default_max_age = default_max_age
+        self.hits = 0
+        self.misses = 0
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS task_outputs ("
+            "key TEXT PRIMARY KEY, task TEXT NOT NULL, output TEXT NOT NULL, created_at REAL NOT NULL)"
+        )
+        self._conn.commit()
+
+    def max_age(self, policy: Union[str, float, int, None]) -> Optional[float]:
+        """Freshness in seconds for a task's policy, falling back to the default."""
+        return self.default_max_age if policy is None else parse_duration(policy)
+
+    def get(self, key: str, max_age: Optional[float]) -> Optional[str]:
+        """Return the stored output if it is at most max_age seconds old."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT output, created_at FROM task_outputs WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or (max_age is not None and time.time() - row[1] > max_age):
+                self.misses += 1
+                return None
+            self.hits += 1
+            return row[0]
+
+    def put(self, key: str, task: str, output: str) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO task_outputs (key, task, output, created_at) VALUES (?, ?, ?, ?)",
+                (key, task, output, time.time())
+            )
+            self._conn.commit()
+
+    def clear(self, task: Optional[str] = None) -> None:
+        """Drop stored outputs of one task, or all of them."""
+        with self._lock:
+            if task is None:
+                self._conn.execute("DELETE FROM task_outputs")
+            else:
+                self._conn.execute("DELETE FROM task_outputs WHERE task = ?", (task,))
+            self._conn.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            (entries,) = self._conn.execute("SELECT COUNT(*) FROM task_outputs").fetchone()
+        return {"hits": self.hits, "misses": self.misses, "entries": entries}
+
+
+_task_memo: Optional[TaskMemoStore] = None
+_task_memo_lock = threading.Lock()
+
+
+def get_task_memo() -> Optional[TaskMemoStore]:
+    """
+    Get the process-wide task memo store, or None when memoization is disabled.
+
+    Configured from TASK_MEMO_ENABLED, CACHE_DIR and TASK_MEMO_TTL (the
+    freshness of tasks without their own policy, default 24h).
+    """
+    global _task_memo
+    if os.getenv("TASK_MEMO_ENABLED", "false").lower() != "true":
+        return None
+    with _task_memo_lock:
+        if _task_memo is None:
+            _task_memo = TaskMemoStore(
+                path=str(Path(os.getenv("CACHE_DIR", "./cache")) / "task_memo.sqlite"),
+                default_max_age=parse_duration(os.getenv("TASK_MEMO_TTL", "24h"))
+            )
+            logger.info(f"Task output memoization enabled at {_task_memo.path}")
+        return _task_memo
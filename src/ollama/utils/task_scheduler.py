@@ -0,0 +1,166 @@
+"""
+Dependency-aware parallel task scheduling.
+"""
+import contextvars
+import logging
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, Hashable, List, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+
+class TaskGraph:
+    """A DAG of named tasks, each listing the tasks it depends on."""
+
+    def __init__(self, dependencies: Dict[str, List[str]]):
+        """
+        Args:
+            dependencies: Task name -> names of the tasks it depends on, in declaration order
+
+        Raises:
+            ValueError: If a dependency is unknown or the graph has a cycle
+        """
+        self.dependencies = {name: list(dict.fromkeys(deps)) for name, deps in dependencies.items()}
+        self.dependents: Dict[str, List[str]] = {name: [] for name in self.dependencies}
+        for name, deps in self.dependencies.items():
+            for dep in deps:
+                if dep not in self.dependencies:
+                    raise ValueError(f"Task '{name}' depends on unknown task '{dep}'")
+                self.dependents[dep].append(name)
+        self.order = self._topological_order()
+
+    def _topological_order(self) -> List[str]:
+        remaining = {name: len(deps) for name, deps in self.dependencies.items()}
+        ready = [name for name, count in remaining.items() if count == 0]
+        order = []
+        while ready:
+            name = ready.pop(0)
+            order.append(name)
+            for dependent in self.dependents[name]:
+                remaining[dependent] -= 1
+                if remaining[dependent] == 0:
+                    ready.append(dependent)
+        if len(order) != len(self.dependencies):
+            cyclic = sorted(name for name, count in remaining.items() if count > 0)
+            raise ValueError(f"Task dependencies form a cycle among: {', '.join(cyclic)}")
+        return order
+
+    def sinks(self) -> List[str]:
+        """Tasks nothing depends on, in topological order."""
+        return [name for name in self.order if not self.dependents[name]]
+
+    def descendants(self, name: str) -> Set[str]:
+        """Every task that depends on `name`, directly or transitively."""
+        found: Set[str] = set()
+        stack = list(self.dependents[name])
+        while stack:
+            dependent = stack.pop()
+            if dependent not in found:
+                found.add(dependent)
+                stack.extend(self.dependents[dependent])
+        return found
+
+
+class DagScheduler:
+    """
+    Runs a TaskGraph on a thread pool, starting each task as soon as its dependencies finish.
+
+    A failed task skips everything downstream of it; independent branches
+    keep running. Each task runs in a copy of the caller's context, so
+    context variables such as the usage ledger's run id carry over. Tasks
+    sharing an exclusive key (e.g. the agent that runs them) are never
+    started while another task with that key is running.
+    """
+
+    def __init__(self, max_workers: int = 4):
+        self.max_workers = max(1, max_workers)
+
+    def run(
+        self,
+        graph: TaskGraph,
+        run_task: Callable[[str, Dict[str, Any]], Any],
+        completed: Optional[Dict[str, Any]] = None,
+        exclusive: Optional[Dict[str, Hashable]] = None
+    ) -> Dict[str, Any]:
+        """
+        Run every task in the graph.
+
+        Args:
+            graph: Tasks and their dependencies
+            run_task: Called with a task name and its dependencies' outputs (in declaration order)
+            completed: Outputs of tasks that already ran, e.g. restored from a checkpoint; they are not run again
+            exclusive: Task name -> key; tasks with the same key run one at a time
+
+        Returns:
+            Dict with "outputs", "errors" (name -> exception), "skipped" names
+            and "timings" (name -> start/end offsets and duration in seconds)
+        """
+        outputs: Dict[str, Any] = dict(completed or {})
+        errors: Dict[str, Exception] = {}
+        skipped: Set[str] = set()
+        timings: Dict[str, Dict[str, float]] = {}
+        waiting = {
+            name: {dep for dep in deps if dep not in outputs}
+            for name, deps in graph.dependencies.items() if name not in outputs
+        }
+        running: Dict[Future, str] = {}
+        exclusive = exclusive or {}
+        busy: Set[Hashable] = set()
+        lock = threading.Lock()
+        start = time.perf_counter()
+
+        def execute(name: str, inputs: Dict[str, Any]) -> Any:
+            began = time.perf_counter()
+            try:
+                return run_task(name, inputs)
+            finally:
+                ended = time.perf_counter()
+                with lock:
+                    timings[name] = {"start": began - start, "end": ended - start, "duration": ended - began}
+
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="crew-task") as executor:
+            def submit_ready() -> None:
+                for name in graph.order:
+                    if name in waiting and not waiting[name]:
+                        key = exclusive.get(name)
+                        if key is not None:
+                            if key in busy:
+                                continue
+                            busy.add(key)
+                        del waiting[name]
+                        inputs = {dep: outputs[dep] for dep in graph.dependencies[name]}
+                        future = executor.submit(contextvars.copy_context().run, execute, name, inputs)
+                        running[future] = name
+                        logger.info(f"Started task '{name}'")
+
+            submit_ready()
+            while running:
+                done, _ = wait(list(running), return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    busy.discard(exclusive.get(name))
+                    try:
+                        outputs[name] = future.result()
+                    except Exception as e:
+                        errors[name] = e
+                        downstream = graph.descendants(name)
+                        skipped.update(downstream)
+                        for dependent in downstream:
+                            waiting.pop(dependent, None)
+                        logger.error(f"Task '{name}' failed: {e}; skipping {len(downstream)} dependent task(s)")
+                        continue
+                    logger.info(f"Finished task '{name}' in {timings[name]['duration']:.2f}s")
+                    for dependent in graph.dependents[name]:
+                        if dependent in waiting:
+                            waiting[dependent].discard(name)
+                submit_ready()
+
+        return {
+            "outputs": outputs,
+            "errors": errors,
+            "skipped": [name for name in graph.order if name in skipped],
+            "timings": timings,
+            "total_time": time.perf_counter() - start
+        }
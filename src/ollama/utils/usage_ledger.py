@@ -0,0 +1,176 @@
+"""
+Per-run token and latency ledger attributed to agent, task, crew run and backend.
+"""
+import contextvars
+import logging
+import re
+import threading
+import time
+import uuid
+from collections import defaultdict
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+_current_run: contextvars.ContextVar = contextvars.ContextVar("usage_run", default=None)
+_current_attribution: contextvars.ContextVar = contextvars.ContextVar("usage_attribution", default=None)
+
+
+@dataclass
+class UsageRecord:
+    """Token usage and latency of one model request."""
+    backend: str
+    model: str
+    prompt_tokens: int
+    completion_tokens: int
+    total_tokens: int
+    latency: float
+    run_id: Optional[str] = None
+    agent: Optional[str] = None
+    task: Optional[str] = None
+    timestamp: float = field(default_factory=time.time)
+
+
+def _aggregate(records: List[UsageRecord]) -> Dict[str, Any]:
+    prompt = sum(r.prompt_tokens for r in records)
+    completion = sum(r.completion_tokens for r in records)
+    latency = sum(r.latency for r in records)
+    return {
+        "requests": len(records),
+        "prompt_tokens": prompt,
+        "completion_tokens": completion,
+        "total_tokens": sum(r.total_tokens for r in records),
+        "latency": latency,
+        "tokens_per_second": completion / latency if latency > 0 else None
+    }
+
+
+class UsageLedger:
+    """
+    Collects a UsageRecord for every model request.
+
+    Records are attributed to the crew run, agent and task in effect when the
+    request is made (set with ``run()`` and ``attribute()``). Requests made
+    outside an explicit attribution, e.g. by an LLM that CrewAI calls on an
+    agent's behalf, stay pending until ``close_task()`` assigns them to the
+    task that just finished, which is exact for sequential crews.
+
+    Attribution lives in context variables, so overlapping runs in different
+    threads stay apart. Threads don't inherit context variables: work handed
+    to a thread pool must run in the caller's context, e.g. via
+    ``contextvars.copy_context().run``, or its requests are unattributed.
+    """
+
+    def __init__(self):
+        self._records: List[UsageRecord] = []
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def run(self, run_id: Optional[str] = None) -> Iterator[str]:
+        """Attribute requests made inside the block to a crew run."""
+        run_id = run_id or uuid.uuid4().hex
+        token = _current_run.set(run_id)
+        try:
+            yield run_id
+        finally:
+            _current_run.reset(token)
+
+    @contextmanager
+    def attribute(self, agent: Optional[str] = None, task: Optional[str] = None) -> Iterator[None]:
+        """Attribute requests made inside the block to an agent and task."""
+        token = _current_attribution.set((agent, task))
+        try:
+            yield
+        finally:
+            _current_attribution.reset(token)
+
+    def current_run(self) -> Optional[str]:
+        """Run id in effect for the caller, if any."""
+        return _current_run.get()
+
+    def record(
+        self,
+        backend: str,
+        model: str,
+        prompt_tokens: Optional[int],
+        completion_tokens: Optional[int],
+        total_tokens: Optional[int] = None,
+        latency: float = 0.0
+    ) -> UsageRecord:
+        """Add one request to the ledger."""
+        prompt_tokens = prompt_tokens or 0
+        completion_tokens = completion_tokens or 0
+        agent, task = _current_attribution.get() or (None, None)
+        record = UsageRecord(
+            backend=backend,
+            model=model,
+            prompt_tokens=prompt_tokens,
+            completion_tokens=completion_tokens,
+            total_tokens=total_tokens or prompt_tokens + completion_tokens,
+            latency=latency,
+            run_id=self.current_run(),
+            agent=agent,
+            task=task
+        )
+        with self._lock:
+            self._records.append(record)
+        return record
+
+    def close_task(self, agent: Optional[str], task: Optional[str], run_id: Optional[str] = None) -> None:
+        """Assign the run's pending records to the task that just finished."""
+        run_id = run_id or self.current_run()
+        with self._lock:
+            for record in self._records:
+                if record.run_id == run_id and record.task is None and record.agent is None:
+                    record.agent = agent
+                    record.task = task
+
+    def records(self, run_id: Optional[str] = None) -> List[UsageRecord]:
+        with self._lock:
+            return [r for r in self._records if run_id is None or r.run_id == run_id]
+
+    def summary(self, run_id: Optional[str] = None) -> Dict[str, Any]:
+        """Totals plus breakdowns by agent, task and backend for one run (or all runs)."""
+        records = self.records(run_id)
+        summary = {"run_id": run_id, "totals": _aggregate(records)}
+        for key in ("agent", "task", "backend"):
+            groups: Dict[str, List[UsageRecord]] = defaultdict(list)
+            for record in records:
+                groups[getattr(record, key) or "unattributed"].append(record)
+            summary[f"by_{key}"] = {name: _aggregate(group) for name, group in groups.items()}
+        return summary
+
+    def export(self, run_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Raw records as dicts, e.g. for an artifact."""
+        return [asdict(r) for r in self.records(run_id)]
+
+    def clear(self, run_id: Optional[str] = None) -> None:
+        with self._lock:
+            self._records = [r for r in self._records if run_id is not None and r.run_id != run_id]
+
+
+def usage_metrics(summary: Dict[str, Any]) -> Dict[str, float]:
+    """Flatten a ledger summary into metric names, e.g. usage_total_tokens, usage_task_<name>_total_tokens."""
+    metrics = {
+        f"usage_{key}": float(value)
+        for key, value in summary.get("totals", {}).items()
+        if isinstance(value, (int, float))
+    }
+    for group in ("agent", "task", "backend"):
+        for name, totals in summary.get(f"by_{group}", {}).items():
+            # Metric names allow letters, digits, "_", "-", "." and "/"
+            safe_name = re.sub(r"[^\w\-./]+", "_", name)[:100]
+            for key in ("total_tokens", "tokens_per_second"):
+                if totals.get(key) is not None:
+                    metrics[f"usage_{group}_{safe_name}_{key}"] = float(totals[key])
+    return metrics
+
+
+_usage_ledger = UsageLedger()
+
+
+def get_usage_ledger() -> UsageLedger:
+    """Get the process-wide usage ledger."""
+    return _usage_ledger
@@ -0,0 +1,39 @@
+import pytest
+
+
+class FakeClock:
+    """Stands in for the time module in code under test; advance() moves both clocks."""
+
+    def __init__(self, start: float = 1_000_000.0):
+        self.now = start
+        self.sleeps = []
+
+    def time(self) -> float:
+        return self.now
+
+    def monotonic(self) -> float:
+        return self.now
+
+    def perf_counter(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+    def advance(self, seconds: float) -> None:
+        self.now += seconds
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture(scope="session")
+def mock_lmstudio():
+    """OpenAI-compatible mock server with no latency or injected faults."""
+    from src.ollama.utils.mock_server import PROFILES, MockServerThread
+
+    with MockServerThread(PROFILES["instant"]) as server:
+        yield server
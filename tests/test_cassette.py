@@ -0,0 +1,125 @@
+import asyncio
+
+import pytest
+
+from src.ollama.tools import search_tools
+from src.ollama.utils import cassette as cassette_module
+from src.ollama.utils import retry_utils
+from src.ollama.utils.cassette import Cassette, CassetteMissError
+
+
+@pytest.fixture
+def cassette_path(tmp_path):
+    return str(tmp_path / "cassettes" / "run.jsonl")
+
+
+def record(path, calls):
+    recorder = Cassette("record", path)
+    for request, response in calls:
+        assert recorder.call("gemini", request, lambda response=response: response) == response
+    return recorder
+
+
+def test_off_mode_always_runs_live(cassette_path):
+    cassette = Cassette("off", cassette_path)
+
+    assert cassette.call("gemini", {"prompt": "hi"}, lambda: "live") == "live"
+    assert not cassette.enabled
+
+
+def test_replay_serves_recorded_responses_in_order(cassette_path):
+    recorder = record(cassette_path, [({"prompt": "hi"}, "first"), ({"prompt": "hi"}, "second"),
+                                      ({"prompt": "bye"}, {"text": "ciao"})])
+    assert recorder.stats()["recorded"] == {"gemini": 3}
+
+    player = Cassette("replay", cassette_path, latency="none")
+
+    def live():
+        raise AssertionError("replay must not run the live call")
+
+    assert player.call("gemini", {"prompt": "hi"}, live) == "first"
+    assert player.call("gemini", {"prompt": "bye"}, live) == {"text": "ciao"}
+    assert player.call("gemini", {"prompt": "hi"}, live) == "second"
+    # A key that ran out keeps serving its last response
+    assert player.call("gemini", {"prompt": "hi"}, live) == "second"
+    assert player.stats()["hits"] == {"gemini": 4}
+
+
+def test_replay_of_unrecorded_request_raises(cassette_path):
+    record(cassette_path, [({"prompt": "hi"}, "first")])
+    player = Cassette("replay", cassette_path, latency="none")
+
+    with pytest.raises(CassetteMissError):
+        player.call("gemini", {"prompt": "other"}, lambda: "live")
+    with pytest.raises(CassetteMissError):
+        player.call("serper", {"prompt": "hi"}, lambda: "live")
+    assert player.stats()["misses"] == {"gemini": 1, "serper": 1}
+
+
+def test_failed_calls_are_not_recorded(cassette_path):
+    recorder = Cassette("record", cassette_path)
+
+    def fail():
+        raise RuntimeError("down")
+
+    with pytest.raises(RuntimeError):
+        recorder.call("gemini", {"prompt": "hi"}, fail)
+    assert recorder.stats()["recorded"] == {}
+
+
+def test_custom_serialization_round_trips(cassette_path):
+    class Reply:
+        def __init__(self, text):
+            self.text = text
+
+    recorder = Cassette("record", cassette_path)
+    recorder.call("gemini", "hi", lambda: Reply("hello"), serialize=lambda reply: {"text": reply.text})
+
+    player = Cassette("replay", cassette_path, latency="none")
+    replayed = player.call("gemini", "hi", lambda: None, deserialize=lambda value: Reply(value["text"]))
+    assert replayed.text == "hello"
+
+
+def test_replay_delay_follows_latency_settings(cassette_path, clock, monkeypatch):
+    monkeypatch.setattr(cassette_module, "time", clock)
+    recorder = Cassette("record", cassette_path)
+    recorder.call("gemini", "hi", lambda: clock.advance(2.0) or "slow")
+
+    Cassette("replay", cassette_path, latency="recorded", latency_scale=0.5).call("gemini", "hi", lambda: None)
+    Cassette("replay", cassette_path, latency="0.25").call("gemini", "hi", lambda: None)
+    Cassette("replay", cassette_path, latency="none").call("gemini", "hi", lambda: None)
+
+    assert clock.sleeps == [1.0, 0.25, 0.0]
+
+
+def test_async_record_and_replay(cassette_path):
+    async def live():
+        return "async reply"
+
+    async def replay_must_not_run():
+        raise AssertionError("replay must not run the live call")
+
+    recorder = Cassette("record", cassette_path)
+    assert asyncio.run(recorder.acall("gemini", "hi", live)) == "async reply"
+
+    player = Cassette("replay", cassette_path, latency="none")
+    assert asyncio.run(player.acall("gemini", "hi", replay_must_not_run)) == "async reply"
+
+
+def test_unknown_mode_is_rejected(cassette_path):
+    with pytest.raises(ValueError):
+        Cassette("rewind", cassette_path)
+
+
+def test_search_replay_miss_is_raised_without_retrying(cassette_path, clock, monkeypatch):
+    record(cassette_path, [])
+    player = Cassette("replay", cassette_path, latency="none")
+    monkeypatch.setattr(search_tools, "get_cassette", lambda: player)
+    monkeypatch.setattr(retry_utils, "time", clock)
+    monkeypatch.delenv("SERPER_API_KEY", raising=False)
+    monkeypatch.delenv("MLFLOW_TRACKING_URI", raising=False)
+
+    with pytest.raises(CassetteMissError):
+        search_tools.SerperSearchTool().search("unrecorded query")
+    assert player.stats()["misses"] == {"serper": 1}
+    assert clock.sleeps == []
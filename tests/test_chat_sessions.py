@@ -0,0 +1,179 @@
+from types import SimpleNamespace
+
+import pytest
+
+from src.ollama.utils.chat_sessions import (
+    ChatSession,
+    ChatSessionManager,
+    GeminiChatSession,
+    to_gemini_history,
+)
+
+
+class FakeBackend:
+    """Records what each session sends; replies and summaries are numbered."""
+
+    def __init__(self):
+        self.sent = []
+        self.summary_prompts = []
+
+    def complete(self, messages):
+        self.sent.append([dict(m) for m in messages])
+        return f"reply {len(self.sent)}"
+
+    def summarize(self, prompt):
+        self.summary_prompts.append(prompt)
+        return f" summary {len(self.summary_prompts)} "
+
+
+def make_session(backend, token_budget=60, keep_recent=2):
+    return ChatSession("conv", backend.complete, backend.summarize, token_budget=token_budget, keep_recent=keep_recent)
+
+
+def test_history_is_sent_verbatim_under_budget():
+    backend = FakeBackend()
+    session = make_session(backend, token_budget=10_000)
+
+    assert session.send("Hi") == "reply 1"
+    session.send("How are you?")
+
+    assert backend.sent[-1] == [
+        {"role": "user", "content": "Hi"},
+        {"role": "assistant", "content": "reply 1"},
+        {"role": "user", "content": "How are you?"},
+    ]
+    assert session.compactions == 0
+
+
+def test_older_turns_are_folded_into_the_summary_at_the_budget():
+    backend = FakeBackend()
+    session = make_session(backend)
+    session.seed([{"role": "system", "content": "Be brief"}])
+
+    for turn in range(4):
+        session.send(f"question {turn} " + "words " * 20)
+
+    assert session.compactions >= 1
+    assert len(session.history) <= session.keep_recent + 1
+    assert session.history[0]["role"] == "user"
+    sent = backend.sent[-1]
+    assert sent[0] == {"role": "system", "content": "Be brief"}
+    assert sent[1]["role"] == "system"
+    assert sent[1]["content"].endswith(session.summary)
+    assert sent[-1]["content"].startswith("question 3")
+    # The folded turns went to the summarizer, not to the chat request
+    assert "question 0" in backend.summary_prompts[0]
+    assert not any("question 0" in m["content"] for m in sent)
+
+
+def test_each_compaction_carries_the_previous_summary_forward():
+    backend = FakeBackend()
+    session = make_session(backend)
+
+    for turn in range(8):
+        session.send(f"question {turn} " + "words " * 20)
+
+    assert session.compactions >= 2
+    assert "Current summary:\n(none)" in backend.summary_prompts[0]
+    for previous, prompt in enumerate(backend.summary_prompts[1:], start=1):
+        assert f"Current summary:\nsummary {previous}\n" in prompt
+    assert session.summary == f"summary {len(backend.summary_prompts)}"
+
+
+def test_failed_reply_leaves_history_unchanged():
+    session = ChatSession("conv", complete=lambda messages: 1 / 0, summarize=str, token_budget=1000)
+
+    with pytest.raises(ZeroDivisionError):
+        session.send("Hi")
+
+    assert session.history == []
+
+
+class FakeChat:
+    def __init__(self, history):
+        self.history = history
+        self.sent = []
+
+    def send_message(self, content):
+        self.sent.append(content)
+        return SimpleNamespace(text=f"gemini reply {len(self.sent)}")
+
+
+class FakeGeminiModel:
+    def __init__(self):
+        self.chats = []
+
+    def start_chat(self, history):
+        chat = FakeChat(history)
+        self.chats.append(chat)
+        return chat
+
+    def generate_content(self, prompt):
+        return SimpleNamespace(text="gemini summary")
+
+
+def test_gemini_session_reuses_its_chat_until_compaction():
+    model = FakeGeminiModel()
+    session = GeminiChatSession("conv", model, token_budget=10_000)
+    session.seed([{"role": "system", "content": "Be brief"}, {"role": "user", "content": "Earlier"}])
+
+    session.send("First")
+    session.send("Second")
+
+    assert len(model.chats) == 1
+    chat = model.chats[0]
+    assert chat.history == to_gemini_history([{"role": "system", "content": "Be brief"}, {"role": "user", "content": "Earlier"}])
+    assert chat.sent == ["First", "Second"]
+
+    session.token_budget = 60
+    session.send("Third " + "words " * 40)
+
+    assert session.compactions == 1
+    assert len(model.chats) == 2
+    rebuilt = model.chats[1].history
+    assert rebuilt[0]["parts"][0].endswith("Summary of the earlier conversation:\ngemini summary")
+    assert model.chats[1].sent == [session.history[-2]["content"]]
+
+
+def test_manager_reuses_sessions_per_conversation_id():
+    backend = FakeBackend()
+    manager = ChatSessionManager(lambda conversation_id: make_session(backend, token_budget=10_000), max_sessions=2)
+
+    manager.chat("a", [{"role": "system", "content": "Be brief"}, {"role": "user", "content": "Hi"}])
+    # Later calls resend the whole conversation; only the last message is new
+    manager.chat("a", [
+        {"role": "system", "content": "Be brief"},
+        {"role": "user", "content": "Hi"},
+        {"role": "assistant", "content": "reply 1"},
+        {"role": "user", "content": "More"},
+    ])
+
+    session = manager.get_session("a")
+    assert [m["content"] for m in session.history] == ["Hi", "reply 1", "More", "reply 2"]
+    assert backend.sent[-1] == session.messages()[:-1]
+
+
+def test_manager_evicts_the_least_recently_used_session():
+    manager = ChatSessionManager(lambda conversation_id: make_session(FakeBackend()), max_sessions=2)
+    first = manager.get_session("a")
+    manager.get_session("b")
+    manager.get_session("a")
+    manager.get_session("c")
+
+    assert list(manager._sessions) == ["a", "c"]
+    assert manager.get_session("a") is first
+
+
+def test_chat_without_conversation_id_uses_a_throwaway_session():
+    created = []
+
+    def factory(conversation_id):
+        created.append(conversation_id)
+        return make_session(FakeBackend(), token_budget=10_000)
+
+    manager = ChatSessionManager(factory)
+
+    assert manager.chat(None, [{"role": "user", "content": "Hi"}]) == "reply 1"
+    assert manager.chat(None, [{"role": "user", "content": "Hi"}]) == "reply 1"
+    assert created == ["", ""]
+    assert not manager._sessions
@@ -0,0 +1,96 @@
+import pytest
+from crewai import Task
+from crewai.crews.crew_output import CrewOutput
+
+from src.ollama.utils.checkpoints import (
+    CheckpointStore,
+    CrewCheckpointer,
+    link_sequential_context,
+    restored_crew_output,
+    unlink_context,
+)
+
+
+def make_tasks(*names):
+    return {name: Task(description=f"Do {name}", expected_output=f"{name} done") for name in names}
+
+
+def test_store_round_trips_a_run(tmp_path):
+    store = CheckpointStore(str(tmp_path))
+    store.start("run-1", {"topic": "AI"})
+    store.save_task("run-1", "research", "findings")
+    store.finish("run-1", "failed", "boom")
+
+    checkpoint = CheckpointStore(str(tmp_path)).load("run-1")
+    assert checkpoint["metadata"] == {"topic": "AI"}
+    assert checkpoint["tasks"]["research"]["output"] == "findings"
+    assert (checkpoint["status"], checkpoint["error"], checkpoint["attempts"]) == ("failed", "boom", 1)
+
+    store.start("run-1")
+    checkpoint = store.load("run-1")
+    assert (checkpoint["status"], checkpoint["attempts"]) == ("running", 2)
+    assert "error" not in checkpoint
+    assert store.runs() == [{"run_id": "run-1", "status": "running", "attempts": 2, "tasks": ["research"]}]
+
+
+def test_unknown_run_raises_key_error(tmp_path):
+    store = CheckpointStore(str(tmp_path))
+
+    with pytest.raises(KeyError):
+        store.load("missing")
+    with pytest.raises(KeyError):
+        store.save_task("missing", "research", "findings")
+
+
+def test_restore_rehydrates_finished_tasks_and_returns_the_rest(tmp_path):
+    store = CheckpointStore(str(tmp_path))
+    tasks = make_tasks("research", "summarize", "report")
+    checkpointer = CrewCheckpointer("run-1", tasks, store)
+    store.start("run-1")
+    checkpointer.save("research", "findings")
+
+    pending = checkpointer.restore(list(tasks))
+
+    assert pending == [tasks["summarize"], tasks["report"]]
+    assert tasks["research"].output.raw == "findings"
+    assert tasks["report"].context == [tasks["research"], tasks["summarize"]]
+
+
+def test_changed_task_is_not_restored(tmp_path):
+    store = CheckpointStore(str(tmp_path))
+    store.start("run-1")
+    CrewCheckpointer("run-1", make_tasks("research"), store).save("research", "findings")
+
+    changed = {"research": Task(description="Do other research", expected_output="done")}
+    assert CrewCheckpointer("run-1", changed, store).restore(["research"]) == [changed["research"]]
+    assert changed["research"].output is None
+
+
+def test_unlink_context_puts_back_the_contexts_as_built():
+    tasks = list(make_tasks("research", "summarize", "report").values())
+    explicit = [tasks[0]]
+    tasks[2].context = explicit
+    original = tasks[1].context
+
+    links = link_sequential_context(tasks)
+    assert tasks[1].context == [tasks[0]]
+    assert tasks[2].context is explicit
+
+    unlink_context(links)
+    assert tasks[1].context is original
+    assert tasks[2].context is explicit
+
+
+def test_restored_crew_output_matches_what_kickoff_returns(tmp_path):
+    store = CheckpointStore(str(tmp_path))
+    tasks = make_tasks("research", "report")
+    checkpointer = CrewCheckpointer("run-1", tasks, store)
+    store.start("run-1")
+    checkpointer.save("research", "findings")
+    checkpointer.save("report", "final report")
+    assert checkpointer.restore(list(tasks)) == []
+
+    output = restored_crew_output(list(tasks.values()))
+    assert isinstance(output, CrewOutput)
+    assert output.raw == "final report"
+    assert [task.raw for task in output.tasks_output] == ["findings", "final report"]
@@ -0,0 +1,66 @@
+import os
+
+import pytest
+
+from src.ollama.config import loader
+from src.ollama.config.loader import CompiledTemplate, ConfigCache, compile_template
+
+VALUES = {"topic": "AI", "depth": 3, "n": 6, "items": ["a", "b"], "ratio": 0.25}
+
+
+@pytest.mark.parametrize("text", [
+    "plain text",
+    "escaped {{braces}} only",
+    "{topic} at depth {depth}",
+    "{topic!r} and {depth:03d}",
+    "{ratio:.1%} of {items[1]}",
+    "{topic:>{n}}|",
+    "{depth:{n}.{depth}f}",
+])
+def test_render_matches_str_format(text):
+    assert CompiledTemplate(text).render(VALUES) == text.format(**VALUES)
+
+
+def test_missing_placeholder_raises_key_error_like_str_format():
+    with pytest.raises(KeyError):
+        CompiledTemplate("{missing}").render(VALUES)
+
+
+def test_malformed_template_fails_on_render_like_str_format():
+    template = CompiledTemplate("unbalanced {topic")
+    with pytest.raises(ValueError):
+        template.render(VALUES)
+
+
+def test_default_placeholders_fall_back_to_their_text():
+    template = CompiledTemplate("{topic|general} in {year|2024: the present}")
+
+    assert template.render({}) == "general in 2024: the present"
+    assert template.render({"topic": "AI", "year": 2030}) == "AI in 2030"
+
+
+def test_compile_template_reuses_the_compiled_template():
+    assert compile_template("{topic}") is compile_template("{topic}")
+
+
+def test_config_cache_rereads_a_file_only_after_it_changes(tmp_path):
+    path = tmp_path / "agents.yaml"
+    path.write_text("a: 1\n", encoding="utf-8")
+    cache = ConfigCache(tmp_path)
+
+    assert cache.load("agents.yaml") == {"a": 1}
+    assert cache.load("agents.yaml") == {"a": 1}
+    assert cache.stats() == {"files": 1, "loads": 1, "hits": 1}
+
+    path.write_text("a: 22\n", encoding="utf-8")
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+    assert cache.load("agents.yaml") == {"a": 22}
+    assert cache.stats()["loads"] == 2
+
+
+def test_missing_config_file(tmp_path, monkeypatch):
+    monkeypatch.setattr(loader, "_config_cache", ConfigCache(tmp_path))
+
+    assert ConfigCache(tmp_path).load("missing.yaml") is None
+    assert loader.load_config("missing.yaml") == {}
@@ -0,0 +1,90 @@
+import pytest
+
+from src.ollama.utils.context_budget import (
+    TRUNCATION_MARKER,
+    ContextBudget,
+    get_context_budget,
+)
+from src.ollama.utils.rate_limiter import estimate_tokens
+
+
+def make_budget(prompt_budget=100):
+    return ContextBudget(context_size=prompt_budget + 50, max_tokens=50, reserve_tokens=0)
+
+
+def test_prompt_budget_never_goes_negative():
+    assert ContextBudget(context_size=100, max_tokens=200).prompt_budget == 0
+    assert ContextBudget(context_size=4096, max_tokens=2048, reserve_tokens=64).prompt_budget == 1984
+
+
+def test_prompt_within_budget_is_unchanged():
+    prompt = "x" * 100
+
+    assert make_budget().fit_prompt(prompt) is prompt
+
+
+def test_long_prompt_keeps_its_head_and_latest_context():
+    prompt = "INSTRUCTIONS " + "old " * 500 + "LATEST QUESTION"
+    budget = make_budget()
+
+    fitted = budget.fit_prompt(prompt)
+
+    assert estimate_tokens(fitted) <= budget.prompt_budget
+    assert fitted.startswith("INSTRUCTIONS")
+    assert fitted.endswith("LATEST QUESTION")
+    assert TRUNCATION_MARKER in fitted
+
+
+def test_budget_too_small_for_any_prompt_is_refused():
+    no_room = ContextBudget(context_size=4096, max_tokens=4096)
+
+    with pytest.raises(ValueError, match="max_tokens=4096"):
+        no_room.fit_prompt("Summarize the findings")
+    with pytest.raises(ValueError):
+        make_budget().fit_prompt("x" * 1000, budget=5)
+    with pytest.raises(ValueError):
+        no_room.fit_messages([{"role": "system", "content": "Be brief"}, {"role": "user", "content": "Hi"}])
+
+
+def test_messages_within_budget_are_unchanged():
+    messages = [{"role": "user", "content": "Hi"}]
+
+    assert make_budget().fit_messages(messages) is messages
+
+
+def test_oldest_non_system_messages_are_dropped_first():
+    system = {"role": "system", "content": "Be brief. " * 5}
+    history = [{"role": "user" if i % 2 else "assistant", "content": f"turn {i} " * 20} for i in range(6)]
+    latest = {"role": "user", "content": "And now?"}
+    budget = make_budget()
+
+    fitted = budget.fit_messages([system, *history, latest])
+
+    assert budget.count_messages(fitted) <= budget.prompt_budget
+    assert fitted[0] == system
+    assert fitted[-1] == latest
+    kept = len(fitted) - 2
+    assert 0 < kept < len(history)
+    assert fitted[1:-1] == history[len(history) - kept:]
+
+
+def test_oversized_latest_message_is_trimmed_in_a_copy():
+    latest = {"role": "user", "content": "START " + "filler " * 400 + "END"}
+    budget = make_budget()
+
+    fitted = budget.fit_messages([{"role": "user", "content": "earlier"}, latest])
+
+    assert len(fitted) == 1
+    assert budget.count_messages(fitted) <= budget.prompt_budget
+    assert fitted[0]["content"].endswith("END")
+    assert latest["content"].count("filler") == 400
+
+
+def test_backend_budgets_come_from_the_environment(monkeypatch):
+    monkeypatch.setenv("LMSTUDIO_CONTEXT_SIZE", "8192")
+    monkeypatch.setenv("LMSTUDIO_MAX_TOKENS", "1024")
+
+    assert get_context_budget("lmstudio").prompt_budget == 8192 - 1024 - 64
+    assert get_context_budget("lmstudio", max_tokens=4096).max_tokens == 4096
+    with pytest.raises(ValueError):
+        get_context_budget("ollama")
@@ -0,0 +1,107 @@
+from types import SimpleNamespace
+
+import pytest
+
+from src.ollama import multi_gemini_crew
+from src.ollama.multi_gemini_crew import GeminiChatLLM
+
+
+def chunk(text, completion_tokens=None):
+    """A streamed Gemini chunk; only the last one reports usage."""
+    part = SimpleNamespace(text=text)
+    candidate = SimpleNamespace(finish_reason="STOP", content=SimpleNamespace(parts=[part]))
+    raw = SimpleNamespace(prompt_feedback=SimpleNamespace(block_reason=None), candidates=[candidate])
+    if completion_tokens is not None:
+        raw.usage_metadata = SimpleNamespace(
+            prompt_token_count=10,
+            candidates_token_count=completion_tokens,
+            total_token_count=10 + completion_tokens,
+        )
+    return raw
+
+
+class FakeModel:
+    """Streams each prompt's chunks, advancing the clock before every chunk."""
+
+    def __init__(self, clock, replies):
+        self.clock = clock
+        self.replies = replies
+
+    def generate_content(self, prompt, generation_config=None, stream=False):
+        assert stream
+
+        def chunks():
+            for delay, raw in self.replies[prompt]:
+                self.clock.advance(delay)
+                yield raw
+
+        return chunks()
+
+
+class RecordingRunManager:
+    def __init__(self):
+        self.tokens = []
+
+    def on_llm_new_token(self, token, chunk=None):
+        self.tokens.append(token)
+
+
+@pytest.fixture
+def make_llm(clock, monkeypatch):
+    monkeypatch.setattr(multi_gemini_crew, "time", clock)
+    monkeypatch.setenv("GEMINI_API_KEY", "test-key")
+
+    def make(replies, **kwargs):
+        model = FakeModel(clock, replies)
+        registry = SimpleNamespace(configure=lambda api_key: None, get_model=lambda *args, **kwargs: model)
+        monkeypatch.setattr(multi_gemini_crew, "get_client_registry", lambda: registry)
+        return GeminiChatLLM(streaming=True, coalesce_requests=False, cache=False, **kwargs)
+
+    return make
+
+
+REPLIES = {
+    "first": [(0.5, chunk("Hello")), (0.25, chunk(" there")), (0.25, chunk("", completion_tokens=4))],
+    "second": [(1.0, chunk("Bye")), (1.0, chunk("", completion_tokens=2))],
+}
+
+
+def test_stream_forwards_tokens_and_reports_metrics(make_llm):
+    llm = make_llm(REPLIES)
+    run_manager = RecordingRunManager()
+
+    chunks = list(llm._stream("first", run_manager=run_manager))
+
+    assert run_manager.tokens == ["Hello", " there"]
+    assert [c.text for c in chunks] == ["Hello", " there", ""]
+    info = chunks[-1].generation_info
+    assert info["token_usage"]["candidates_token_count"] == 4
+    assert info["stream_metrics"] == {
+        "time_to_first_token": 0.5,
+        "total_time": 1.0,
+        "completion_tokens": 4,
+        "tokens_per_second": 8.0,
+    }
+
+
+def test_stream_estimates_tokens_when_usage_is_missing(make_llm):
+    llm = make_llm({"quiet": [(0.5, chunk("12345678")), (0.5, chunk(""))]})
+
+    info = list(llm._stream("quiet"))[-1].generation_info
+
+    assert info["stream_metrics"]["completion_tokens"] == 2
+    assert info["stream_metrics"]["tokens_per_second"] == 4.0
+
+
+def test_generate_puts_stream_metrics_in_llm_output(make_llm):
+    # One prompt at a time so the streams don't share the fake clock
+    llm = make_llm(REPLIES, max_concurrency=1)
+
+    result = llm.generate(["first", "second"])
+
+    assert [g[0].text for g in result.generations] == ["Hello there", "Bye"]
+    metrics = result.llm_output["stream_metrics"]
+    assert [m["time_to_first_token"] for m in metrics] == [0.5, 1.0]
+    assert [m["tokens_per_second"] for m in metrics] == [8.0, 2.0]
+    assert result.llm_output["stream_summary"] == {"time_to_first_token": 0.75, "tokens_per_second": 5.0}
+    assert result.llm_output["token_usage"]["candidates_token_count"] == 6
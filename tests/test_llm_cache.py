@@ -0,0 +1,70 @@
+from langchain_core.outputs import Generation
+
+from src.ollama.utils import llm_cache
+from src.ollama.utils.llm_cache import ResponseCache
+
+
+def test_get_returns_stored_value_and_counts_hits(tmp_path):
+    cache = ResponseCache(path=str(tmp_path / "cache.sqlite"))
+    cache.put("k", "v")
+
+    assert cache.get("k") == "v"
+    assert cache.get("missing") is None
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+
+def test_entries_expire_after_ttl(tmp_path, clock, monkeypatch):
+    monkeypatch.setattr(llm_cache, "time", clock)
+    cache = ResponseCache(path=str(tmp_path / "cache.sqlite"), ttl_seconds=60)
+    cache.put("k", "v")
+
+    clock.advance(59)
+    assert cache.get("k") == "v"
+    clock.advance(2)
+    assert cache.get("k") is None
+    assert cache.stats()["entries"] == 0
+
+
+def test_reads_do_not_extend_ttl(tmp_path, clock, monkeypatch):
+    monkeypatch.setattr(llm_cache, "time", clock)
+    cache = ResponseCache(path=str(tmp_path / "cache.sqlite"), ttl_seconds=60)
+    cache.put("k", "v")
+
+    for _ in range(3):
+        clock.advance(25)
+        cache.get("k")
+    assert cache.get("k") is None
+
+
+def test_least_recently_used_entry_is_evicted(tmp_path, clock, monkeypatch):
+    monkeypatch.setattr(llm_cache, "time", clock)
+    cache = ResponseCache(path=str(tmp_path / "cache.sqlite"), max_entries=2)
+    cache.put("a", "1")
+    clock.advance(1)
+    cache.put("b", "2")
+    clock.advance(1)
+    # Reading "a" makes "b" the least recently used
+    assert cache.get("a") == "1"
+    clock.advance(1)
+    cache.put("c", "3")
+
+    assert cache.get("b") is None
+    assert cache.get("a") == "1"
+    assert cache.get("c") == "3"
+    assert cache.stats()["evictions"] == 1
+
+
+def test_langchain_interface_round_trips_generations(tmp_path):
+    cache = ResponseCache(path=str(tmp_path / "cache.sqlite"))
+    cache.update("prompt", "llm", [Generation(text="answer")])
+
+    assert [g.text for g in cache.lookup("prompt", "llm")] == ["answer"]
+    assert cache.lookup("prompt", "other-llm") is None
+
+
+def test_cache_persists_across_instances(tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+    ResponseCache(path=path).put("k", "v")
+
+    assert ResponseCache(path=path).get("k") == "v"
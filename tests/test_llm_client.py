@@ -0,0 +1,119 @@
+import asyncio
+import types
+
+import pytest
+
+from src.ollama.utils import llm_client
+from src.ollama.utils.concurrency_utils import ConcurrencyLimiter
+from src.ollama.utils.llm_client import GeminiLLMClient, LMStudioLLMClient, run_sync
+
+
+@pytest.fixture(autouse=True)
+def offline(monkeypatch):
+    monkeypatch.setenv("CACHE_ENABLED", "false")
+    monkeypatch.setenv("LLM_COALESCE_REQUESTS", "false")
+    monkeypatch.setattr(llm_client, "get_cassette", lambda: types.SimpleNamespace(
+        replaying=False,
+        acall=lambda kind, request, fn: fn()
+    ))
+
+
+def test_lmstudio_client_generates_from_sync_and_async_callers(mock_lmstudio):
+    client = LMStudioLLMClient(base_url=mock_lmstudio.url)
+
+    result = client.generate("Hello there", max_tokens=8)
+    assert result["text"]
+    assert result["usage"]["completion_tokens"] == 8
+
+    reply = asyncio.run(client.achat([{"role": "user", "content": "Hi"}], max_tokens=4))
+    assert reply["usage"]["completion_tokens"] == 4
+
+
+def test_lmstudio_client_reuses_one_session_across_event_loops(mock_lmstudio):
+    client = LMStudioLLMClient(base_url=mock_lmstudio.url)
+
+    asyncio.run(client.agenerate("one", max_tokens=2))
+    session = client._client_session
+    # A fresh loop each time, as asyncio.run callers do
+    asyncio.run(client.agenerate("two", max_tokens=2))
+    client.generate("three", max_tokens=2)
+
+    assert client._client_session is session
+    assert not session.closed
+
+    run_sync(client.aclose())
+    assert session.closed
+    assert client._client_session is None
+
+
+class FakeGeminiModel:
+    def __init__(self):
+        self.in_flight = 0
+        self.peak = 0
+
+    async def generate_content_async(self, contents, generation_config=None):
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+        await asyncio.sleep(0.01)
+        self.in_flight -= 1
+        return types.SimpleNamespace(
+            text=f"echo {contents}",
+            usage_metadata=types.SimpleNamespace(prompt_token_count=3, candidates_token_count=2, total_token_count=5)
+        )
+
+
+def test_gemini_client_shares_the_gemini_concurrency_limiter(monkeypatch):
+    model = FakeGeminiModel()
+    monkeypatch.setattr(llm_client, "get_client_registry", lambda: types.SimpleNamespace(get_model=lambda *args, **kwargs: model))
+    monkeypatch.setattr(llm_client, "get_limiter", lambda name: limiters.setdefault(name, ConcurrencyLimiter(1)))
+    limiters = {}
+    client = GeminiLLMClient("gemini-test")
+
+    async def burst():
+        return await asyncio.gather(*(client.agenerate(f"prompt {i}") for i in range(4)))
+
+    results = asyncio.run(burst())
+
+    assert [r["text"] for r in results] == [f"echo prompt {i}" for i in range(4)]
+    assert list(limiters) == ["gemini"]
+    assert model.peak == 1
+
+
+class SlowRateLimiter:
+    """Rate limiter that makes every caller wait before its request may start."""
+
+    def __init__(self, wait):
+        self.wait = wait
+        self.reserved = []
+        self.settled = []
+
+    async def acquire_async(self, tokens):
+        self.reserved.append(tokens)
+        await asyncio.sleep(self.wait)
+
+    def record_usage(self, reserved, response):
+        self.settled.append((reserved, response.usage_metadata.total_token_count))
+
+
+def test_gemini_rate_wait_holds_no_slot_and_no_timeout(monkeypatch):
+    model = FakeGeminiModel()
+    rate_limiter = SlowRateLimiter(0.05)
+    limiter = ConcurrencyLimiter(1)
+    monkeypatch.setattr(llm_client, "get_client_registry", lambda: types.SimpleNamespace(get_model=lambda *args, **kwargs: model))
+    monkeypatch.setattr(llm_client, "get_rate_limiter", lambda name: rate_limiter)
+    monkeypatch.setattr(llm_client, "get_limiter", lambda name: limiter)
+    client = GeminiLLMClient("gemini-test")
+
+    async def run():
+        # The rate wait is longer than the timeout, which covers only the network call
+        request = asyncio.ensure_future(client.agenerate("slow prompt", timeout=0.03))
+        await asyncio.sleep(0.01)
+        in_flight_during_wait = limiter.in_flight
+        return await request, in_flight_during_wait
+
+    result, in_flight_during_wait = asyncio.run(run())
+
+    assert result["text"] == "echo slow prompt"
+    assert in_flight_during_wait == 0
+    assert len(rate_limiter.reserved) == 1
+    assert rate_limiter.settled == [(rate_limiter.reserved[0], 5)]
@@ -0,0 +1,92 @@
+from dataclasses import replace
+
+import pytest
+import requests
+
+from src.ollama.utils.lmstudio_client import CompletionStream
+from src.ollama.utils.mock_server import PROFILES, MockServerThread
+
+
+def post(server, path, body):
+    return requests.post(f"{server.url}{path}", json=body, timeout=10)
+
+
+def test_chat_completion_json_reply(mock_lmstudio):
+    response = post(mock_lmstudio, "/v1/chat/completions", {
+        "messages": [{"role": "user", "content": "Hello there"}],
+        "max_tokens": 5
+    })
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["object"] == "chat.completion"
+    choice = body["choices"][0]
+    assert choice["message"]["role"] == "assistant"
+    assert len(choice["message"]["content"].split()) == 5
+    assert choice["finish_reason"] == "length"
+    assert body["usage"]["completion_tokens"] == 5
+    assert body["usage"]["total_tokens"] == body["usage"]["prompt_tokens"] + 5
+
+
+@pytest.mark.parametrize("chat", [True, False])
+def test_streamed_reply_is_parsed_by_completion_stream(mock_lmstudio, chat):
+    path, field, prompt = (
+        ("/v1/chat/completions", "messages", [{"role": "user", "content": "Hello"}]) if chat
+        else ("/v1/completions", "prompt", "Hello")
+    )
+    stream = CompletionStream(
+        lambda: requests.post(
+            f"{mock_lmstudio.url}{path}",
+            json={field: prompt, "max_tokens": 6, "stream": True},
+            stream=True,
+            timeout=10
+        ),
+        chat=chat
+    )
+
+    deltas = list(stream)
+
+    assert len(deltas) == 6
+    assert stream.text == "".join(deltas)
+    metrics = stream.metrics()
+    assert metrics["chunks"] == 6
+    assert metrics["time_to_first_token"] is not None
+    assert metrics["finish_reason"] == "length"
+    assert metrics["usage"]["completion_tokens"] == 6
+
+
+def test_rate_limited_requests_get_retry_after():
+    profile = replace(PROFILES["instant"], rate_limit_rate=1.0, retry_after=2.5)
+    with MockServerThread(profile) as server:
+        response = post(server, "/v1/completions", {"prompt": "Hello"})
+        stats = requests.get(f"{server.url}/mock/stats", timeout=10).json()
+
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == "2.5"
+    assert response.json()["error"]["code"] == "rate_limit_exceeded"
+    assert stats["rate_limited"] == 1
+    assert stats["completed"] == 0
+
+
+def test_request_over_the_context_length_is_rejected():
+    with MockServerThread(replace(PROFILES["instant"], context_length=100)) as server:
+        response = post(server, "/v1/completions", {"prompt": "word " * 200, "max_tokens": 10})
+
+    assert response.status_code == 400
+    error = response.json()["error"]
+    assert error["type"] == "invalid_request_error"
+    assert error["code"] == "context_length_exceeded"
+    assert "maximum context length is 100 tokens" in error["message"]
+
+
+@pytest.mark.parametrize("path, body", [
+    ("/v1/chat/completions", ["not", "an", "object"]),
+    ("/v1/completions", "just a string"),
+    ("/v1/completions", {}),
+    ("/v1/chat/completions", {"messages": "Hello"}),
+])
+def test_malformed_requests_are_rejected(mock_lmstudio, path, body):
+    response = post(mock_lmstudio, path, body)
+
+    assert response.status_code == 400
+    assert response.json()["error"]["type"] == "invalid_request_error"
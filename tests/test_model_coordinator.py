@@ -0,0 +1,292 @@
+import threading
+import time
+import types
+
+import pytest
+
+from src.ollama.tools.model_tools import TextCompletionTool
+from src.ollama.utils import model_coordinator
+from src.ollama.utils.backend_stats import BackendStatsRegistry, LatencyStats
+from src.ollama.utils.model_coordinator import HedgeBudget, ModelCoordinator
+
+
+class FakeModelManager:
+    def get_gemini_model(self):
+        return types.SimpleNamespace(model_name="gemini-test")
+
+    def get_lmstudio_model(self):
+        return {"model": "lmstudio-test"}
+
+
+class AllAvailable:
+    def is_available(self, backend):
+        return True
+
+
+@pytest.fixture
+def stats(monkeypatch):
+    stats = BackendStatsRegistry(prior_latency=2.0)
+    monkeypatch.setattr(model_coordinator, "ModelManager", FakeModelManager)
+    monkeypatch.setattr(model_coordinator, "get_health_registry", lambda backends: AllAvailable())
+    monkeypatch.setattr(model_coordinator, "get_backend_stats", lambda: stats)
+    monkeypatch.setenv("MODEL_PRIORITY", "['gemini', 'lmstudio']")
+    monkeypatch.setenv("GEMINI_MAX_CONCURRENCY", "8")
+    monkeypatch.setenv("LMSTUDIO_MAX_CONCURRENCY", "1")
+    return stats
+
+
+def make_coordinator(monkeypatch, policy="fastest", **env):
+    monkeypatch.setenv("MODEL_ROUTING_POLICY", policy)
+    for name, value in env.items():
+        monkeypatch.setenv(name, value)
+    return ModelCoordinator()
+
+
+def test_latency_stats_track_ewma_p95_and_errors():
+    latency = LatencyStats(alpha=0.5)
+    for value in (1.0, 3.0):
+        latency.record(value, True)
+    latency.record(10.0, False)
+
+    assert latency.ewma_latency == pytest.approx(2.0)
+    assert latency.p95() == 1.0
+    assert latency.error_rate == pytest.approx(0.5)
+    assert (latency.requests, latency.errors) == (3, 1)
+
+
+def test_latency_stats_without_samples_have_no_p95():
+    assert LatencyStats().p95() is None
+
+
+def test_priority_policy_keeps_configured_order(monkeypatch, stats):
+    stats.record("gemini", "m", 5.0, True)
+    stats.record("lmstudio", "m", 0.1, True)
+
+    assert make_coordinator(monkeypatch, "priority").rank_models() == ["gemini", "lmstudio"]
+
+
+def test_fastest_policy_ranks_by_expected_time(monkeypatch, stats):
+    stats.record("gemini", "m", 5.0, True)
+    stats.record("lmstudio", "m", 0.1, True)
+
+    assert make_coordinator(monkeypatch, "fastest").rank_models() == ["lmstudio", "gemini"]
+
+
+def test_cost_weighted_policy_penalizes_paid_backends(monkeypatch, stats):
+    stats.record("gemini", "m", 1.0, True)
+    stats.record("lmstudio", "m", 1.5, True)
+    coordinator = make_coordinator(monkeypatch, "cost_weighted", MODEL_COSTS='{"gemini": 1.0, "lmstudio": 0.0}')
+
+    assert coordinator.rank_models() == ["lmstudio", "gemini"]
+
+
+def test_fallback_reaches_healthy_backend_after_failure_reorders_ranking(monkeypatch, stats):
+    coordinator = make_coordinator(monkeypatch, "fastest")
+    stats.record("gemini", "m", 1.0, True, "text")
+    stats.record("lmstudio", "m", 1.1, True, "text")
+    assert coordinator.rank_models("text") == ["gemini", "lmstudio"]
+
+    # One failure: gemini is now expected at 1.0 / 0.8 = 1.25s and drops below lmstudio
+    stats.record("gemini", "m", 0.0, False, "text")
+    assert coordinator.rank_models("text") == ["lmstudio", "gemini"]
+
+    assert coordinator.get_fallback_model("gemini", "text")["type"] == "lmstudio"
+    assert coordinator.get_fallback_model("lmstudio", "text", tried={"gemini"}) is None
+
+
+def test_fallback_disabled(monkeypatch, stats):
+    coordinator = make_coordinator(monkeypatch, ENABLE_MODEL_FALLBACK="false")
+
+    assert coordinator.get_fallback_model("gemini") is None
+
+
+def test_tool_falls_back_once_per_backend(monkeypatch, stats):
+    monkeypatch.setenv("MODEL_ROUTING_POLICY", "fastest")
+    stats.record("gemini", "m", 1.0, True, "text")
+    stats.record("lmstudio", "m", 1.1, True, "text")
+    tool = TextCompletionTool()
+    calls = []
+
+    def complete(model, prompt, **kwargs):
+        with tool.coordinator.track(model, tool.task_class):
+            calls.append(model["type"])
+            if model["type"] == "gemini":
+                raise RuntimeError("gemini down")
+            return f"answer to {prompt}"
+
+    monkeypatch.setattr(tool, "_complete", complete)
+
+    assert tool.execute("q") == {"text": "answer to q", "model": "lmstudio"}
+    assert calls == ["gemini", "lmstudio"]
+
+
+def test_tool_raises_after_every_backend_failed(monkeypatch, stats):
+    tool = TextCompletionTool()
+    calls = []
+
+    def complete(model, prompt, **kwargs):
+        with tool.coordinator.track(model, tool.task_class):
+            calls.append(model["type"])
+            raise RuntimeError(f"{model['type']} down")
+
+    monkeypatch.setattr(tool, "_complete", complete)
+
+    with pytest.raises(RuntimeError, match="lmstudio down"):
+        tool.execute("q")
+    assert calls == ["gemini", "lmstudio"]
+
+
+@pytest.fixture
+def hedging(monkeypatch, stats):
+    monkeypatch.setattr(model_coordinator, "_hedge_slots", threading.BoundedSemaphore(1))
+    coordinator = make_coordinator(monkeypatch, "priority", MODEL_HEDGE_DELAY="0.05")
+    coordinator.hedge_budget = HedgeBudget(ratio=1.0, burst=5)
+    return coordinator
+
+
+def slow_primary(release, calls):
+    def call(model):
+        calls.append(model["type"])
+        if model["type"] == "gemini":
+            release.wait(5)
+        return model["type"]
+
+    return call
+
+
+def test_slow_primary_is_hedged_to_the_fallback(hedging):
+    release = threading.Event()
+    calls = []
+
+    result, model = hedging.run_hedged(slow_primary(release, calls))
+    release.set()
+
+    assert (result, model["type"]) == ("lmstudio", "lmstudio")
+    assert calls == ["gemini", "lmstudio"]
+
+
+def test_no_hedging_while_losers_hold_every_hedge_slot(hedging):
+    release = threading.Event()
+    calls = []
+    fn = slow_primary(release, calls)
+
+    assert hedging.run_hedged(fn)[0] == "lmstudio"
+    # The first primary still runs, so the second request waits for its own primary
+    threading.Timer(0.2, release.set).start()
+    assert hedging.run_hedged(fn)[0] == "gemini"
+    assert calls == ["gemini", "lmstudio", "gemini"]
+
+    # Both attempts of the first request finished, so its slot comes back
+    assert model_coordinator._hedge_slots.acquire(timeout=1)
+    model_coordinator._hedge_slots.release()
+    release.clear()
+    assert hedging.run_hedged(fn)[0] == "lmstudio"
+    release.set()
+    assert hedging.hedge_budget.hedges == 2
+
+
+@pytest.fixture
+def parallel(monkeypatch, stats):
+    monkeypatch.setattr(model_coordinator, "_hedge_slots", threading.BoundedSemaphore(1))
+    return make_coordinator(monkeypatch, "priority", MODEL_HEDGE_DELAY="0.05")
+
+
+def answers(**replies):
+    """Backend call returning (or raising) each backend's reply after its delay."""
+    def call(model):
+        delay, reply = replies[model["type"]]
+        time.sleep(delay)
+        if isinstance(reply, Exception):
+            raise reply
+        return reply
+
+    return call
+
+
+def test_first_success_returns_the_fastest_answer(parallel):
+    report = parallel.run_parallel(answers(gemini=(0.2, "slow"), lmstudio=(0.0, "fast")), strategy="first_success")
+
+    assert (report["result"], report["model"]) == ("fast", "lmstudio")
+    assert report["latencies"]["lmstudio"] is not None
+    assert report["latencies"]["gemini"] is None
+
+
+def test_first_success_waits_for_all_while_losers_hold_every_slot(parallel):
+    release = threading.Event()
+    calls = []
+    assert parallel.run_hedged(slow_primary(release, calls), None)[0] == "lmstudio"
+
+    # The hedge's loser still runs, so nothing may be abandoned
+    report = parallel.run_parallel(answers(gemini=(0.1, "slow"), lmstudio=(0.0, "fast")), strategy="first_success")
+    release.set()
+
+    assert report["model"] == "lmstudio"
+    assert report["latencies"]["gemini"] >= 0.1
+
+
+def test_best_by_validator_picks_the_highest_score(parallel):
+    report = parallel.run_parallel(
+        answers(gemini=(0.0, "short"), lmstudio=(0.0, "a much longer answer")),
+        strategy="best_by_validator",
+        validator=len
+    )
+
+    assert report["model"] == "lmstudio"
+    assert report["scores"] == {"gemini": 5, "lmstudio": 20}
+
+
+def test_best_by_validator_requires_a_validator(parallel):
+    with pytest.raises(ValueError):
+        parallel.run_parallel(answers(), strategy="best_by_validator")
+
+
+def test_majority_vote_normalizes_answers_and_breaks_ties_by_rank(parallel, monkeypatch):
+    monkeypatch.setenv("MODEL_PRIORITY", "['gemini', 'lmstudio', 'ollama']")
+    coordinator = make_coordinator(monkeypatch, "priority")
+    coordinator._build_model = lambda model_type: {"type": model_type}
+    replies = answers(gemini=(0.0, "Paris"), lmstudio=(0.0, "  paris "), ollama=(0.0, "Lyon"))
+
+    report = coordinator.run_parallel(replies, strategy="majority_vote")
+    assert (report["result"], report["model"]) == ("Paris", "gemini")
+    assert report["votes"] == {"gemini": 2, "lmstudio": 2, "ollama": 1}
+
+
+def test_parallel_reports_errors_and_fails_only_when_every_backend_failed(parallel):
+    report = parallel.run_parallel(
+        answers(gemini=(0.0, RuntimeError("quota")), lmstudio=(0.05, "ok")), strategy="first_success"
+    )
+    assert report["model"] == "lmstudio"
+    assert report["errors"] == {"gemini": "quota"}
+    assert report["latencies"]["gemini"] is None
+    assert report["latencies"]["lmstudio"] >= 0.05
+
+    with pytest.raises(RuntimeError, match="All backends failed"):
+        parallel.run_parallel(
+            answers(gemini=(0.0, RuntimeError("quota")), lmstudio=(0.0, RuntimeError("down"))),
+            strategy="majority_vote"
+        )
+
+
+def test_tool_scores_tagged_answers_above_prose():
+    tool = TextCompletionTool.__new__(TextCompletionTool)
+    tool._validator = None
+    tagged = "<plan>p</plan><thoughts>t</thoughts><analysis>a</analysis><execution>e</execution>"
+    sections = "Plan: outline\nThoughts: ideas\n## Analysis\nthe findings"
+
+    assert tool._score(tagged) == 1.0
+    assert tool._score(f"<thinking>{tagged}</thinking>") == 1.0
+    assert tool._score(sections) == 0.375
+    assert tool._score("Just an answer & nothing else") == 0.0
+
+
+def test_tool_best_by_validator_prefers_the_structured_answer(monkeypatch, stats):
+    monkeypatch.setenv("PARALLEL_MODEL_EXECUTION", "true")
+    monkeypatch.setenv("PARALLEL_MODEL_STRATEGY", "best_by_validator")
+    tool = TextCompletionTool()
+    replies = {"gemini": "A plain answer", "lmstudio": "Plan: steps\nAnalysis: reasons"}
+    monkeypatch.setattr(tool, "_complete", lambda model, prompt, **kwargs: replies[model["type"]])
+
+    report = tool.execute("q")
+
+    assert report["model"] == "lmstudio"
+    assert report["scores"] == {"gemini": 0.0, "lmstudio": 0.25}
@@ -0,0 +1,141 @@
+import asyncio
+import types
+
+import pytest
+
+from src.ollama.utils import rate_limiter
+from src.ollama.utils.rate_limiter import (
+    RateLimitedModel,
+    TokenBucketRateLimiter,
+    estimate_tokens,
+)
+
+
+@pytest.fixture
+def limiter_clock(clock, monkeypatch):
+    monkeypatch.setattr(rate_limiter, "time", clock)
+    return clock
+
+
+def usage(total):
+    return types.SimpleNamespace(usage_metadata=types.SimpleNamespace(total_token_count=total))
+
+
+def test_estimate_tokens():
+    assert estimate_tokens(None) == 0
+    assert estimate_tokens("x" * 40) == 11
+    assert estimate_tokens(["x" * 40, {"text": "x" * 8}]) == 14
+    assert estimate_tokens(object()) == rate_limiter.IMAGE_TOKEN_ESTIMATE
+
+
+def test_requests_beyond_the_budget_wait_for_refill(limiter_clock):
+    limiter = TokenBucketRateLimiter(requests_per_minute=2, tokens_per_minute=0)
+
+    for _ in range(3):
+        limiter.acquire()
+
+    assert limiter_clock.sleeps == [30.0]
+    assert limiter.stats() == {"total_requests": 3, "total_tokens": 0, "total_wait_seconds": 30.0}
+
+
+def test_tokens_beyond_the_budget_wait_for_refill(limiter_clock):
+    limiter = TokenBucketRateLimiter(requests_per_minute=0, tokens_per_minute=600)
+
+    limiter.acquire(500)
+    limiter.acquire(200)
+
+    # 100 tokens left; 100 more refill in 10 seconds
+    assert limiter_clock.sleeps == [10.0]
+
+
+def test_oversized_request_takes_at_most_the_whole_bucket(limiter_clock):
+    limiter = TokenBucketRateLimiter(requests_per_minute=0, tokens_per_minute=100)
+
+    limiter.acquire(1000)
+
+    assert limiter_clock.sleeps == []
+    assert limiter.stats()["total_tokens"] == 100
+
+
+def test_reconcile_charges_under_estimates(limiter_clock):
+    limiter = TokenBucketRateLimiter(requests_per_minute=0, tokens_per_minute=600)
+    limiter.acquire(100)
+    limiter.reconcile(100, 400)
+
+    limiter.acquire(300)
+
+    # 200 tokens left after the correction; 100 more refill in 10 seconds
+    assert limiter_clock.sleeps == [10.0]
+    assert limiter.stats()["total_tokens"] == 700
+
+
+def test_reconcile_refund_never_overfills_the_bucket(limiter_clock):
+    limiter = TokenBucketRateLimiter(requests_per_minute=0, tokens_per_minute=600)
+    limiter.acquire(500)
+    limiter_clock.advance(60)
+    limiter.reconcile(500, 10)
+
+    limiter.acquire(600)
+    limiter.acquire(10)
+
+    assert limiter_clock.sleeps == [1.0]
+
+
+def test_async_acquire_counts_waits(limiter_clock, monkeypatch):
+    async def fake_sleep(seconds):
+        limiter_clock.sleep(seconds)
+
+    monkeypatch.setattr(rate_limiter.asyncio, "sleep", fake_sleep)
+    limiter = TokenBucketRateLimiter(requests_per_minute=1, tokens_per_minute=0)
+
+    async def burst():
+        await limiter.acquire_async()
+        await limiter.acquire_async()
+
+    asyncio.run(burst())
+    assert limiter.stats()["total_wait_seconds"] == 60.0
+
+
+class FakeModel:
+    def __init__(self, total):
+        self.total = total
+
+    def generate_content(self, contents, stream=False):
+        if stream:
+            return iter([usage(self.total // 2), usage(self.total)])
+        return usage(self.total)
+
+    async def generate_content_async(self, contents, stream=False):
+        if not stream:
+            return usage(self.total)
+
+        async def chunks():
+            yield usage(self.total // 2)
+            yield usage(self.total)
+
+        return chunks()
+
+
+def test_rate_limited_model_reconciles_plain_calls(limiter_clock):
+    limiter = TokenBucketRateLimiter(requests_per_minute=0, tokens_per_minute=10000)
+    model = RateLimitedModel(FakeModel(total=50), limiter)
+
+    model.generate_content("x" * 40)
+
+    assert limiter.stats()["total_tokens"] == 50
+
+
+def test_rate_limited_model_reconciles_streams_when_consumed(limiter_clock):
+    limiter = TokenBucketRateLimiter(requests_per_minute=0, tokens_per_minute=10000)
+    model = RateLimitedModel(FakeModel(total=50), limiter)
+
+    stream = model.generate_content("x" * 40, stream=True)
+    assert limiter.stats()["total_tokens"] == 11
+    assert len(list(stream)) == 2
+    assert limiter.stats()["total_tokens"] == 50
+
+    async def consume():
+        return [chunk async for chunk in await model.generate_content_async("x" * 40, stream=True)]
+
+    assert len(asyncio.run(consume())) == 2
+    assert limiter.stats()["total_tokens"] == 100
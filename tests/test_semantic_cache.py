@@ -0,0 +1,91 @@
+import threading
+
+from langchain_core.outputs import Generation
+
+from src.ollama.utils.semantic_cache import SemanticCache
+
+VECTORS = {
+    "What is the capital of France?": [1.0, 0.0, 0.0],
+    "what's the capital of France": [0.99, 0.1, 0.0],
+    "Explain photosynthesis": [0.0, 1.0, 0.0],
+}
+
+
+class FakeResponse:
+    def __init__(self, vector):
+        self.vector = vector
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return {"data": [{"embedding": self.vector}]}
+
+
+class FakeEmbeddings:
+    """Stands in for the LM Studio transport and counts embedding requests."""
+
+    def __init__(self):
+        self.requests = []
+
+    def post(self, path, json):
+        assert path == "/v1/embeddings"
+        self.requests.append(json["input"])
+        return FakeResponse(VECTORS[json["input"]])
+
+
+def make_cache():
+    cache = SemanticCache(threshold=0.95, api_url="http://embeddings.test")
+    cache.transport = FakeEmbeddings()
+    return cache
+
+
+def test_similar_prompt_hits_and_unrelated_prompt_misses():
+    cache = make_cache()
+    cache.update("What is the capital of France?", "llm", [Generation(text="Paris")])
+
+    hit = cache.lookup("what's the capital of France", "llm")
+    assert [g.text for g in hit] == ["Paris"]
+    assert cache.lookup("Explain photosynthesis", "llm") is None
+    assert cache.lookup("what's the capital of France", "other-llm") is None
+    assert cache.stats() == {"hits": 1, "misses": 2, "hit_rate": 1 / 3, "entries": 1}
+
+
+def test_miss_then_update_embeds_the_prompt_once():
+    cache = make_cache()
+    cache.update("What is the capital of France?", "llm", [Generation(text="Paris")])
+    cache.transport.requests.clear()
+
+    assert cache.lookup("Explain photosynthesis", "llm") is None
+    cache.update("Explain photosynthesis", "llm", [Generation(text="Light to sugar")])
+
+    assert cache.transport.requests == ["Explain photosynthesis"]
+    assert cache.stats()["entries"] == 2
+
+
+def test_oldest_entries_are_dropped_beyond_max_entries():
+    cache = make_cache()
+    cache.max_entries = 1
+    cache.update("What is the capital of France?", "llm", [Generation(text="Paris")])
+    cache.update("Explain photosynthesis", "llm", [Generation(text="Light to sugar")])
+
+    assert cache.lookup("what's the capital of France", "llm") is None
+    assert cache.stats()["entries"] == 1
+
+
+def test_counters_are_exact_under_concurrent_lookups():
+    cache = make_cache()
+    cache.update("What is the capital of France?", "llm", [Generation(text="Paris")])
+
+    def look_up():
+        for _ in range(200):
+            cache.lookup("what's the capital of France", "llm")
+            cache.lookup("Explain photosynthesis", "llm")
+
+    threads = [threading.Thread(target=look_up) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert (cache.stats()["hits"], cache.stats()["misses"]) == (800, 800)
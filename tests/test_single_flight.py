@@ -0,0 +1,135 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from src.ollama.utils.single_flight import SingleFlight, request_key
+
+
+def test_request_key_is_stable_and_order_insensitive_for_dicts():
+    assert request_key("m", {"a": 1, "b": 2}) == request_key("m", {"b": 2, "a": 1})
+    assert request_key("m", "x") != request_key("m", "y")
+
+
+def test_concurrent_sync_callers_share_one_execution():
+    flight = SingleFlight()
+    started = threading.Event()
+    release = threading.Event()
+    calls = []
+
+    def work():
+        calls.append(1)
+        started.set()
+        release.wait()
+        return "result"
+
+    results = []
+    leader = threading.Thread(target=lambda: results.append(flight.do("k", work)))
+    leader.start()
+    started.wait()
+    followers = [threading.Thread(target=lambda: results.append(flight.do("k", work))) for _ in range(3)]
+    for follower in followers:
+        follower.start()
+    while flight.coalesced < 3:
+        time.sleep(0.001)
+    release.set()
+    for thread in [leader, *followers]:
+        thread.join()
+
+    assert calls == [1]
+    assert results == ["result"] * 4
+    # Nothing is retained once the call completes
+    assert flight.do("k", lambda: "fresh") == "fresh"
+
+
+def test_sync_followers_receive_the_leader_exception():
+    flight = SingleFlight()
+    started = threading.Event()
+    release = threading.Event()
+    errors = []
+
+    def work():
+        started.set()
+        release.wait()
+        raise ValueError("boom")
+
+    def call():
+        try:
+            flight.do("k", work)
+        except ValueError as e:
+            errors.append(str(e))
+
+    threads = [threading.Thread(target=call)]
+    threads[0].start()
+    started.wait()
+    threads.append(threading.Thread(target=call))
+    threads[1].start()
+    while flight.coalesced < 1:
+        time.sleep(0.001)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert errors == ["boom", "boom"]
+
+
+def test_async_callers_share_one_execution():
+    flight = SingleFlight()
+    calls = []
+
+    async def work():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return "result"
+
+    async def main():
+        return await asyncio.gather(*(flight.do_async("k", work) for _ in range(4)))
+
+    assert asyncio.run(main()) == ["result"] * 4
+    assert calls == [1]
+    assert flight.coalesced == 3
+
+
+def test_cancelled_follower_does_not_cancel_the_leader():
+    flight = SingleFlight()
+
+    async def work():
+        await asyncio.sleep(0.02)
+        return "result"
+
+    async def main():
+        leader = asyncio.create_task(flight.do_async("k", work))
+        await asyncio.sleep(0)
+        follower = asyncio.create_task(flight.do_async("k", work))
+        await asyncio.sleep(0)
+        follower.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await follower
+        return await leader
+
+    assert asyncio.run(main()) == "result"
+
+
+def test_followers_take_over_when_the_leader_is_cancelled():
+    flight = SingleFlight()
+    calls = []
+
+    async def work():
+        calls.append(1)
+        await asyncio.sleep(0.02)
+        return "result"
+
+    async def main():
+        leader = asyncio.create_task(flight.do_async("k", work))
+        await asyncio.sleep(0)
+        followers = [asyncio.create_task(flight.do_async("k", work)) for _ in range(2)]
+        await asyncio.sleep(0)
+        leader.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        return await asyncio.gather(*followers)
+
+    assert asyncio.run(main()) == ["result", "result"]
+    # The cancelled leader's call plus one call by the follower that took over
+    assert calls == [1, 1]
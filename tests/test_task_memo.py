@@ -0,0 +1,73 @@
+import pytest
+from crewai import Task
+
+from src.ollama.crew import BaseCrew
+from src.ollama.utils import task_memo
+from src.ollama.utils.checkpoints import rehydrate_output
+from src.ollama.utils.task_memo import TaskMemoStore, memo_key, parse_duration
+
+
+@pytest.mark.parametrize("value, seconds", [
+    (None, None),
+    ("forever", None),
+    (90, 90.0),
+    ("45", 45.0),
+    ("30s", 30.0),
+    ("15m", 900.0),
+    ("24h", 86400.0),
+    ("1.5d", 129600.0),
+    ("2w", 1209600.0),
+    (" 2H ", 7200.0),
+    ("never", 0.0),
+    ("none", 0.0),
+    ("off", 0.0),
+    (0, 0.0),
+])
+def test_parse_duration(value, seconds):
+    assert parse_duration(value) == seconds
+
+
+@pytest.mark.parametrize("value", ["soon", "10y", "-5m"])
+def test_parse_duration_rejects_unknown_policies(value):
+    with pytest.raises(ValueError):
+        parse_duration(value)
+
+
+def make_task(description="Summarize the findings", expected_output="A summary"):
+    return Task(description=description, expected_output=expected_output)
+
+
+def test_memo_key_depends_on_task_and_upstream_outputs():
+    key = memo_key(make_task(), ["findings"])
+
+    assert memo_key(make_task(), ["findings"]) == key
+    assert memo_key(make_task(), ["other findings"]) != key
+    assert memo_key(make_task(), []) != key
+    assert memo_key(make_task(description="Summarize differently"), ["findings"]) != key
+    assert memo_key(make_task(expected_output="A list"), ["findings"]) != key
+
+
+def test_store_respects_max_age(tmp_path, clock, monkeypatch):
+    monkeypatch.setattr(task_memo, "time", clock)
+    store = TaskMemoStore(path=str(tmp_path / "memo.sqlite"), default_max_age=60)
+    store.put("k", "summarize", "summary")
+
+    clock.advance(30)
+    assert store.get("k", store.max_age(None)) == "summary"
+    assert store.get("k", store.max_age("10s")) is None
+    assert store.get("k", store.max_age("forever")) == "summary"
+    assert store.stats() == {"hits": 2, "misses": 1, "entries": 1}
+
+
+def test_upstream_outputs_come_only_from_the_current_run(monkeypatch):
+    monkeypatch.setattr(BaseCrew, "_initialize_tools", lambda self: {})
+    crew = BaseCrew()
+    crew.tasks = {name: make_task(description=f"Do {name}") for name in ("research", "summarize", "report")}
+    # Outputs left over from an earlier run of the same crew
+    for name, task in crew.tasks.items():
+        rehydrate_output(task, f"old {name}")
+
+    assert crew._upstream_outputs("report") == []
+
+    crew._task_completed(rehydrate_output(crew.tasks["research"], "new research"))
+    assert crew._upstream_outputs("report") == ["new research"]
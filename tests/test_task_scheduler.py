@@ -0,0 +1,128 @@
+import contextvars
+import threading
+import time
+
+import pytest
+
+from src.ollama.utils.task_scheduler import DagScheduler, TaskGraph
+
+DIAMOND = {"research": [], "market": [], "summary": ["research", "market"], "report": ["summary"]}
+
+request_id = contextvars.ContextVar("request_id", default=None)
+
+
+def test_graph_orders_tasks_and_finds_sinks():
+    graph = TaskGraph(DIAMOND)
+
+    assert graph.order == ["research", "market", "summary", "report"]
+    assert graph.sinks() == ["report"]
+    assert graph.descendants("market") == {"summary", "report"}
+
+
+def test_duplicate_dependencies_are_collapsed():
+    assert TaskGraph({"a": [], "b": ["a", "a"]}).dependencies["b"] == ["a"]
+
+
+def test_unknown_dependency_is_rejected():
+    with pytest.raises(ValueError, match="unknown task 'missing'"):
+        TaskGraph({"a": ["missing"]})
+
+
+def test_cycle_is_rejected():
+    with pytest.raises(ValueError, match="cycle among: b, c"):
+        TaskGraph({"a": [], "b": ["a", "c"], "c": ["b"]})
+
+
+def test_tasks_receive_their_dependencies_outputs_in_declaration_order():
+    seen = {}
+
+    def run_task(name, inputs):
+        seen[name] = list(inputs)
+        return f"{name} output"
+
+    outcome = DagScheduler(max_workers=4).run(TaskGraph(DIAMOND), run_task)
+
+    assert seen["summary"] == ["research", "market"]
+    assert outcome["outputs"]["report"] == "report output"
+    assert outcome["errors"] == {}
+    assert set(outcome["timings"]) == set(DIAMOND)
+
+
+def test_independent_tasks_run_concurrently():
+    barrier = threading.Barrier(2, timeout=5)
+
+    def run_task(name, inputs):
+        if name in ("research", "market"):
+            # Deadlocks (and times out) unless both run at once
+            barrier.wait()
+        return name
+
+    outcome = DagScheduler(max_workers=2).run(TaskGraph(DIAMOND), run_task)
+
+    assert outcome["errors"] == {}
+
+
+def test_failure_skips_only_downstream_tasks():
+    graph = TaskGraph({"a": [], "b": ["a"], "c": ["b"], "d": []})
+    ran = []
+
+    def run_task(name, inputs):
+        ran.append(name)
+        if name == "a":
+            raise RuntimeError("a failed")
+        return name
+
+    outcome = DagScheduler(max_workers=2).run(graph, run_task)
+
+    assert sorted(ran) == ["a", "d"]
+    assert list(outcome["errors"]) == ["a"]
+    assert outcome["skipped"] == ["b", "c"]
+    assert outcome["outputs"] == {"d": "d"}
+
+
+def test_completed_tasks_are_not_run_again():
+    ran = []
+
+    def run_task(name, inputs):
+        ran.append(name)
+        return dict(inputs)
+
+    outcome = DagScheduler().run(TaskGraph(DIAMOND), run_task, completed={"research": "restored", "market": "m"})
+
+    assert ran == ["summary", "report"]
+    assert outcome["outputs"]["summary"] == {"research": "restored", "market": "m"}
+
+
+def test_tasks_sharing_an_exclusive_key_never_overlap():
+    graph = TaskGraph({name: [] for name in ("a", "b", "c", "d")})
+    active = {"writer": 0, "analyst": 0}
+    peak = {"writer": 0, "analyst": 0}
+    lock = threading.Lock()
+    exclusive = {"a": "writer", "b": "writer", "c": "writer", "d": "analyst"}
+
+    def run_task(name, inputs):
+        key = exclusive[name]
+        with lock:
+            active[key] += 1
+            peak[key] = max(peak[key], active[key])
+        time.sleep(0.02)
+        with lock:
+            active[key] -= 1
+        return name
+
+    outcome = DagScheduler(max_workers=4).run(graph, run_task, exclusive=exclusive)
+
+    assert len(outcome["outputs"]) == 4
+    assert peak == {"writer": 1, "analyst": 1}
+    # The analyst's task ran alongside the writer's
+    assert outcome["timings"]["d"]["start"] < outcome["timings"]["a"]["end"]
+
+
+def test_tasks_run_in_the_callers_context():
+    token = request_id.set("run-1")
+    try:
+        outcome = DagScheduler(max_workers=2).run(TaskGraph(DIAMOND), lambda name, inputs: request_id.get())
+    finally:
+        request_id.reset(token)
+
+    assert set(outcome["outputs"].values()) == {"run-1"}
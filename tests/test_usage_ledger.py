@@ -0,0 +1,97 @@
+import contextvars
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from src.ollama.utils.usage_ledger import UsageLedger, usage_metrics
+
+
+def test_records_are_attributed_to_run_agent_and_task():
+    ledger = UsageLedger()
+    with ledger.run("run-1"):
+        with ledger.attribute("Researcher", "research"):
+            ledger.record("gemini", "m", 10, 5, latency=1.0)
+        ledger.record("lmstudio", "m", 3, 2, latency=0.5)
+    ledger.record("gemini", "m", 1, 1)
+
+    summary = ledger.summary("run-1")
+    assert summary["totals"]["requests"] == 2
+    assert summary["totals"]["total_tokens"] == 20
+    assert summary["by_task"]["research"]["total_tokens"] == 15
+    assert summary["by_task"]["unattributed"]["total_tokens"] == 5
+    assert summary["by_backend"]["lmstudio"]["tokens_per_second"] == 4.0
+    assert ledger.records()[-1].run_id is None
+
+
+def test_close_task_assigns_pending_records_of_its_run_only():
+    ledger = UsageLedger()
+    with ledger.run("run-1"):
+        ledger.record("gemini", "m", 10, 5)
+        with ledger.attribute("Writer", "report"):
+            ledger.record("gemini", "m", 1, 1)
+    with ledger.run("run-2"):
+        ledger.record("gemini", "m", 7, 7)
+
+    ledger.close_task("Researcher", "research", run_id="run-1")
+
+    assert [(r.agent, r.task) for r in ledger.records("run-1")] == [("Researcher", "research"), ("Writer", "report")]
+    assert [(r.agent, r.task) for r in ledger.records("run-2")] == [(None, None)]
+
+
+def test_overlapping_runs_in_threads_stay_apart():
+    ledger = UsageLedger()
+    barrier = threading.Barrier(2)
+
+    def crew(run_id):
+        with ledger.run(run_id):
+            # Both runs are open at the same time
+            barrier.wait()
+            for _ in range(50):
+                ledger.record("gemini", "m", 1, 1)
+            barrier.wait()
+
+    threads = [threading.Thread(target=crew, args=(run_id,)) for run_id in ("A", "B")]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert {r.run_id for r in ledger.records()} == {"A", "B"}
+    assert ledger.summary("A")["totals"]["requests"] == 50
+    assert ledger.summary("B")["totals"]["requests"] == 50
+
+
+def test_pool_work_run_in_the_callers_context_is_attributed():
+    ledger = UsageLedger()
+    with ThreadPoolExecutor(max_workers=2) as pool, ledger.run("run-1"):
+        with ledger.attribute("Researcher", "research"):
+            pool.submit(contextvars.copy_context().run, ledger.record, "gemini", "m", 1, 1).result()
+        pool.submit(ledger.record, "gemini", "m", 1, 1).result()
+
+    records = ledger.records()
+    assert (records[0].run_id, records[0].task) == ("run-1", "research")
+    # Without the caller's context a pool thread has no run to report
+    assert (records[1].run_id, records[1].task) == (None, None)
+
+
+def test_clear_drops_one_run_or_all():
+    ledger = UsageLedger()
+    for run_id in ("A", "B"):
+        with ledger.run(run_id):
+            ledger.record("gemini", "m", 1, 1)
+
+    ledger.clear("A")
+    assert [r.run_id for r in ledger.records()] == ["B"]
+    ledger.clear()
+    assert ledger.records() == []
+
+
+def test_usage_metrics_flatten_the_summary():
+    ledger = UsageLedger()
+    with ledger.run("run-1"), ledger.attribute("Senior Researcher", "research task"):
+        ledger.record("gemini", "m", 10, 5, latency=1.0)
+
+    metrics = usage_metrics(ledger.summary("run-1"))
+
+    assert metrics["usage_total_tokens"] == 15.0
+    assert metrics["usage_task_research_task_total_tokens"] == 15.0
+    assert metrics["usage_agent_Senior_Researcher_tokens_per_second"] == 5.0